@@ -0,0 +1,86 @@
+import os
+
+import anyio.to_thread
+from fastapi.responses import JSONResponse
+
+from app.core import metrics
+from app.core.database import THREADPOOL_SIZE, THREADPOOL_HEADROOM, pool_waiters
+
+# ---------------------------------------------------
+# ADMISSION CONTROL
+# When sync endpoints are already queueing for a thread, or callers are
+# queueing for a database connection, new requests are answered 503 with
+# Retry-After straight away instead of joining a queue that ends in a
+# pool timeout. Limits are queue depths, not in-flight counts.
+# ---------------------------------------------------
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() != "false"
+ADMISSION_MAX_THREADPOOL_QUEUE = int(os.getenv("ADMISSION_MAX_THREADPOOL_QUEUE", str(THREADPOOL_SIZE)))
+# Sync pools can only have THREADPOOL_HEADROOM waiters (threads beyond the connection
+# count); at that depth every connection is busy and threads are stacking up behind them
+ADMISSION_MAX_POOL_WAITERS = int(os.getenv("ADMISSION_MAX_POOL_WAITERS", str(max(THREADPOOL_HEADROOM, 1))))
+# Waiting coroutines cost no thread, so the async pools may queue deeper
+ADMISSION_MAX_ASYNC_POOL_WAITERS = int(os.getenv("ADMISSION_MAX_ASYNC_POOL_WAITERS", "20"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+# Observability stays reachable while the API is shedding
+EXEMPT_PATHS = {"/admin/pool", "/admin/metrics"}
+
+_shed = metrics.counter("admission_shed")
+
+
+def configure_threadpool():
+    """Sizes the threadpool sync endpoints run on. Call from an async startup hook."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+def threadpool_status() -> dict:
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    return {
+        "size": stats.total_tokens,
+        "busy": stats.borrowed_tokens,
+        "waiting": stats.tasks_waiting,
+    }
+
+
+def overloaded() -> bool:
+    for name, waiting in pool_waiters().items():
+        limit = ADMISSION_MAX_ASYNC_POOL_WAITERS if name.startswith("async_") else ADMISSION_MAX_POOL_WAITERS
+        if waiting >= limit:
+            return True
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    return stats.tasks_waiting >= ADMISSION_MAX_THREADPOOL_QUEUE
+
+
+def status() -> dict:
+    return {
+        "enabled": ADMISSION_ENABLED,
+        "max_threadpool_queue": ADMISSION_MAX_THREADPOOL_QUEUE,
+        "max_pool_waiters": ADMISSION_MAX_POOL_WAITERS,
+        "max_async_pool_waiters": ADMISSION_MAX_ASYNC_POOL_WAITERS,
+        "shed": _shed.snapshot(),
+    }
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            ADMISSION_ENABLED
+            and scope["type"] == "http"
+            and scope["method"] != "OPTIONS"
+            and scope["path"] not in EXEMPT_PATHS
+            and overloaded()
+        ):
+            _shed.inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please try again shortly."},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
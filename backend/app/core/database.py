@@ -1,9 +1,18 @@
 import os
+import threading
+import time
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from app.core import metrics
+
 # Load .env locally
 load_dotenv()
 
@@ -13,15 +22,101 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set.")
 
-print("Connecting to database...")
+# ---------------------------------------------------
+# POOL SIZING
+# Sync endpoints run on the anyio threadpool and each holds a pooled
+# connection while it works, so the two are sized together: the threadpool
+# gets one thread per connection plus THREADPOOL_HEADROOM for endpoints that
+# do not touch the database. Anything beyond that queues for a thread and is
+# shed by app.core.admission before it can pile up on the pool.
+# ---------------------------------------------------
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a checkout may wait before failing; admission control sheds long before this
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+THREADPOOL_HEADROOM = int(os.getenv("THREADPOOL_HEADROOM", "5"))
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW + THREADPOOL_HEADROOM)))
+
+
+class _WaitTracking:
+    """Counts callers waiting for a connection and times each checkout (GET /admin/pool)."""
+
+    def _do_get(self):
+        name = self._orig_logging_name
+        with _waiting_lock:
+            _waiting[name] = _waiting.get(name, 0) + 1
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            metrics.counter(f"pool_timeout_{name}").inc()
+            raise
+        finally:
+            metrics.latency(f"pool_wait_{name}").observe(time.perf_counter() - started)
+            with _waiting_lock:
+                _waiting[name] -= 1
+
+
+class MonitoredQueuePool(_WaitTracking, QueuePool):
+    pass
+
+
+class MonitoredAsyncQueuePool(_WaitTracking, AsyncAdaptedQueuePool):
+    pass
+
+
+# pool name -> callers currently waiting for a connection
+_waiting = {}
+_waiting_lock = threading.Lock()
+
+# name -> engine (sync or async), for pool_status()
+_engines = {}
+
+
+def _pool_options(name: str, pool_size: int, poolclass):
+    return {
+        "poolclass": poolclass,
+        "pool_logging_name": name,
+        "pool_size": pool_size,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": 1800,
+    }
+
+
+def pool_waiters() -> dict:
+    """Pool name -> callers waiting for a connection (admission control)."""
+    with _waiting_lock:
+        return dict(_waiting)
+
+
+def pool_status() -> dict:
+    status = {}
+    for name, db_engine in _engines.items():
+        pool = db_engine.pool
+        with _waiting_lock:
+            waiting = _waiting.get(name, 0)
+        status[name] = {
+            "size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "waiting": waiting,
+            "timeouts": metrics.counter(f"pool_timeout_{name}").snapshot(),
+            "wait": metrics.latency(f"pool_wait_{name}").snapshot(),
+        }
+    return status
+
 
 engine = create_engine(
-    DATABASE_URL, 
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800
+    DATABASE_URL,
+    **_pool_options("primary", DB_POOL_SIZE, MonitoredQueuePool)
 )
+_engines["primary"] = engine
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -29,6 +124,107 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# ---------------------------------------------------
+# ASYNC ENGINE (asyncpg)
+# Same database, used by the hot read paths so they do not hold a
+# threadpool slot while waiting on Postgres.
+# ---------------------------------------------------
+
+def to_async_url(url: str):
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+
+    # asyncpg takes "ssl", not libpq's "sslmode"
+    query = dict(async_url.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        query["ssl"] = sslmode
+    return async_url.set(query=query)
+
+async_engine = create_async_engine(
+    to_async_url(DATABASE_URL),
+    **_pool_options("async_primary", int(os.getenv("ASYNC_DB_POOL_SIZE", "10")), MonitoredAsyncQueuePool)
+)
+_engines["async_primary"] = async_engine.sync_engine
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# ---------------------------------------------------
+# READ REPLICA (optional)
+# DATABASE_REPLICA_URL points read-only endpoints (lists, dashboard, export,
+# backup, lookups) at a replica with its own pools. Unset, reads share the
+# primary's engines. Setting it to DATABASE_URL itself gives the replica
+# path a separate pool on the same database, which is how to exercise it
+# locally.
+# ---------------------------------------------------
+
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# After a write, the same caller reads from the primary for this long so it
+# sees its own change despite replica lag
+PRIMARY_PIN_SECONDS = float(os.getenv("PRIMARY_PIN_SECONDS", "5"))
+
+if DATABASE_REPLICA_URL:
+    read_engine = create_engine(
+        DATABASE_REPLICA_URL,
+        **_pool_options("replica", int(os.getenv("REPLICA_POOL_SIZE", str(DB_POOL_SIZE))), MonitoredQueuePool)
+    )
+    async_read_engine = create_async_engine(
+        to_async_url(DATABASE_REPLICA_URL),
+        **_pool_options("async_replica", int(os.getenv("ASYNC_REPLICA_POOL_SIZE", "10")), MonitoredAsyncQueuePool)
+    )
+    _engines["replica"] = read_engine
+    _engines["async_replica"] = async_read_engine.sync_engine
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Authorization header -> monotonic time until which its reads go to the primary.
+# Process-local: the API runs as a single uvicorn process (see Procfile).
+_primary_pins = {}
+_primary_pins_lock = threading.Lock()
+
+
+def pin_to_primary(request: Request):
+    """Called after a successful write; see the middleware in main.py."""
+    caller = request.headers.get("authorization")
+    if not caller or read_engine is engine:
+        return
+
+    now = time.monotonic()
+    with _primary_pins_lock:
+        _primary_pins[caller] = now + PRIMARY_PIN_SECONDS
+
+        # Drop expired pins so the dict stays the size of recent writers
+        for key in [k for k, until in _primary_pins.items() if until <= now]:
+            del _primary_pins[key]
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    caller = request.headers.get("authorization")
+    if not caller:
+        return False
+
+    with _primary_pins_lock:
+        until = _primary_pins.get(caller)
+    return until is not None and until > time.monotonic()
+
+
 Base = declarative_base()
 
 def get_db():
@@ -37,3 +233,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: the replica unless the caller just wrote."""
+    session_factory = SessionLocal if is_pinned_to_primary(request) else ReadSessionLocal
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    session_factory = AsyncSessionLocal if is_pinned_to_primary(request) else AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
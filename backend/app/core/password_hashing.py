@@ -0,0 +1,82 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.core import metrics
+
+# ---------------------------------------------------
+# PASSWORD HASHING POOL
+# bcrypt runs on its own small executor so a burst of logins cannot
+# starve the threadpool that serves ordinary (sync DB) endpoints.
+# ---------------------------------------------------
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+# Raising BCRYPT_ROUNDS makes older hashes "need update"; they are
+# re-hashed on the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+_hash_latency = metrics.latency("password_hash")
+_queue_wait = metrics.latency("password_hash_queue_wait")
+_rejected = metrics.counter("password_hash_rejected")
+_rehashed = metrics.counter("password_hash_upgraded")
+
+
+class HashingOverloaded(Exception):
+    """Raised when too many hash requests are queued; maps to 503 + Retry-After."""
+
+    def __init__(self):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = PASSWORD_HASH_RETRY_AFTER
+
+
+async def _run(fn, *args):
+    if not _pending.acquire(blocking=False):
+        _rejected.inc()
+        raise HashingOverloaded()
+
+    queued_at = time.perf_counter()
+
+    def timed():
+        started = time.perf_counter()
+        _queue_wait.observe(started - queued_at)
+        try:
+            return fn(*args)
+        finally:
+            _hash_latency.observe(time.perf_counter() - started)
+
+    try:
+        return await asyncio.wrap_future(_executor.submit(timed))
+    finally:
+        _pending.release()
+
+
+async def hash_password(plain_password: str) -> str:
+    return await _run(pwd_context.hash, plain_password)
+
+
+async def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Returns (valid, new_hash). new_hash is set when the stored hash uses a
+    deprecated scheme or an outdated work factor and should be replaced.
+    """
+    valid, new_hash = await _run(pwd_context.verify_and_update, plain_password, hashed_password)
+    if valid and new_hash:
+        _rehashed.inc()
+    return valid, new_hash
@@ -0,0 +1,90 @@
+import os
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from limits import parse_many
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+from slowapi.wrappers import Limit
+
+from app.core import metrics
+
+# ---------------------------------------------------
+# RATE LIMITING (public, unauthenticated endpoints)
+# Sliding ("moving") windows. Counters live in this process by default;
+# set RATE_LIMIT_STORAGE_URI (e.g. redis://host:6379) to share them
+# between workers.
+# Client IPs come from request.client. Behind a reverse proxy uvicorn runs
+# with --proxy-headers and takes the client IP from X-Forwarded-For, but only
+# when the connection comes from FORWARDED_ALLOW_IPS (the Procfile passes it;
+# default 127.0.0.1). Set it to the platform proxy's address or range, never
+# "*": a client that can reach uvicorn directly would then pick any IP per
+# request and get a fresh budget every time.
+# ---------------------------------------------------
+
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    strategy="moving-window",
+    key_style="endpoint",  # budgets per endpoint, not per URL (which embeds the resident code)
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    enabled=RATE_LIMIT_ENABLED,
+)
+
+# Budgets; each can be overridden with RATE_LIMIT_<NAME>, e.g. RATE_LIMIT_PUBLIC_SEARCH="10/minute"
+PUBLIC_SEARCH = os.getenv("RATE_LIMIT_PUBLIC_SEARCH", "30/minute;300/hour")
+PUBLIC_LOOKUP = os.getenv("RATE_LIMIT_PUBLIC_LOOKUP", "60/minute")
+PUBLIC_CARD = os.getenv("RATE_LIMIT_PUBLIC_CARD", "60/minute")
+PUBLIC_CARD_PER_CODE = os.getenv("RATE_LIMIT_PUBLIC_CARD_PER_CODE", "30/minute")
+PUBLIC_QR = os.getenv("RATE_LIMIT_PUBLIC_QR", "20/minute")
+PUBLIC_QR_PER_CODE = os.getenv("RATE_LIMIT_PUBLIC_QR_PER_CODE", "10/minute")
+
+# Unlock is a birthdate guess: the per-code budget caps guessing from many IPs
+UNLOCK = os.getenv("RATE_LIMIT_UNLOCK", "10/minute;60/hour")
+UNLOCK_PER_CODE = os.getenv("RATE_LIMIT_UNLOCK_PER_CODE", "5 per 15 minutes;20/day")
+
+
+def resident_code_key(request: Request) -> str:
+    return "code:" + request.path_params.get("resident_code", "")
+
+
+def enforce(request: Request, limit_value: str, scope: str, key: str):
+    """
+    Checks a limit keyed on something slowapi's decorator cannot see
+    (e.g. a value from the request body). Raises RateLimitExceeded.
+    """
+    if not limiter.enabled:
+        return
+
+    for item in parse_many(limit_value):
+        if not limiter.limiter.hit(item, key, scope):
+            # Same shape slowapi records, so the handler can compute Retry-After
+            request.state.view_rate_limit = (item, [key, scope])
+            raise RateLimitExceeded(Limit(
+                item, key_func=lambda: key, scope=scope, per_method=False, methods=None,
+                error_message=None, exempt_when=None, cost=1, override_defaults=False,
+            ))
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    retry_after = 60
+    view_limit = getattr(request.state, "view_rate_limit", None)
+
+    if view_limit:
+        item, args = view_limit
+        reset_time = limiter.limiter.get_window_stats(item, *args).reset_time
+        retry_after = max(1, int(reset_time - time.time()) + 1)
+
+        # slowapi scopes decorator limits by "module.endpoint"
+        scope = args[-1].rsplit(".", 1)[-1]
+        metrics.counter(f"rate_limited_{scope}").inc()
+
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests. Please try again later."},
+        headers={"Retry-After": str(retry_after)},
+    )
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+
+from sqlalchemy import create_engine, insert
+
+from app import models
+from app.core import metrics
+from app.core.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# SLOW QUERY LOG
+# Statements slower than SLOW_QUERY_MS are kept in a ring buffer with their
+# normalized SQL, parameter types and the endpoint (plus query parameter
+# names, i.e. the filter combination) that ran them. A background thread
+# captures EXPLAIN (FORMAT JSON) on its own connection, at most once per
+# statement shape every SLOW_QUERY_EXPLAIN_INTERVAL seconds, and, with
+# SLOW_QUERY_TABLE=true, also stores each record in slow_queries.
+# Served by GET /admin/slow-queries. Timing comes from the cursor hooks in
+# app.core.sql_stats.
+# ---------------------------------------------------
+
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "true").lower() != "false"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+SLOW_QUERY_TABLE = os.getenv("SLOW_QUERY_TABLE", "false").lower() == "true"
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+# Pending EXPLAIN/insert work; when full, records stay in the buffer without a plan
+MAX_PENDING = 50
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_NUMERIC_PARAM = re.compile(r"\$(\d+)")
+
+_records = deque(maxlen=SLOW_QUERY_BUFFER)
+_records_lock = threading.Lock()
+_last_explained = {}  # statement shape -> monotonic time of its last EXPLAIN
+
+_pending = queue.Queue(maxsize=MAX_PENDING)
+_worker = None
+_worker_lock = threading.Lock()
+
+_slow = metrics.counter("slow_queries")
+
+# Own single connection: plans and inserts never wait on (or show up in) the request pools
+_engine = create_engine(DATABASE_URL, pool_size=1, max_overflow=0, pool_recycle=1800)
+
+
+def bind_shapes(parameters):
+    """Types of the bound values; large IN-lists are summarized as counts per type."""
+    if isinstance(parameters, (list, tuple)) and parameters and isinstance(parameters[0], dict):
+        parameters = parameters[0]  # executemany: the first row stands for all
+
+    if isinstance(parameters, dict):
+        shapes = {name: type(value).__name__ for name, value in parameters.items()}
+    else:
+        shapes = [type(value).__name__ for value in parameters or ()]
+
+    if len(shapes) > 20:
+        values = shapes.values() if isinstance(shapes, dict) else shapes
+        counts = {}
+        for type_name in values:
+            counts[type_name] = counts.get(type_name, 0) + 1
+        return {"count_by_type": counts}
+    return shapes
+
+
+def _request_context(stats):
+    scope = getattr(stats, "scope", None)
+    if scope is None:
+        return None, None
+
+    route = scope.get("route")
+    endpoint = f"{scope['method']} {route.path if route else scope['path']}"
+    names = sorted({name for name, _ in parse_qsl(scope.get("query_string", b"").decode("latin-1"))})
+    return endpoint, ",".join(names) or None
+
+
+def record(conn, statement: str, parameters, seconds: float, shape: str, stats=None):
+    """Called from the after_cursor_execute hook for statements over SLOW_QUERY_MS."""
+    if conn.engine is _engine:
+        return
+
+    endpoint, filters = _request_context(stats)
+    entry = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(seconds * 1000, 2),
+        "endpoint": endpoint,
+        "filters": filters,
+        "statement": shape,
+        "bind_shapes": bind_shapes(parameters),
+        "plan": None,
+    }
+
+    _slow.inc()
+    with _records_lock:
+        _records.append(entry)
+
+    explain = False
+    if _EXPLAINABLE.match(statement):
+        now = time.monotonic()
+        with _records_lock:
+            last = _last_explained.get(shape)
+            if last is None or now - last >= SLOW_QUERY_EXPLAIN_INTERVAL:
+                _last_explained[shape] = now
+                explain = True
+
+    if not explain and not SLOW_QUERY_TABLE:
+        return
+
+    work = (entry, statement if explain else None, parameters, conn.dialect.paramstyle)
+    try:
+        _pending.put_nowait(work)
+    except queue.Full:
+        return
+    _ensure_worker()
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="slow-query-explain", daemon=True)
+            _worker.start()
+
+
+def _as_pyformat(statement: str, parameters, paramstyle: str):
+    """asyncpg statements ($1, $2, ...) rewritten for the psycopg2 connection used here."""
+    if paramstyle not in ("numeric", "numeric_dollar"):
+        return statement, parameters
+
+    params = {f"p{i}": value for i, value in enumerate(parameters or (), start=1)}
+    statement = _NUMERIC_PARAM.sub(lambda m: f"%(p{m.group(1)})s", statement.replace("%", "%%"))
+    return statement, params
+
+
+def _run_worker():
+    while True:
+        entry, statement, parameters, paramstyle = _pending.get()
+        try:
+            with _engine.begin() as conn:
+                if statement is not None:
+                    explain_sql, params = _as_pyformat(statement, parameters, paramstyle)
+                    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + explain_sql, params).scalar()
+                    entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+
+                if SLOW_QUERY_TABLE:
+                    conn.execute(insert(models.SlowQuery).values(
+                        recorded_at=datetime.fromisoformat(entry["recorded_at"]),
+                        duration_ms=entry["duration_ms"],
+                        endpoint=entry["endpoint"],
+                        filters=entry["filters"],
+                        statement=entry["statement"],
+                        bind_shapes=json.dumps(entry["bind_shapes"]),
+                        plan=json.dumps(entry["plan"]) if entry["plan"] is not None else None,
+                    ))
+        except Exception as e:
+            entry["plan_error"] = str(e)
+            logger.warning("Slow query EXPLAIN failed: %s", e)
+
+
+def recent(limit: int = 50) -> list:
+    with _records_lock:
+        records = list(_records)
+    return records[::-1][:limit]
@@ -0,0 +1,207 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core import metrics, slow_queries
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# PER-REQUEST SQL INSTRUMENTATION
+# Cursor hooks on every engine time each statement: requests get their
+# count and DB time, and slow ones go to app.core.slow_queries. Each
+# response carries a Server-Timing header; per-endpoint totals are served
+# by GET /admin/sql-stats.
+# N+1 detection: a request that runs the same statement shape (parameters
+# and IN-lists collapsed) more than SQL_N_PLUS_ONE_THRESHOLD times is
+# logged; with SQL_ASSERT_N_PLUS_ONE=true (tests) it raises instead.
+# ---------------------------------------------------
+
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "true").lower() != "false"
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+SQL_ASSERT_N_PLUS_ONE = os.getenv("SQL_ASSERT_N_PLUS_ONE", "false").lower() == "true"
+
+SLOWEST_KEPT = 3
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+(?:::\w+)?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+class NPlusOneDetected(AssertionError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with its parameters and IN-lists collapsed to '?'."""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return " ".join(shape.split())
+
+
+class RequestSQLStats:
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}
+        self.slowest = []  # (seconds, statement), slowest first
+
+    def record(self, shape: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+        if len(self.slowest) < SLOWEST_KEPT or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def repeated(self):
+        return {shape: n for shape, n in self.shapes.items() if n > SQL_N_PLUS_ONE_THRESHOLD}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+_current = contextvars.ContextVar("request_sql_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+
+    seconds = time.perf_counter() - started.pop()
+    stats = _current.get()
+    slow = slow_queries.SLOW_QUERY_ENABLED and seconds * 1000 >= slow_queries.SLOW_QUERY_MS
+    if stats is None and not slow:
+        return
+
+    shape = statement_shape(statement)
+    if stats is not None:
+        stats.record(shape, seconds)
+    if slow:
+        slow_queries.record(conn, statement, parameters, seconds, shape, stats)
+
+
+def _discard_started(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install():
+    """Hooks every engine (sync, asyncpg, replica). Called once from main."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _discard_started)
+
+
+# ---------------------------------------------------
+# PER-ENDPOINT TOTALS
+# ---------------------------------------------------
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+_n_plus_one = metrics.counter("sql_n_plus_one")
+
+
+def _record_request(endpoint: str, stats: RequestSQLStats, repeated: dict):
+    with _endpoints_lock:
+        entry = _endpoints.get(endpoint)
+        if entry is None:
+            entry = _endpoints[endpoint] = {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_seconds": 0.0,
+                "max_db_seconds": 0.0,
+                "n_plus_one": 0,
+                "slowest": [],
+            }
+
+        entry["requests"] += 1
+        entry["queries"] += stats.count
+        entry["max_queries"] = max(entry["max_queries"], stats.count)
+        entry["db_seconds"] += stats.seconds
+        entry["max_db_seconds"] = max(entry["max_db_seconds"], stats.seconds)
+        if repeated:
+            entry["n_plus_one"] += 1
+
+        slowest = entry["slowest"] + stats.slowest
+        slowest.sort(key=lambda item: item[0], reverse=True)
+        entry["slowest"] = slowest[:SLOWEST_KEPT]
+
+
+def endpoint_snapshot() -> dict:
+    with _endpoints_lock:
+        items = [(name, dict(entry)) for name, entry in _endpoints.items()]
+
+    snapshot = {}
+    for name, entry in sorted(items, key=lambda item: item[1]["db_seconds"], reverse=True):
+        requests = entry["requests"]
+        snapshot[name] = {
+            "requests": requests,
+            "avg_queries": round(entry["queries"] / requests, 1),
+            "max_queries": entry["max_queries"],
+            "avg_db_ms": round(entry["db_seconds"] / requests * 1000, 2),
+            "max_db_ms": round(entry["max_db_seconds"] * 1000, 2),
+            "n_plus_one_requests": entry["n_plus_one"],
+            "slowest": [
+                {"ms": round(seconds * 1000, 2), "statement": shape}
+                for seconds, shape in entry["slowest"]
+            ],
+        }
+    return snapshot
+
+
+class SQLStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestSQLStats(scope)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+        route = scope.get("route")
+        if route is None:
+            return
+
+        endpoint = f"{scope['method']} {route.path}"
+        repeated = stats.repeated()
+        _record_request(endpoint, stats, repeated)
+
+        if repeated:
+            _n_plus_one.inc()
+            shape, times = max(repeated.items(), key=lambda item: item[1])
+            logger.warning("Possible N+1 in %s: %d x %s", endpoint, times, shape)
+            if SQL_ASSERT_N_PLUS_ONE:
+                raise NPlusOneDetected(f"{endpoint} ran {times} x {shape}")
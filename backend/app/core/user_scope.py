@@ -0,0 +1,82 @@
+from sqlalchemy.orm import Session
+
+from app import models
+
+# ---------------------------------------------------
+# USER SCOPE
+# A barangay account's scope is resolved once, when the user is created
+# (or by the startup backfill), and stored as users.barangay_id. Requests
+# read it from the token claims / auth cache; nothing re-derives it from
+# the username.
+# ---------------------------------------------------
+
+ADMIN_ROLES = ("admin", "admin_limited", "super_admin")
+
+# Username fragments of barangay accounts -> official barangay name
+BARANGAY_MAPPING = {
+    "faranal": "FARAÑAL",
+    "santo_nino": "STO NIÑO",
+    "santonino": "STO NIÑO",
+    "sto_nino": "STO NIÑO",
+    "sto nino": "STO NIÑO",
+    "sto niño": "STO NIÑO",
+    "santo nino": "STO NIÑO",
+    "santo niño": "STO NIÑO",
+    "rosete": "ROSETE",
+    "amagna": "AMAGNA",
+    "apostol": "APOSTOL",
+    "balincaguing": "BALINCAGUING",
+    "maloma": "MALOMA",
+    "sindol": "SINDOL",
+    "sanrafael": "SAN RAFAEL",
+    "san rafael": "SAN RAFAEL",
+}
+
+
+def barangay_name_for_username(username: str) -> str:
+    username_lower = username.lower()
+    for key in BARANGAY_MAPPING:
+        if key in username_lower:
+            return BARANGAY_MAPPING[key]
+    return username.replace("_", " ").title()
+
+
+def scope_name(role: str, username: str, barangay_name: str | None) -> str | None:
+    """
+    Barangay filter for a user; None means unrestricted. Accounts not linked to a
+    barangays row fall back to their username so they never see every barangay.
+    """
+    if role in ADMIN_ROLES:
+        return None
+    if barangay_name:
+        return barangay_name.upper()
+    return username.replace("_", " ").title()
+
+
+def _barangay_ids_by_name(db: Session) -> dict:
+    return {b.name.lower(): b.id for b in db.query(models.Barangay).all()}
+
+
+def assign_user_barangay(db: Session, user: models.User, barangay_ids: dict | None = None) -> None:
+    """Links a barangay account to its barangays row. Caller commits."""
+    if user.role in ADMIN_ROLES:
+        user.barangay_id = None
+        return
+
+    if barangay_ids is None:
+        barangay_ids = _barangay_ids_by_name(db)
+    user.barangay_id = barangay_ids.get(barangay_name_for_username(user.username).lower())
+
+
+def backfill_user_barangays(db: Session) -> None:
+    """Links barangay accounts created before users.barangay_id existed."""
+    users = db.query(models.User).filter(
+        models.User.barangay_id.is_(None),
+        models.User.role.notin_(ADMIN_ROLES),
+    ).all()
+
+    if users:
+        barangay_ids = _barangay_ids_by_name(db)
+        for user in users:
+            assign_user_barangay(db, user, barangay_ids)
+        db.commit()
@@ -0,0 +1,225 @@
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, load_only
+
+from app import models
+from app.crud.crud import (
+    apply_search_filter,
+    apply_barangay_filter,
+    apply_sector_filter,
+    apply_allowed_sector_filter,
+    apply_name_sort,
+    normalize_barangay_name_expr,
+    summarize_sector_counts,
+)
+
+
+# =====================================================
+# Async read paths (AsyncSession / asyncpg)
+# Same filters as the sync crud functions; the filter helpers accept
+# select() statements as well as Query objects.
+# Relationships are loaded eagerly: lazy loads are not allowed under asyncio.
+# =====================================================
+
+RESIDENT_RELATIONS = (
+    selectinload(models.ResidentProfile.family_members),
+    selectinload(models.ResidentProfile.sectors),
+    selectinload(models.ResidentProfile.assistances),
+)
+
+
+def _active_residents(stmt, search=None, barangay=None, sector=None, allowed_sector_names=None):
+    stmt = stmt.filter(models.ResidentProfile.is_deleted == False)
+    stmt = apply_search_filter(stmt, search)
+    stmt = apply_barangay_filter(stmt, barangay)
+    stmt = apply_sector_filter(stmt, sector)
+    return apply_allowed_sector_filter(stmt, allowed_sector_names)
+
+
+# =====================================================
+# RESIDENTS
+# =====================================================
+async def get_resident(
+    db: AsyncSession,
+    resident_id: int,
+    allowed_sector_names: list[str] | None = None
+):
+    stmt = _active_residents(
+        select(models.ResidentProfile).options(*RESIDENT_RELATIONS),
+        allowed_sector_names=allowed_sector_names
+    ).filter(models.ResidentProfile.id == resident_id)
+
+    return (await db.execute(stmt)).scalars().first()
+
+
+async def get_resident_count(
+    db: AsyncSession,
+    search: str = None,
+    barangay: str = None,
+    sector: str = None,
+    allowed_sector_names: list[str] | None = None
+):
+    stmt = _active_residents(
+        select(func.count(models.ResidentProfile.id)),
+        search, barangay, sector, allowed_sector_names
+    )
+
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def get_residents(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    search: str = None,
+    barangay: str = None,
+    sector: str = None,
+    sort_by: str = "last_name",
+    sort_order: str = "asc",
+    allowed_sector_names: list[str] | None = None
+):
+    stmt = _active_residents(
+        select(models.ResidentProfile).options(*RESIDENT_RELATIONS),
+        search, barangay, sector, allowed_sector_names
+    )
+
+    stmt = apply_name_sort(stmt, sort_order)
+
+    return (await db.execute(stmt.offset(skip).limit(limit))).scalars().all()
+
+
+# =====================================================
+# PUBLIC
+# =====================================================
+async def get_public_resident(db: AsyncSession, resident_code: str):
+    stmt = select(models.ResidentProfile).filter(
+        models.ResidentProfile.resident_code == resident_code,
+        models.ResidentProfile.is_deleted == False,
+        models.ResidentProfile.is_active == True
+    )
+
+    return (await db.execute(stmt)).scalars().first()
+
+
+# Columns of schemas.PublicResidentListItem; all carried by ix_resident_profiles_public_code
+PUBLIC_LIST_COLUMNS = (
+    models.ResidentProfile.resident_code,
+    models.ResidentProfile.last_name,
+    models.ResidentProfile.first_name,
+    models.ResidentProfile.middle_name,
+    models.ResidentProfile.ext_name,
+    models.ResidentProfile.barangay,
+    models.ResidentProfile.purok,
+    models.ResidentProfile.house_no,
+    models.ResidentProfile.photo_url,
+)
+
+
+async def get_public_resident_summary(db: AsyncSession, resident_code: str):
+    stmt = select(models.ResidentProfile).options(
+        load_only(*PUBLIC_LIST_COLUMNS)
+    ).filter(
+        models.ResidentProfile.resident_code == resident_code,
+        models.ResidentProfile.is_deleted == False,
+        models.ResidentProfile.is_active == True
+    )
+
+    return (await db.execute(stmt)).scalars().first()
+
+
+async def search_public_residents(db: AsyncSession, search: str, limit: int = 30):
+    pattern = f"%{search}%"
+
+    stmt = select(models.ResidentProfile).options(
+        load_only(*PUBLIC_LIST_COLUMNS)
+    ).filter(
+        models.ResidentProfile.is_deleted == False,
+        models.ResidentProfile.is_active == True,
+        models.ResidentProfile.updated_at.isnot(None),
+        models.ResidentProfile.created_at.isnot(None),
+        models.ResidentProfile.updated_at > models.ResidentProfile.created_at,
+        or_(
+            models.ResidentProfile.last_name.ilike(pattern),
+            models.ResidentProfile.first_name.ilike(pattern),
+            models.ResidentProfile.resident_code.ilike(pattern),
+            func.concat(
+                func.coalesce(models.ResidentProfile.last_name, ""), " ",
+                func.coalesce(models.ResidentProfile.first_name, "")
+            ).ilike(pattern),
+            func.concat(
+                func.coalesce(models.ResidentProfile.first_name, ""), " ",
+                func.coalesce(models.ResidentProfile.last_name, "")
+            ).ilike(pattern),
+        )
+    )
+
+    stmt = apply_name_sort(stmt).limit(limit)
+
+    return (await db.execute(stmt)).scalars().all()
+
+
+# =====================================================
+# DASHBOARD STATS
+# =====================================================
+async def get_dashboard_stats(
+    db: AsyncSession,
+    allowed_sector_names: list[str] | None = None
+):
+    sex = func.lower(models.ResidentProfile.sex)
+
+    # Totals in one pass instead of three COUNT queries
+    totals_stmt = _active_residents(
+        select(
+            func.count(models.ResidentProfile.id),
+            func.count(models.ResidentProfile.id).filter(sex.in_(["male", "m"])),
+            func.count(models.ResidentProfile.id).filter(sex.in_(["female", "f"])),
+        ),
+        allowed_sector_names=allowed_sector_names
+    )
+    total_residents, total_male, total_female = (await db.execute(totals_stmt)).one()
+
+    household_stmt = _active_residents(
+        select(
+            func.count(
+                func.distinct(
+                    func.trim(models.ResidentProfile.barangay) +
+                    "-" +
+                    func.coalesce(func.trim(models.ResidentProfile.house_no), "")
+                )
+            )
+        ),
+        allowed_sector_names=allowed_sector_names
+    )
+    total_households = (await db.execute(household_stmt)).scalar() or 0
+
+    normalized_barangay = normalize_barangay_name_expr()
+
+    barangay_counts = (await db.execute(
+        select(
+            normalized_barangay.label("barangay"),
+            func.count(models.ResidentProfile.id)
+        ).filter(
+            models.ResidentProfile.is_deleted == False
+        ).group_by(
+            normalized_barangay
+        )
+    )).all()
+
+    sector_stmt = _active_residents(
+        select(
+            models.ResidentProfile.sector_summary,
+            func.count(models.ResidentProfile.id)
+        ),
+        allowed_sector_names=allowed_sector_names
+    ).group_by(models.ResidentProfile.sector_summary)
+
+    sector_counts = (await db.execute(sector_stmt)).all()
+
+    return {
+        "total_residents": total_residents or 0,
+        "total_households": total_households,
+        "total_male": total_male or 0,
+        "total_female": total_female or 0,
+        "population_by_barangay": {b: count for b, count in barangay_counts if b},
+        "population_by_sector": summarize_sector_counts(sector_counts)
+    }
@@ -1,7 +1,8 @@
 from unicodedata import name
 
 from sqlalchemy.orm import Session, joinedload, subqueryload
-from sqlalchemy import or_, func, case
+from sqlalchemy import or_, func, case, text, select, update, literal, Float, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app import models, schemas
 from datetime import datetime
 from app.core.audit import log_action
@@ -129,6 +130,45 @@ def normalize_sector_name(name: str) -> str:
 
     return sector_aliases.get(normalized, normalized)
 
+def apply_name_sort(query, sort_order: str = "asc"):
+    # Matches ix_resident_profiles_live_name_sort; id keeps pages stable on equal names
+    keys = (
+        func.upper(models.ResidentProfile.last_name),
+        func.upper(models.ResidentProfile.first_name),
+        models.ResidentProfile.id,
+    )
+
+    if (sort_order or "asc").lower() == "desc":
+        return query.order_by(*[k.desc() for k in keys])
+    return query.order_by(*[k.asc() for k in keys])
+
+
+def find_duplicate_resident(
+    db: Session,
+    first_name: str,
+    middle_name: str,
+    last_name: str,
+    birthdate,
+    barangay: str | None = None,
+    exclude_id: int | None = None
+):
+    """Live resident with the same (upper-cased) name and birthdate, if any."""
+    query = db.query(models.ResidentProfile).filter(
+        func.upper(func.coalesce(models.ResidentProfile.last_name, "")) == last_name,
+        func.upper(func.coalesce(models.ResidentProfile.first_name, "")) == first_name,
+        func.upper(func.coalesce(models.ResidentProfile.middle_name, "")) == middle_name,
+        models.ResidentProfile.birthdate == birthdate,
+        models.ResidentProfile.is_deleted == False
+    )
+
+    if barangay is not None:
+        query = query.filter(models.ResidentProfile.barangay == barangay)
+    if exclude_id is not None:
+        query = query.filter(models.ResidentProfile.id != exclude_id)
+
+    return query.first()
+
+
 def normalize_barangay_name_expr():
     raw = func.upper(func.trim(func.coalesce(models.ResidentProfile.barangay, "")))
 
@@ -173,6 +213,30 @@ def apply_allowed_sector_filter(query, allowed_sector_names: list[str] | None =
     )
 
 
+# =====================================================
+# RESIDENT CODES
+# =====================================================
+def format_resident_code(number: int) -> str:
+    return f"SF-{number:06d}"
+
+
+def allocate_resident_codes(db: Session, count: int) -> list[str]:
+    """
+    Reserves `count` SF- codes in one round trip. nextval is atomic and takes
+    no lock, so concurrent imports and single creates never wait on each other;
+    their numbers may interleave, which codes do not need to avoid.
+    """
+    if count <= 0:
+        return []
+
+    numbers = db.execute(
+        text("SELECT nextval('resident_code_seq') FROM generate_series(1, :count)"),
+        {"count": count}
+    ).scalars().all()
+
+    return [format_resident_code(n) for n in sorted(numbers)]
+
+
 # =====================================================
 # CREATE RESIDENT
 # =====================================================
@@ -193,24 +257,21 @@ def create_resident(db: Session, resident: schemas.ResidentCreate):
     if not filtered_data.get("birthdate"):
         raise ValueError("Birthdate is required.")
 
-    existing = db.query(models.ResidentProfile).filter(
-        func.upper(func.coalesce(models.ResidentProfile.first_name, "")) == filtered_data["first_name"],
-        func.upper(func.coalesce(models.ResidentProfile.middle_name, "")) == filtered_data["middle_name"],
-        func.upper(func.coalesce(models.ResidentProfile.last_name, "")) == filtered_data["last_name"],
-        models.ResidentProfile.birthdate == filtered_data["birthdate"],
-        models.ResidentProfile.is_deleted == False
-    ).first()
+    existing = find_duplicate_resident(
+        db,
+        filtered_data["first_name"],
+        filtered_data["middle_name"],
+        filtered_data["last_name"],
+        filtered_data["birthdate"]
+    )
 
     if existing:
         raise ValueError("Resident already registered.")
 
     try:
         db_resident = models.ResidentProfile(**filtered_data)
-        db_resident.resident_code = "TEMP"
+        db_resident.resident_code = allocate_resident_codes(db, 1)[0]
         db.add(db_resident)
-        db.flush()
-
-        db_resident.resident_code = f"SF-{db_resident.id:06d}"
 
         if sector_ids:
             sectors = db.query(models.Sector).filter(models.Sector.id.in_(sector_ids)).all()
@@ -222,7 +283,7 @@ def create_resident(db: Session, resident: schemas.ResidentCreate):
         valid_fm_columns = {c.name for c in models.FamilyMember.__table__.columns}
         for member_data in family_members_data:
             filtered_member = {k: v for k, v in member_data.items() if k in valid_fm_columns}
-            db.add(models.FamilyMember(**filtered_member, profile_id=db_resident.id))
+            db_resident.family_members.append(models.FamilyMember(**filtered_member))
 
         db.commit()
         db.refresh(db_resident)
@@ -262,15 +323,15 @@ def update_resident(db: Session, resident_id: int, resident_data: schemas.Reside
     if not db_resident.birthdate:
         raise ValueError("Birthdate is required.")
 
-    existing = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.id != resident_id,
-        func.upper(func.coalesce(models.ResidentProfile.first_name, "")) == db_resident.first_name,
-        func.upper(func.coalesce(models.ResidentProfile.middle_name, "")) == db_resident.middle_name,
-        func.upper(func.coalesce(models.ResidentProfile.last_name, "")) == db_resident.last_name,
-        models.ResidentProfile.birthdate == db_resident.birthdate,
-        models.ResidentProfile.barangay == db_resident.barangay,
-        models.ResidentProfile.is_deleted == False
-    ).first()
+    existing = find_duplicate_resident(
+        db,
+        db_resident.first_name,
+        db_resident.middle_name,
+        db_resident.last_name,
+        db_resident.birthdate,
+        barangay=db_resident.barangay,
+        exclude_id=resident_id
+    )
 
     if existing:
         db.rollback()
@@ -387,6 +448,19 @@ def permanently_delete_resident(db: Session, resident_id: int):
     if not resident:
         return None
 
+    # The cascade deletes the resident's event claims; take them off the event totals
+    event_claims = db.query(
+        models.ResidentAssistance.event_id,
+        func.count(models.ResidentAssistance.id),
+        func.coalesce(func.sum(models.ResidentAssistance.amount), 0),
+    ).filter(
+        models.ResidentAssistance.resident_id == resident_id,
+        models.ResidentAssistance.event_id.isnot(None),
+    ).group_by(models.ResidentAssistance.event_id).all()
+
+    for event_id, claims, amount in event_claims:
+        _bump_event_totals(db, event_id, -claims, -amount)
+
     db.delete(resident)
     db.commit()
     return True
@@ -465,16 +539,7 @@ def get_residents(
     query = apply_sector_filter(query, sector)
     query = apply_allowed_sector_filter(query, allowed_sector_names)
 
-    if sort_order.lower() == "desc":
-        query = query.order_by(
-            func.upper(models.ResidentProfile.last_name).desc(),
-            func.upper(models.ResidentProfile.first_name).desc()
-        )
-    else:
-        query = query.order_by(
-            func.upper(models.ResidentProfile.last_name).asc(),
-            func.upper(models.ResidentProfile.first_name).asc()
-        )
+    query = apply_name_sort(query, sort_order)
 
     return query.offset(skip).limit(limit).all()
 
@@ -552,6 +617,20 @@ def get_dashboard_stats(
         models.ResidentProfile.sector_summary
     ).all()
 
+    stats_sector = summarize_sector_counts(sector_counts)
+
+    return {
+        "total_residents": total_residents,
+        "total_households": total_households,
+        "total_male": total_male,
+        "total_female": total_female,
+        "population_by_barangay": stats_barangay,
+        "population_by_sector": stats_sector
+    }
+
+
+def summarize_sector_counts(sector_counts) -> dict:
+    """(sector_summary, count) rows -> count per normalized sector name."""
     stats_sector = {}
 
     for summary, count in sector_counts:
@@ -563,14 +642,7 @@ def get_dashboard_stats(
             key = normalize_sector_name(p)
             stats_sector[key] = stats_sector.get(key, 0) + count
 
-    return {
-        "total_residents": total_residents,
-        "total_households": total_households,
-        "total_male": total_male,
-        "total_female": total_female,
-        "population_by_barangay": stats_barangay,
-        "population_by_sector": stats_sector
-    }
+    return stats_sector
 
 
 # =====================================================
@@ -595,9 +667,14 @@ def update_assistance(db: Session, assistance_id: int, data: schemas.AssistanceU
     if not assistance:
         return None
 
+    old_amount = assistance.amount or 0
+
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(assistance, key, value)
 
+    if assistance.event_id and (assistance.amount or 0) != old_amount:
+        _bump_event_totals(db, assistance.event_id, 0, (assistance.amount or 0) - old_amount)
+
     db.commit()
     db.refresh(assistance)
     return assistance
@@ -611,6 +688,123 @@ def delete_assistance(db: Session, assistance_id: int):
     if not assistance:
         return None
 
+    if assistance.event_id:
+        _bump_event_totals(db, assistance.event_id, -1, -(assistance.amount or 0))
+
     db.delete(assistance)
     db.commit()
-    return True
\ No newline at end of file
+    return True
+
+
+# =====================================================
+# DISTRIBUTION EVENTS
+# =====================================================
+def create_distribution_event(db: Session, data: schemas.DistributionEventCreate, user_id: int):
+    event = models.DistributionEvent(**data.model_dump(), created_by=user_id)
+    db.add(event)
+    db.flush()
+
+    log_action(db, user_id, "Created distribution event", "distribution_event", event.id)
+
+    db.commit()
+    db.refresh(event)
+    return event
+
+
+def get_distribution_events(db: Session, skip: int = 0, limit: int = 50):
+    return db.query(models.DistributionEvent).order_by(
+        models.DistributionEvent.id.desc()
+    ).offset(skip).limit(limit).all()
+
+
+def close_distribution_event(db: Session, event: models.DistributionEvent, user_id: int):
+    event.is_closed = True
+
+    log_action(db, user_id, "Closed distribution event", "distribution_event", event.id)
+
+    db.commit()
+    db.refresh(event)
+    return event
+
+
+def _bump_event_totals(db: Session, event_id: int, claims: int, amount: float):
+    # In the caller's transaction: totals move with the rows they count
+    return db.execute(
+        update(models.DistributionEvent)
+        .where(models.DistributionEvent.id == event_id)
+        .values(
+            claims_count=models.DistributionEvent.claims_count + claims,
+            amount_total=models.DistributionEvent.amount_total + amount,
+        )
+        .returning(models.DistributionEvent.claims_count, models.DistributionEvent.amount_total)
+    ).one()
+
+
+def record_event_claims(db: Session, event: models.DistributionEvent, resident_codes: list[str]) -> dict:
+    """
+    Records a batch of scanned codes as claims: one INSERT ... SELECT for the
+    whole batch, deduped by the (event_id, resident_id) unique index, then one
+    counter update. Concurrent batches for the same event are safe.
+    """
+    codes = list(dict.fromkeys(code.strip() for code in resident_codes if code and code.strip()))
+    today = datetime.utcnow().date()
+    # Residents store barangays upper-cased; events keep whatever was typed
+    event_barangay = event.barangay.strip().upper() if event.barangay else None
+    RP = models.ResidentProfile
+    RA = models.ResidentAssistance
+
+    matched = select(RP.id, RP.resident_code, RP.barangay).where(
+        RP.resident_code.in_(codes),
+        RP.is_deleted == False,
+    ).cte("matched")
+
+    eligible = select(
+        matched.c.id,
+        literal(event.type_of_assistance),
+        literal(event.event_date or today),
+        literal(today),
+        literal(event.amount, Float),
+        literal(event.implementing_office, String),
+        literal(event.id),
+        literal(datetime.utcnow()),
+    )
+    if event_barangay:
+        eligible = eligible.where(func.upper(func.trim(matched.c.barangay)) == event_barangay)
+
+    inserted = (
+        pg_insert(RA)
+        .from_select(
+            ["resident_id", "type_of_assistance", "date_processed", "date_claimed",
+             "amount", "implementing_office", "event_id", "created_at"],
+            eligible,
+        )
+        .on_conflict_do_nothing(index_elements=[RA.event_id, RA.resident_id])
+        .returning(RA.resident_id)
+        .cte("inserted")
+    )
+
+    rows = db.execute(
+        select(matched.c.resident_code, matched.c.barangay, inserted.c.resident_id.is_not(None))
+        .select_from(matched.outerjoin(inserted, inserted.c.resident_id == matched.c.id))
+    ).all()
+
+    result = {"claimed": [], "already_claimed": [], "not_eligible": [], "unknown": []}
+    for code, barangay, claimed in rows:
+        if claimed:
+            result["claimed"].append(code)
+        elif event_barangay and (barangay or "").strip().upper() != event_barangay:
+            result["not_eligible"].append(code)
+        else:
+            result["already_claimed"].append(code)
+
+    found = {code for code, _, _ in rows}
+    result["unknown"] = [code for code in codes if code not in found]
+
+    new_claims = len(result["claimed"])
+    result["claims_count"], result["amount_total"] = _bump_event_totals(
+        db, event.id, new_claims, new_claims * (event.amount or 0)
+    )
+
+    db.commit()
+    return result
+
@@ -1,40 +1,89 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Query, UploadFile, File
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, status, Query, UploadFile, File, Request
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Union
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import text, func, inspect, or_
-from services.import_service import process_excel_import
+from dataclasses import dataclass
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text, func, inspect, select
 import io
-import qrcode
 import json, zipfile
-import cloudinary.uploader
 from io import BytesIO
 
 # Authentication
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-import os, subprocess
+import os, subprocess, time
 from dotenv import load_dotenv
 from jose.exceptions import ExpiredSignatureError
 
 from app import models, schemas, crud
-from app.core.database import engine, get_db
-from services import report_service
+from app.crud import async_crud
+from app.core.database import (
+    engine, get_db, get_async_db, get_read_db, get_async_read_db,
+    SessionLocal, AsyncSessionLocal, pin_to_primary, pool_status,
+)
+from app.core.cache import TTLCache
+from app.core import admission, metrics, password_hashing, rate_limit, slow_queries, sql_stats, user_scope
+from services import (
+    report_service, id_card_service, import_job_service, photo_service, qr_service, resident_lookup_service, token_service,
+)
 
-import cloudinary.uploader
-from app.core.cloudinary_config import *
+from app.core.cloudinary_config import get_cloudinary
 
 # ---------------------------------------------------
 # INITIALIZE APP
+# Routes are registered on `router`; create_app() (bottom of this file)
+# builds the FastAPI app around it. Nothing here touches the database or
+# imports the heavy libraries (pandas, openpyxl, qrcode/PIL, cloudinary):
+# those load on first use. Schema is managed by Alembic (alembic upgrade head).
 # ---------------------------------------------------
 
-models.Base.metadata.create_all(bind=engine)
+router = APIRouter()
+
+async def hashing_overloaded_handler(request, exc: password_hashing.HashingOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please try again shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# --- startup hooks (registered in create_app, run in this order) ---
 
-app = FastAPI(title="San Felipe Residential Profile Form")
+async def size_threadpool():
+    admission.configure_threadpool()
+
+def backfill_user_scope():
+    db = SessionLocal()
+    try:
+        user_scope.backfill_user_barangays(db)
+    finally:
+        db.close()
+
+def load_revoked_sessions():
+    token_service.start_revocation_sync()
+
+def resume_import_jobs():
+    # Pick up imports interrupted by a worker restart
+    import_job_service.resume_import_jobs()
+
+def resume_id_card_jobs():
+    id_card_service.resume_id_card_jobs()
+
+def warm_event_lookup():
+    resident_lookup_service.warm_configured_barangays()
+
+STARTUP_HOOKS = (
+    size_threadpool,
+    backfill_user_scope,
+    load_revoked_sessions,
+    resume_import_jobs,
+    resume_id_card_jobs,
+    warm_event_lookup,
+)
 
 # ---------------------------------------------------
 # CORS
@@ -49,14 +98,26 @@ origins = [
     "https://www.sanfelipeasone.ph"
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["Content-Disposition"]
-)
+# Read-your-writes with a replica: a caller that just changed something
+# reads from the primary for database.PRIMARY_PIN_SECONDS
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+class PinWritersToPrimaryMiddleware:
+    # Plain ASGI: reads pass straight through, no per-request wrapping
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pin_to_primary(Request(scope))
+            await send(message)
+
+        await self.app(scope, receive, send_and_pin)
 
 load_dotenv()
 
@@ -73,33 +134,8 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# ---------------------------------------------------
-# BARANGAY MAPPING
-# ---------------------------------------------------
-
-BARANGAY_MAPPING = {
-    "faranal": "FARAÑAL",
-    "santo_nino": "STO NIÑO",
-    "santonino": "STO NIÑO",
-    "sto_nino": "STO NIÑO",
-    "sto nino": "STO NIÑO",
-    "sto niño": "STO NIÑO",
-    "santo nino": "STO NIÑO",
-    "santo niño": "STO NIÑO",
-    "rosete": "ROSETE",
-    "amagna": "AMAGNA",
-    "apostol": "APOSTOL",
-    "balincaguing": "BALINCAGUING",
-    "maloma": "MALOMA",
-    "sindol": "SINDOL",
-    "sanrafael": "SAN RAFAEL",
-    "san rafael": "SAN RAFAEL",
-}
-
 def rows_to_dicts(rows):
     # rows from .mappings().all() are already dict-like
     return [dict(r) for r in rows]
@@ -113,9 +149,6 @@ SUPER_ADMIN_ALLOWED_SECTORS = ["HC", "C", "M"]
 # AUTH HELPERS
 # ---------------------------------------------------
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -127,10 +160,120 @@ def create_access_token(data: dict):
 
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+def create_refresh_token(refresh_token: models.RefreshToken):
+    to_encode = {
+        "uid": refresh_token.user_id,
+        "jti": refresh_token.jti,
+        "sid": refresh_token.session_id,
+        "exp": refresh_token.expires_at,
+        "type": "refresh",
+    }
+
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def token_response(user, refresh_token: models.RefreshToken):
+    access_token = create_access_token(
+        data={
+            "sub": user.username,
+            "role": user.role,
+            "uid": user.id,
+            "sid": refresh_token.session_id,
+            "bid": user.barangay_id,
+            "brgy": user.barangay,
+        }
+    )
+
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(refresh_token),
+        "token_type": "bearer",
+        "role": user.role
+    }
+
+def decode_refresh_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    if payload.get("type") != "refresh" or not payload.get("jti"):
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    return payload
+
+# ---------------------------------------------------
+# AUTHENTICATED USER CACHE
+# ---------------------------------------------------
+
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+
+@dataclass(frozen=True)
+class AuthUser:
+    id: int
+    username: str
+    role: str
+    is_archived: bool
+    barangay: str | None  # barangay filter; None = all barangays
+    barangay_id: int | None = None
+
+auth_user_cache = TTLCache(maxsize=1024, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# Verified access token claims by token string: a repeat caller (a scanner at an
+# event) skips the signature check. Expiry is still enforced per request.
+access_claims_cache = TTLCache(maxsize=4096, ttl=AUTH_CACHE_TTL_SECONDS)
+
+def decode_access_token(token: str) -> dict:
+    payload = access_claims_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        access_claims_cache.set(token, payload)
+    elif payload.get("exp", 0) <= time.time():
+        raise ExpiredSignatureError("Signature has expired.")
+    return payload
+
+def query_user_with_barangay(db: Session):
+    return db.query(models.User, models.Barangay.name).outerjoin(
+        models.Barangay, models.Barangay.id == models.User.barangay_id
+    )
+
+def select_user_with_barangay():
+    return select(models.User, models.Barangay.name).outerjoin(
+        models.Barangay, models.Barangay.id == models.User.barangay_id
+    )
+
+def to_auth_user(user: models.User, barangay_name: str | None) -> AuthUser:
+    return AuthUser(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        is_archived=bool(user.is_archived),
+        barangay=user_scope.scope_name(user.role, user.username, barangay_name),
+        barangay_id=user.barangay_id,
+    )
+
+async def load_auth_user(user_id: int | None, username: str) -> AuthUser | None:
+    stmt = select_user_with_barangay()
+    if user_id is not None:
+        stmt = stmt.filter(models.User.id == user_id)
+    else:
+        stmt = stmt.filter(models.User.username == username)
+
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(stmt)).first()
+
+    if row is None:
+        return None
+
+    auth_user = to_auth_user(*row)
+
+    auth_user_cache.set(auth_user.id, auth_user)
+    return auth_user
+
+def evict_auth_user(user_id: int):
+    # Call after role changes, password resets, archival or deletion
+    auth_user_cache.pop(user_id)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -138,7 +281,7 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
 
         if payload.get("type") != "access":
             raise credentials_exception
@@ -152,11 +295,30 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(
-        models.User.username == username
-    ).first()
+    # Logged out / archived sessions; in-memory, no DB hit
+    session_id = payload.get("sid")
+    if session_id and token_service.is_session_revoked(session_id):
+        raise credentials_exception
+
+    # Session tokens carry the resolved scope; archival revokes the session
+    if session_id and "brgy" in payload and payload.get("uid") is not None:
+        return AuthUser(
+            id=payload["uid"],
+            username=username,
+            role=payload.get("role"),
+            is_archived=False,
+            barangay=payload["brgy"],
+            barangay_id=payload.get("bid"),
+        )
+
+    # Tokens issued before "uid" existed fall back to a username lookup
+    user_id = payload.get("uid")
 
+    user = auth_user_cache.get(user_id) if user_id is not None else None
     if user is None:
+        user = await load_auth_user(user_id, username)
+
+    if user is None or user.username != username or user.is_archived:
         raise credentials_exception
 
     return user
@@ -199,14 +361,18 @@ def verify_public_unlock_token(token: str):
 # LOGIN
 # ---------------------------------------------------
 
-@app.post("/token")
-def login(
+@router.post("/token")
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(
-        models.User.username == form_data.username
-    ).first()
+    # DB work runs on the threadpool; bcrypt runs on the dedicated hashing pool
+    row = await run_in_threadpool(
+        lambda: query_user_with_barangay(db).filter(
+            models.User.username == form_data.username
+        ).first()
+    )
+    user, barangay_name = row if row else (None, None)
 
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
@@ -219,7 +385,9 @@ def login(
         )
 
     # Check password
-    if not verify_password(form_data.password, user.hashed_password):
+    valid, new_hash = await password_hashing.verify_and_update(form_data.password, user.hashed_password)
+
+    if not valid:
 
         user.failed_attempts += 1
 
@@ -228,24 +396,64 @@ def login(
             user.locked_until = datetime.utcnow() + timedelta(minutes=1)
             user.failed_attempts = 0
 
-        db.commit()
+        await run_in_threadpool(db.commit)
 
         raise HTTPException(status_code=401, detail="Incorrect username or password")
 
-    # Successful login
+    # Successful login (upgrade legacy / low work factor hashes)
+    if new_hash:
+        user.hashed_password = new_hash
     user.failed_attempts = 0
     user.locked_until = None
-    db.commit()
+    refresh_token = token_service.start_session(db, user.id)
+    response = token_response(to_auth_user(user, barangay_name), refresh_token)
+    await run_in_threadpool(db.commit)
 
-    access_token = create_access_token(
-        data={"sub": user.username, "role": user.role}
-    )
+    return response
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "role": user.role
-    }
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+@router.post("/token/refresh")
+async def refresh_access_token(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    # No password check: the refresh token is single use and rotated on every call
+    claims = decode_refresh_token(payload.refresh_token)
+
+    try:
+        refresh_token = await run_in_threadpool(token_service.rotate_refresh_token, db, claims["jti"])
+    except token_service.RefreshTokenInvalid:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    user = await load_auth_user(refresh_token.user_id, None)
+    if user is None or user.is_archived:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    return token_response(user, refresh_token)
+
+@router.post("/logout")
+def logout(
+    payload: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    # Accepts an expired refresh token: logging out must work after a long idle
+    try:
+        claims = jwt.decode(
+            payload.refresh_token, SECRET_KEY, algorithms=[ALGORITHM],
+            options={"verify_exp": False}
+        )
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    if claims.get("type") != "refresh" or not claims.get("sid"):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    token_service.revoke_session(db, claims["sid"])
+    db.commit()
+
+    return {"message": "Logged out"}
 
 
 # ---------------------------------------------------
@@ -257,8 +465,8 @@ class UserCreate(BaseModel):
     password: str
     role: str
 
-@app.post("/users/")
-def create_user(
+@router.post("/users/")
+async def create_user(
     user: UserCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
@@ -270,19 +478,25 @@ def create_user(
     if user.role not in allowed_roles:
         raise HTTPException(status_code=400, detail=f"Invalid role. Allowed: {sorted(list(allowed_roles))}")
 
-    existing = db.query(models.User).filter(models.User.username == user.username).first()
+    existing = await run_in_threadpool(
+        lambda: db.query(models.User).filter(models.User.username == user.username).first()
+    )
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    hashed_pw = pwd_context.hash(user.password)
+    hashed_pw = await password_hashing.hash_password(user.password)
     new_user = models.User(username=user.username, hashed_password=hashed_pw, role=user.role)
 
-    db.add(new_user)
-    db.commit()
+    def link_and_commit():
+        user_scope.assign_user_barangay(db, new_user)
+        db.add(new_user)
+        db.commit()
+
+    await run_in_threadpool(link_and_commit)
     return {"message": "User created successfully"}
 
-@app.get("/users/")
-def get_users(db: Session = Depends(get_db),
+@router.get("/users/")
+def get_users(db: Session = Depends(get_read_db),
               current_user: models.User = Depends(get_current_user)):
 
     if current_user.role not in ["admin", "super_admin"]:
@@ -318,7 +532,7 @@ def deny_roles(denied_roles: list[str]):
     return role_checker
 
 
-@app.delete("/users/{user_id}", status_code=200)
+@router.delete("/users/{user_id}", status_code=200)
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
@@ -351,16 +565,18 @@ def delete_user(
 
     user_to_delete.is_archived = True
     user_to_delete.archived_at = datetime.utcnow()
+    token_service.revoke_user_sessions(db, user_to_delete.id)
 
     db.commit()
+    evict_auth_user(user_to_delete.id)
 
     return {"message": f"User '{user_to_delete.username}' Delete successfully"}
 
 class UserPasswordReset(BaseModel):
     new_password: str
     
-@app.put("/users/{user_id}/reset-password", status_code=200)
-def reset_password(
+@router.put("/users/{user_id}/reset-password", status_code=200)
+async def reset_password(
     user_id: int,
     password_data: UserPasswordReset,
     db: Session = Depends(get_db),
@@ -370,26 +586,41 @@ def reset_password(
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Only admins can reset passwords")
 
-    user_to_edit = db.query(models.User).filter(
-        models.User.id == user_id
-    ).first()
+    user_to_edit = await run_in_threadpool(
+        lambda: db.query(models.User).filter(
+            models.User.id == user_id
+        ).first()
+    )
 
     if not user_to_edit:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Hash new password
-    hashed_pw = pwd_context.hash(password_data.new_password)
+    hashed_pw = await password_hashing.hash_password(password_data.new_password)
     user_to_edit.hashed_password = hashed_pw
 
-    db.commit()
+    # Read before the commit expires the instance (a refresh would block the loop)
+    user_id, username = user_to_edit.id, user_to_edit.username
+
+    # Sign the user out everywhere
+    def revoke_and_commit():
+        token_service.revoke_user_sessions(db, user_id)
+        db.commit()
+
+    await run_in_threadpool(revoke_and_commit)
+    evict_auth_user(user_id)
 
-    return {"message": f"Password reset for {user_to_edit.username}"}
+    return {"message": f"Password reset for {username}"}
 
-@app.post("/public/residents/unlock", response_model=schemas.PublicUnlockResponse)
+@router.post("/public/residents/unlock", response_model=schemas.PublicUnlockResponse)
+@rate_limit.limiter.limit(rate_limit.UNLOCK)
 def unlock_public_resident(
+    request: Request,
     payload: schemas.PublicUnlockRequest,
     db: Session = Depends(get_db)
 ):
+    rate_limit.enforce(request, rate_limit.UNLOCK_PER_CODE, "unlock_per_code", payload.resident_code)
+
     resident = db.query(models.ResidentProfile).filter(
         models.ResidentProfile.resident_code == payload.resident_code,
         models.ResidentProfile.is_deleted == False
@@ -404,6 +635,9 @@ def unlock_public_resident(
     if resident.birthdate != payload.birthdate:
         raise HTTPException(status_code=401, detail="Invalid birthdate")
 
+    if resident.is_active:
+        cache_public_card(resident)
+
     token = create_public_unlock_token(resident.resident_code)
 
     return {
@@ -416,19 +650,13 @@ def unlock_public_resident(
 # RESIDENTS
 # ---------------------------------------------------
 
-@app.post("/residents/", response_model=schemas.Resident)
+@router.post("/residents/", response_model=schemas.Resident)
 def create_resident(resident: schemas.ResidentCreate,
                     db: Session = Depends(get_db),
                     current_user: models.User = Depends(get_current_user)):
 
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        username_lower = current_user.username.lower()
-        official_name = None
-        for key in BARANGAY_MAPPING:
-            if key in username_lower:
-                official_name = BARANGAY_MAPPING[key]
-                break
-        resident.barangay = official_name or current_user.username.replace("_", " ").title()
+    if current_user.barangay:
+        resident.barangay = current_user.barangay
         resident.barangay_id = None
 
     if resident.barangay_id and not resident.barangay:
@@ -447,7 +675,7 @@ def create_resident(resident: schemas.ResidentCreate,
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.put("/residents/{resident_id}", response_model=schemas.Resident)
+@router.put("/residents/{resident_id}", response_model=schemas.Resident)
 def update_resident(
     resident_id: int,
     resident: schemas.ResidentUpdate,
@@ -455,14 +683,8 @@ def update_resident(
     current_user: models.User = Depends(get_current_user)
 ):
         
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        username_lower = current_user.username.lower()
-        official_name = None
-        for key in BARANGAY_MAPPING:
-            if key in username_lower:
-                official_name = BARANGAY_MAPPING[key]
-                break
-        resident.barangay = official_name or current_user.username.replace("_", " ").title()
+    if current_user.barangay:
+        resident.barangay = current_user.barangay
         resident.barangay_id = None
 
     if resident.barangay_id and not resident.barangay:
@@ -488,9 +710,12 @@ def update_resident(
     if not db_resident:
         raise HTTPException(status_code=404, detail="Resident not found")
 
+    # May have been deactivated
+    forget_public_resident(db_resident.resident_code)
+
     return db_resident
 
-@app.post("/residents/{resident_id}/assistance")
+@router.post("/residents/{resident_id}/assistance")
 def create_assistance(
     resident_id: int,
     assistance: schemas.AssistanceCreate,
@@ -502,7 +727,7 @@ def create_assistance(
 
     return crud.add_assistance(db, resident_id, assistance)
 
-@app.put("/assistances/{assistance_id}")
+@router.put("/assistances/{assistance_id}")
 def edit_assistance(
     assistance_id: int,
     assistance: schemas.AssistanceUpdate,
@@ -520,7 +745,7 @@ def edit_assistance(
     return result
 
 
-@app.delete("/assistances/{assistance_id}")
+@router.delete("/assistances/{assistance_id}")
 def remove_assistance(
     assistance_id: int,
     db: Session = Depends(get_db),
@@ -536,11 +761,72 @@ def remove_assistance(
 
     return {"message": "Assistance record deleted"}
 
-@app.post("/residents/{resident_id}/upload-photo")
+# ---------------------------------------------------
+# DISTRIBUTION EVENTS
+# ---------------------------------------------------
+
+EVENT_ROLES = ["admin", "admin_limited", "super_admin"]
+
+def get_event_or_404(db: Session, event_id: int) -> models.DistributionEvent:
+    event = db.query(models.DistributionEvent).filter(models.DistributionEvent.id == event_id).first()
+    if not event:
+        raise HTTPException(status_code=404, detail="Distribution event not found")
+    return event
+
+@router.post("/events", response_model=schemas.DistributionEvent)
+def create_distribution_event(
+    data: schemas.DistributionEventCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(EVENT_ROLES))
+):
+    return crud.create_distribution_event(db, data, current_user.id)
+
+@router.get("/events", response_model=List[schemas.DistributionEvent])
+def list_distribution_events(
+    skip: int = 0,
+    limit: int = Query(50, le=200),
+    db: Session = Depends(get_read_db),
+    _: models.User = Depends(require_role(EVENT_ROLES))
+):
+    return crud.get_distribution_events(db, skip, limit)
+
+@router.get("/events/{event_id}", response_model=schemas.DistributionEvent)
+def get_distribution_event(
+    event_id: int,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_role(EVENT_ROLES))
+):
+    # Primary: the live totals move with every batch
+    return get_event_or_404(db, event_id)
+
+@router.post("/events/{event_id}/claims", response_model=schemas.EventClaimsResult)
+def record_event_claims(
+    event_id: int,
+    payload: schemas.EventClaimsRequest,
+    db: Session = Depends(get_db),
+    _: models.User = Depends(require_role(EVENT_ROLES))
+):
+    event = get_event_or_404(db, event_id)
+
+    if event.is_closed:
+        raise HTTPException(status_code=409, detail="Distribution event is closed")
+
+    return crud.record_event_claims(db, event, payload.resident_codes)
+
+@router.put("/events/{event_id}/close", response_model=schemas.DistributionEvent)
+def close_distribution_event(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(EVENT_ROLES))
+):
+    event = get_event_or_404(db, event_id)
+    return crud.close_distribution_event(db, event, current_user.id)
+
+@router.post("/residents/{resident_id}/upload-photo")
 async def upload_resident_photo(
     resident_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # 🔒 Allow admin, admin_limited, and barangay to upload photo
@@ -548,10 +834,12 @@ async def upload_resident_photo(
     if current_user.role not in allowed_roles:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    resident = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.id == resident_id,
-        models.ResidentProfile.is_deleted == False
-    ).first()
+    resident = (await db.execute(
+        select(models.ResidentProfile).filter(
+            models.ResidentProfile.id == resident_id,
+            models.ResidentProfile.is_deleted == False
+        )
+    )).scalars().first()
 
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
@@ -560,33 +848,32 @@ async def upload_resident_photo(
     if not file.content_type or not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
 
+    content = await file.read()
     try:
-        # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
-            file.file,
-            folder="san_felipe_residents",
-            public_id=f"resident_{resident.id}",
-            overwrite=True
-        )
+        await run_in_threadpool(photo_service.check_photo, content)
+    except photo_service.InvalidPhoto as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        # Save URL to database
-        resident.photo_url = result["secure_url"]
-        db.commit()
+    # Resizing and the Cloudinary upload run on the photo pool; the current
+    # photo_url stays until the new one is ready
+    resident.photo_status = "processing"
+    await db.commit()
 
-        return {
-            "message": "Photo uploaded successfully",
-            "photo_url": resident.photo_url
-        }
+    resident_code = resident.resident_code
+    photo_service.submit_photo(resident.id, content, on_done=lambda: forget_public_resident(resident_code))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "message": "Photo is being processed",
+        "photo_status": resident.photo_status,
+        "photo_url": resident.photo_url,
+    })
 
 # ------------------------------
 # ARCHIVED ROUTE (MUST BE FIRST)
 # ------------------------------
 
-@app.get("/residents/archived")
-def get_archived_residents(db: Session = Depends(get_db),
+@router.get("/residents/archived")
+def get_archived_residents(db: Session = Depends(get_read_db),
                            current_user: models.User = Depends(get_current_user)):
 
     if current_user.role not in ["admin", "super_admin"]:
@@ -596,7 +883,7 @@ def get_archived_residents(db: Session = Depends(get_db),
         models.ResidentProfile.is_deleted == True
     ).all()
     
-@app.put("/residents/{resident_id}/archive")
+@router.put("/residents/{resident_id}/archive")
 def archive_resident(
     resident_id: int,
     db: Session = Depends(get_db),
@@ -606,6 +893,8 @@ def archive_resident(
     if not result:
         raise HTTPException(status_code=404, detail="Resident not found")
 
+    forget_public_resident(result.resident_code)
+
     return {"message": "Resident archived successfully"}
 
 def _dump_table_if_exists(db: Session, z: zipfile.ZipFile, table_name: str):
@@ -622,14 +911,65 @@ def _dump_table_if_exists(db: Session, z: zipfile.ZipFile, table_name: str):
     z.writestr(f"{table_name}.json", json.dumps(data, default=str))
     return {"table": table_name, "status": "ok", "count": len(data)}
 
-@app.get("/admin/backup/data")
-def backup_data_zip(
+@router.get("/admin/metrics")
+def get_metrics(current_user: models.User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return metrics.snapshot()
+
+@router.get("/admin/pool")
+async def get_pool_status(current_user: models.User = Depends(get_current_user)):
+    # async: answers without a threadpool slot, even when every thread is busy
+    if current_user.role not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return {
+        "pools": pool_status(),
+        "threadpool": admission.threadpool_status(),
+        "admission": admission.status(),
+    }
+
+@router.get("/admin/sql-stats")
+def get_sql_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return sql_stats.endpoint_snapshot()
+
+@router.get("/admin/slow-queries")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    persisted: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Admin only")
 
+    if not persisted:
+        return slow_queries.recent(limit)
+
+    # Older records, from the slow_queries table (SLOW_QUERY_TABLE=true)
+    rows = db.query(models.SlowQuery).order_by(models.SlowQuery.recorded_at.desc()).limit(limit).all()
+    return [
+        {
+            "recorded_at": row.recorded_at,
+            "duration_ms": row.duration_ms,
+            "endpoint": row.endpoint,
+            "filters": row.filters,
+            "statement": row.statement,
+            "bind_shapes": json.loads(row.bind_shapes) if row.bind_shapes else None,
+            "plan": json.loads(row.plan) if row.plan else None,
+        }
+        for row in rows
+    ]
+
+@router.get("/admin/backup/data")
+def backup_data_zip(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.role not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Admin only")
+
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     filename = f"sanfelipe_backup_data_{ts}.zip"
 
@@ -681,7 +1021,7 @@ def backup_data_zip(
         # ✅ you will now SEE the real reason (table missing, SQL error, etc.)
         raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
     
-@app.get("/admin/backup/photos")
+@router.get("/admin/backup/photos")
 def backup_photos_zip(
     current_user: models.User = Depends(get_current_user),
 ):
@@ -691,7 +1031,7 @@ def backup_photos_zip(
     try:
         # Creates a ZIP and uploads it to your Cloudinary as a RAW asset
         # You can then download it via the returned URL
-        result = cloudinary.api.create_archive(
+        result = get_cloudinary().api.create_archive(
             resource_type="image",
             type="upload",
             prefix="san_felipe_residents",  # folder name you used in upload
@@ -705,7 +1045,7 @@ def backup_photos_zip(
 # PROMOTE FAMILY HEAD
 # ------------------------------
 
-@app.put("/residents/{resident_id}/promote")
+@router.put("/residents/{resident_id}/promote")
 def promote_family_head(
     resident_id: int,
     new_head_member_id: str,
@@ -805,7 +1145,7 @@ def promote_family_head(
 
     return {"message": "Family head successfully replaced"}
 
-@app.put("/residents/{resident_id}/promote-spouse")
+@router.put("/residents/{resident_id}/promote-spouse")
 def promote_spouse_to_head(
     resident_id: int,
     reason: str,
@@ -875,30 +1215,24 @@ def promote_spouse_to_head(
 # LIST RESIDENTS
 # ------------------------------
 
-@app.get("/residents/", response_model=schemas.ResidentPagination)
-def read_residents(skip: int = 0,
+@router.get("/residents/", response_model=schemas.ResidentPagination)
+async def read_residents(skip: int = 0,
                    limit: int = 20,
                    search: str = None,
                    barangay: str = Query(None),
                    sector: str = Query(None),
                    sort_by: str = Query("last_name"),
                    sort_order: str = Query("asc"),
-                   db: Session = Depends(get_db),
+                   db: AsyncSession = Depends(get_async_read_db),
                    current_user: models.User = Depends(get_current_user)):
 
     filter_barangay = barangay
     allowed_sectors = None
 
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        username_lower = current_user.username.lower()
-        official_name = None
-        for key in BARANGAY_MAPPING:
-            if key in username_lower:
-                official_name = BARANGAY_MAPPING[key]
-                break
-        filter_barangay = official_name or current_user.username.replace("_", " ").title()
-
-    total = crud.get_resident_count(
+    if current_user.barangay:
+        filter_barangay = current_user.barangay
+
+    total = await async_crud.get_resident_count(
         db,
         search=search,
         barangay=filter_barangay,
@@ -906,7 +1240,7 @@ def read_residents(skip: int = 0,
         allowed_sector_names=allowed_sectors
     )
 
-    residents = crud.get_residents(
+    residents = await async_crud.get_residents(
         db,
         skip=skip,
         limit=limit,
@@ -925,163 +1259,217 @@ def read_residents(skip: int = 0,
         "size": limit
     }
 
-@app.get("/residents/{resident_id}", response_model=schemas.Resident)
-def read_resident(resident_id: int,
-                  db: Session = Depends(get_db),
-                  current_user: models.User = Depends(get_current_user)):
+@router.get("/residents/{resident_id}", response_model=schemas.Resident)
+async def read_resident(resident_id: int,
+                        db: AsyncSession = Depends(get_async_read_db),
+                        current_user: models.User = Depends(get_current_user)):
 
-    resident = crud.get_resident(db, resident_id)
+    resident = await async_crud.get_resident(db, resident_id)
 
     if not resident:
         raise HTTPException(status_code=404)
 
     return resident
 
-@app.get("/residents/code/{resident_code}/qr")
+# Unlocked public cards, keyed by resident_code. Filled by unlock, so the card
+# page right after it needs no lookup; update/delete/archive evict the entry.
+PUBLIC_CARD_CACHE_TTL_SECONDS = int(os.getenv("PUBLIC_CARD_CACHE_TTL_SECONDS", "120"))
+public_card_cache = TTLCache(maxsize=1024, ttl=PUBLIC_CARD_CACHE_TTL_SECONDS)
+
+def cache_public_card(resident: models.ResidentProfile) -> schemas.PublicResident:
+    card = schemas.PublicResident.model_validate(resident)
+    public_card_cache.set(resident.resident_code, card)
+    qr_service.remember_code(resident.resident_code)
+    return card
+
+def forget_public_resident(resident_code: str | None):
+    # Call after a resident is updated, deleted or archived
+    if resident_code:
+        public_card_cache.pop(resident_code)
+    qr_service.forget_code(resident_code)
+
+async def load_public_card(db: AsyncSession, resident_code: str, token: str) -> schemas.PublicResident:
+    """Shared by the public card, QR and card-bundle endpoints."""
+    unlocked_code = verify_public_unlock_token(token)
+
+    if unlocked_code != resident_code:
+        raise HTTPException(status_code=403, detail="Token does not match resident")
+
+    card = public_card_cache.get(resident_code)
+    if card is not None:
+        return card
+
+    resident = await async_crud.get_public_resident(db, resident_code)
+
+    if not resident:
+        raise HTTPException(status_code=404, detail="Resident not found")
+
+    return cache_public_card(resident)
+
+QR_FORMATS = "^(png|svg)$"
+
+def qr_response(request: Request, resident_code: str, size: int, fmt: str, cache_control: str):
+    content, etag = qr_service.get_qr(resident_code, size, fmt)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content, media_type=qr_service.MEDIA_TYPES[fmt], headers=headers)
+
+@router.get("/residents/code/{resident_code}/qr")
 def generate_resident_qr(
+    request: Request,
     resident_code: str,
-    db: Session = Depends(get_db),
+    size: int = Query(qr_service.DEFAULT_SIZE, ge=qr_service.MIN_SIZE, le=qr_service.MAX_SIZE),
+    fmt: str = Query("png", alias="format", pattern=QR_FORMATS),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # ✅ Restrict to admin only
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Admin only")
 
-    resident = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.resident_code == resident_code,
-        models.ResidentProfile.is_deleted == False
-    ).first()
+    if not qr_service.is_known_code(resident_code):
+        resident = db.query(models.ResidentProfile).filter(
+            models.ResidentProfile.resident_code == resident_code,
+            models.ResidentProfile.is_deleted == False
+        ).first()
 
-    if not resident:
-        raise HTTPException(status_code=404, detail="Resident not found")
+        if not resident:
+            raise HTTPException(status_code=404, detail="Resident not found")
 
-    qr = qrcode.make(resident.resident_code)
+        if resident.is_active:
+            qr_service.remember_code(resident_code)
 
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    buffer.seek(0)
+    # Behind auth: browsers may keep it, shared caches may not
+    return qr_response(request, resident_code, size, fmt, "private, max-age=31536000, immutable")
 
-    return StreamingResponse(buffer, media_type="image/png")
+# ---------------------------------------------------
+# EVENT MODE (QR scanning at distributions)
+# ---------------------------------------------------
 
-@app.get("/residents/code/{resident_code}", response_model=schemas.Resident)
-def get_resident_by_code(
+@router.get("/residents/lookup/{resident_code}", response_model=schemas.ResidentLookup)
+async def lookup_resident(
     resident_code: str,
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     if current_user.role not in ["admin", "super_admin"]:
         raise HTTPException(status_code=403, detail="Admin access only")
 
-    resident = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.resident_code == resident_code,
-        models.ResidentProfile.is_deleted == False
-    ).first()
+    # Cached JSON goes out as is; only a miss touches the database
+    payload = resident_lookup_service.get(resident_code)
+    if payload is None:
+        payload = await run_in_threadpool(resident_lookup_service.load, resident_code)
 
-    if not resident:
+    if payload is None:
         raise HTTPException(status_code=404, detail="Resident not found")
 
-    return resident
+    return Response(payload, media_type="application/json")
 
-@app.get("/public/residents/code/{resident_code}/qr")
-def get_public_resident_qr(
-    resident_code: str,
-    token: str = Query(...),
-    db: Session = Depends(get_db)
+@router.post("/admin/event-lookup/warm")
+def warm_resident_lookup(
+    barangay: str = Query(...),
+    current_user: models.User = Depends(require_role(["admin", "super_admin"]))
 ):
-    unlocked_code = verify_public_unlock_token(token)
+    # Per worker: set EVENT_LOOKUP_WARM_BARANGAYS to warm every worker at startup
+    return resident_lookup_service.warm_barangay(barangay)
 
-    if unlocked_code != resident_code:
-        raise HTTPException(status_code=403, detail="Token does not match resident")
+@router.get("/admin/event-lookup")
+def get_resident_lookup_cache(
+    current_user: models.User = Depends(require_role(["admin", "super_admin"]))
+):
+    return resident_lookup_service.status()
+
+@router.get("/residents/code/{resident_code}", response_model=schemas.Resident)
+def get_resident_by_code(
+    resident_code: str,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.role not in ["admin", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Admin access only")
 
     resident = db.query(models.ResidentProfile).filter(
         models.ResidentProfile.resident_code == resident_code,
-        models.ResidentProfile.is_deleted == False,
-        models.ResidentProfile.is_active == True
+        models.ResidentProfile.is_deleted == False
     ).first()
 
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
 
-    qr = qrcode.make(resident.resident_code)
+    return resident
 
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
-    buffer.seek(0)
+@router.get("/public/residents/code/{resident_code}/qr")
+@rate_limit.limiter.limit(rate_limit.PUBLIC_QR)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_QR_PER_CODE, key_func=rate_limit.resident_code_key)
+async def get_public_resident_qr(
+    request: Request,
+    resident_code: str,
+    token: str = Query(...),
+    size: int = Query(qr_service.DEFAULT_SIZE, ge=qr_service.MIN_SIZE, le=qr_service.MAX_SIZE),
+    fmt: str = Query("png", alias="format", pattern=QR_FORMATS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    await load_public_card(db, resident_code, token)
 
-    return StreamingResponse(buffer, media_type="image/png")
+    # The image only encodes the code in the URL; any cache may keep it
+    return await run_in_threadpool(
+        qr_response, request, resident_code, size, fmt, "public, max-age=31536000, immutable"
+    )
 
-@app.get("/public/residents/code/{resident_code}", response_model=schemas.PublicResidentListItem)
-def get_public_resident_by_code(
+@router.get("/public/residents/code/{resident_code}", response_model=schemas.PublicResidentListItem)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_LOOKUP)
+async def get_public_resident_by_code(
+    request: Request,
     resident_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    resident = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.resident_code == resident_code,
-        models.ResidentProfile.is_deleted == False,
-        models.ResidentProfile.is_active == True
-    ).first()
+    resident = await async_crud.get_public_resident_summary(db, resident_code)
 
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
 
     return resident
 
-@app.get("/public/residents/code/{resident_code}/card", response_model=schemas.PublicResident)
-def get_public_resident_card(
+@router.get("/public/residents/code/{resident_code}/card", response_model=schemas.PublicResident)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_CARD)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_CARD_PER_CODE, key_func=rate_limit.resident_code_key)
+async def get_public_resident_card(
+    request: Request,
     resident_code: str,
     token: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    unlocked_code = verify_public_unlock_token(token)
+    return await load_public_card(db, resident_code, token)
 
-    if unlocked_code != resident_code:
-        raise HTTPException(status_code=403, detail="Token does not match resident")
-
-    resident = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.resident_code == resident_code,
-        models.ResidentProfile.is_deleted == False,
-        models.ResidentProfile.is_active == True
-    ).first()
+@router.get("/public/residents/code/{resident_code}/card-bundle", response_model=schemas.PublicResidentCard)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_CARD)
+@rate_limit.limiter.limit(rate_limit.PUBLIC_CARD_PER_CODE, key_func=rate_limit.resident_code_key)
+async def get_public_resident_card_bundle(
+    request: Request,
+    resident_code: str,
+    token: str = Query(...),
+    size: int = Query(qr_service.DEFAULT_SIZE, ge=qr_service.MIN_SIZE, le=qr_service.MAX_SIZE),
+    fmt: str = Query("png", alias="format", pattern=QR_FORMATS),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    # The public card page in one round trip: card fields plus the QR inline
+    card = await load_public_card(db, resident_code, token)
+    qr = await run_in_threadpool(qr_service.get_data_uri, resident_code, size, fmt)
 
-    if not resident:
-        raise HTTPException(status_code=404, detail="Resident not found")
+    return schemas.PublicResidentCard(**card.model_dump(), qr=qr)
 
-    return resident
-
-@app.get("/public/residents/search", response_model=list[schemas.PublicResidentListItem])
-def public_search_residents(
+@router.get("/public/residents/search", response_model=list[schemas.PublicResidentListItem])
+@rate_limit.limiter.limit(rate_limit.PUBLIC_SEARCH)
+async def public_search_residents(
+    request: Request,
     q: str = Query(..., min_length=1),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    search = q.strip()
-
-    residents = db.query(models.ResidentProfile).filter(
-        models.ResidentProfile.is_deleted == False,
-        models.ResidentProfile.is_active == True,
-        models.ResidentProfile.updated_at.isnot(None),
-        models.ResidentProfile.created_at.isnot(None),
-        models.ResidentProfile.updated_at > models.ResidentProfile.created_at,
-        or_(
-            models.ResidentProfile.last_name.ilike(f"%{search}%"),
-            models.ResidentProfile.first_name.ilike(f"%{search}%"),
-            models.ResidentProfile.resident_code.ilike(f"%{search}%"),
-            func.concat(
-                func.coalesce(models.ResidentProfile.last_name, ""), " ",
-                func.coalesce(models.ResidentProfile.first_name, "")
-            ).ilike(f"%{search}%"),
-            func.concat(
-                func.coalesce(models.ResidentProfile.first_name, ""), " ",
-                func.coalesce(models.ResidentProfile.last_name, "")
-            ).ilike(f"%{search}%"),
-        )
-    ).order_by(
-        func.upper(models.ResidentProfile.last_name).asc(),
-        func.upper(models.ResidentProfile.first_name).asc()
-    ).limit(30).all()
+    return await async_crud.search_public_residents(db, q.strip())
 
-    return residents
-
-@app.delete("/residents/{resident_id}")
+@router.delete("/residents/{resident_id}")
 def soft_delete_resident(
     resident_id: int,
     db: Session = Depends(get_db),
@@ -1091,27 +1479,34 @@ def soft_delete_resident(
     if not result:
         raise HTTPException(status_code=404)
 
+    forget_public_resident(result.resident_code)
+
     return {"message": "Resident archived"}
 
-@app.delete("/residents/{resident_id}/permanent")
+@router.delete("/residents/{resident_id}/permanent")
 def permanently_delete_resident(
     resident_id: int,
     db: Session = Depends(get_db),
     _: models.User = Depends(require_role(["admin", "super_admin"]))
 ):
+    resident_code = db.query(models.ResidentProfile.resident_code).filter(
+        models.ResidentProfile.id == resident_id
+    ).scalar()
 
     result = crud.permanently_delete_resident(db, resident_id)
 
     if not result:
         raise HTTPException(status_code=404, detail="Resident not found")
 
+    forget_public_resident(resident_code)
+
     return {"message": "Resident permanently deleted"}
 
 # ---------------------------------------------------
 # RESTORE
 # ---------------------------------------------------
 
-@app.put("/residents/{resident_id}/restore")
+@router.put("/residents/{resident_id}/restore")
 def restore_resident(
     resident_id: int,
     db: Session = Depends(get_db),
@@ -1127,14 +1522,14 @@ def restore_resident(
 # DASHBOARD
 # ---------------------------------------------------
 
-@app.get("/dashboard/stats", response_model=schemas.DashboardStats)
-def get_stats(db: Session = Depends(get_db),
-              current_user: models.User = Depends(get_current_user)):
+@router.get("/dashboard/stats", response_model=schemas.DashboardStats)
+async def get_stats(db: AsyncSession = Depends(get_async_read_db),
+                    current_user: models.User = Depends(get_current_user)):
 
     if current_user.role not in ["admin", "admin_limited", "super_admin"]:
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    stats = crud.get_dashboard_stats(db)
+    stats = await async_crud.get_dashboard_stats(db)
 
     if current_user.role != "super_admin":
         hidden_sector_names = {"HC", "C", "M"}
@@ -1151,22 +1546,82 @@ def get_stats(db: Session = Depends(get_db),
 # Import/Export
 # ---------------------------------------------------
 
-@app.get("/export/excel")
+@router.post("/import/excel", response_model=Union[schemas.ImportJob, schemas.ImportDryRunReport], status_code=202)
+def import_residents_excel(
+    file: UploadFile = File(...),
+    all_sheets: bool = Query(False),
+    dry_run: bool = Query(False),
+    report: str = Query("json"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    content = file.file.read()
+    if not content:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+    if dry_run:
+        from services.import_service import dry_run_import, problems_to_csv
+
+        # Full transform + one duplicate probe, nothing written
+        try:
+            dry_report, problems = dry_run_import(BytesIO(content), db, all_sheets=all_sheets)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Could not read workbook: {str(e)}")
+
+        if report == "csv":
+            filename = f"import_problems_{os.path.splitext(file.filename or 'upload')[0]}.csv"
+            return StreamingResponse(
+                iter([problems_to_csv(problems)]),
+                media_type="text/csv",
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+
+        return JSONResponse(status_code=200, content=schemas.ImportDryRunReport(**dry_report).model_dump())
+
+    # Same file content -> same job, so a re-upload after a timeout just resumes polling
+    job = import_job_service.get_or_create_job(
+        db, content, file.filename, current_user.id, all_sheets=all_sheets
+    )
+
+    if job.status in import_job_service.ACTIVE_STATUSES:
+        import_job_service.submit_import_job(job.id)
+
+    return job
+
+@router.get("/imports/{job_id}", response_model=schemas.ImportJob)
+def get_import_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    # Re-queue on this worker if the one running it went away (claim is stale-safe)
+    if import_job_service.is_stale(job):
+        import_job_service.submit_import_job(job.id)
+
+    return job
+
+@router.get("/export/excel")
 def export_residents_excel(
     barangay: str = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # Restrict barangay automatically for non-admin
     target_barangay = barangay
 
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        official_name = BARANGAY_MAPPING.get(current_user.username.lower())
-
-        if official_name:
-            target_barangay = official_name
-        else:
-            target_barangay = current_user.username.replace("_", " ").title()
+    if current_user.barangay:
+        target_barangay = current_user.barangay
 
     try:
         excel_file = report_service.generate_household_excel(
@@ -1189,22 +1644,17 @@ def export_residents_excel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/export/excel")
+@router.get("/export/excel")
 def export_residents_excel(
     barangay: str = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     # Restrict barangay automatically for non-admin
     target_barangay = barangay
 
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        official_name = BARANGAY_MAPPING.get(current_user.username.lower())
-
-        if official_name:
-            target_barangay = official_name
-        else:
-            target_barangay = current_user.username.replace("_", " ").title()
+    if current_user.barangay:
+        target_barangay = current_user.barangay
 
     try:
         excel_file = report_service.generate_household_excel(
@@ -1230,23 +1680,107 @@ def export_residents_excel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ---------------------------------------------------
+# ID CARDS
+# ---------------------------------------------------
+
+def get_id_card_job_for(db: Session, job_id: int, current_user) -> models.IdCardJob:
+    job = db.query(models.IdCardJob).filter(models.IdCardJob.id == job_id).first()
+
+    # Barangay accounts only see their own barangay's batches
+    if not job or (current_user.barangay and job.barangay != current_user.barangay):
+        raise HTTPException(status_code=404, detail="ID card job not found")
+
+    return job
+
+@router.post("/id-cards/batch", response_model=schemas.IdCardJob, status_code=202)
+def create_id_cards(
+    barangay: str = Query(None),
+    sector_id: int = Query(None),
+    fmt: str = Query("pdf", alias="format", pattern="^(pdf|zip)$"),
+    background: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_role(["admin", "admin_limited", "barangay", "super_admin"]))
+):
+    # Restrict barangay automatically for non-admin
+    target_barangay = barangay
+
+    if current_user.barangay:
+        target_barangay = current_user.barangay
+
+    total = id_card_service.count_cards(db, target_barangay, sector_id)
+    if not total:
+        raise HTTPException(status_code=404, detail="No residents match the filter")
+
+    # Large barangays: render in the background and poll /id-cards/jobs/{id}
+    if background or total > id_card_service.ID_CARD_SYNC_LIMIT:
+        job = id_card_service.create_job(db, target_barangay, sector_id, fmt, total, current_user.id)
+        id_card_service.submit_id_card_job(job.id)
+        return job
+
+    cards = id_card_service.load_cards(db, target_barangay, sector_id)
+    filename = id_card_service.download_name(target_barangay, fmt)
+
+    return StreamingResponse(
+        id_card_service.stream_cards(cards, fmt),
+        status_code=200,
+        media_type=id_card_service.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@router.get("/id-cards/jobs/{job_id}", response_model=schemas.IdCardJob)
+def get_id_card_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    job = get_id_card_job_for(db, job_id, current_user)
+
+    # Re-queue on this worker if the one running it went away (claim is stale-safe)
+    if id_card_service.is_stale(job):
+        id_card_service.submit_id_card_job(job.id)
+
+    return job
+
+@router.get("/id-cards/jobs/{job_id}/download")
+def download_id_card_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    job = get_id_card_job_for(db, job_id, current_user)
+
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"ID card job is {job.status}")
+
+    path = id_card_service.output_path(job)
+    if not os.path.exists(path):
+        # Written on another host, or cleaned up
+        raise HTTPException(status_code=404, detail="ID card file not available on this server")
+
+    return FileResponse(
+        path,
+        media_type=id_card_service.FORMATS[job.output_format],
+        filename=id_card_service.download_name(job.barangay, job.output_format),
+    )
+
 # ---------------------------------------------------
 # REFERENCE DATA
 # ---------------------------------------------------
 
-@app.get("/barangays/")
-def get_barangays(db: Session = Depends(get_db),
+@router.get("/barangays/")
+def get_barangays(db: Session = Depends(get_read_db),
                   current_user: models.User = Depends(get_current_user)):
     return db.query(models.Barangay).all()
 
-@app.get("/puroks/")
-def get_puroks(db: Session = Depends(get_db),
+@router.get("/puroks/")
+def get_puroks(db: Session = Depends(get_read_db),
                current_user: models.User = Depends(get_current_user)):
     return db.query(models.Purok).all()
 
-@app.get("/sectors/")
+@router.get("/sectors/")
 def get_sectors(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user)
 ):
     query = db.query(models.Sector)
@@ -1261,18 +1795,18 @@ def get_sectors(
 
     return query.order_by(func.upper(models.Sector.name).asc()).all()
 
-@app.get("/relationships/")
-def get_relationships(db: Session = Depends(get_db),
+@router.get("/relationships/")
+def get_relationships(db: Session = Depends(get_read_db),
                       current_user: models.User = Depends(get_current_user)):
     return db.query(models.Relationship).all()
 
-@app.get("/barangays")
-def get_barangays(db: Session = Depends(get_db)):
+@router.get("/barangays")
+def get_barangays(db: Session = Depends(get_read_db)):
     rows = db.execute(text("SELECT id, name FROM barangays ORDER BY name")).mappings().all()
     return rows
 
-@app.get("/barangays/{barangay_id}/areas")
-def get_barangay_areas(barangay_id: int, db: Session = Depends(get_db)):
+@router.get("/barangays/{barangay_id}/areas")
+def get_barangay_areas(barangay_id: int, db: Session = Depends(get_read_db)):
     rows = db.execute(text("""
         SELECT id, name, area_type, parent_purok
         FROM barangay_areas
@@ -1289,8 +1823,8 @@ def get_barangay_areas(barangay_id: int, db: Session = Depends(get_db)):
 
     return rows
 
-@app.get("/barangays/by-name/{barangay_name}/areas")
-def get_areas_by_name(barangay_name: str, db: Session = Depends(get_db)):
+@router.get("/barangays/by-name/{barangay_name}/areas")
+def get_areas_by_name(barangay_name: str, db: Session = Depends(get_read_db)):
     b = db.execute(text("SELECT id FROM barangays WHERE LOWER(name)=LOWER(:n)"),
                    {"n": barangay_name}).mappings().first()
     if not b:
@@ -1305,43 +1839,19 @@ def get_areas_by_name(barangay_name: str, db: Session = Depends(get_db)):
 
     return rows
 
-@app.get("/me")
-def get_me(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
-):
-    barangay_name = None
-
-    if current_user.role not in ["admin", "admin_limited", "super_admin"]:
-        username_lower = current_user.username.lower()
-        official_name = None
-        for key in BARANGAY_MAPPING:
-            if key in username_lower:
-                official_name = BARANGAY_MAPPING[key]
-                break
-        barangay_name = official_name or current_user.username.replace("_", " ").title()
-    barangay_id = None
-    if barangay_name:
-        row = db.execute(
-            text("SELECT id, name FROM barangays WHERE LOWER(name)=LOWER(:n) LIMIT 1"),
-            {"n": barangay_name}
-        ).mappings().first()
-
-        if row:
-            barangay_id = row["id"]
-            barangay_name = row["name"]
-
+@router.get("/me")
+def get_me(current_user: models.User = Depends(get_current_user)):
     return {
         "username": current_user.username,
         "role": current_user.role,
-        "barangay_id": barangay_id,
-        "barangay": barangay_name
+        "barangay_id": current_user.barangay_id,
+        "barangay": current_user.barangay
     }
     
 # ---------------------------------------------------
 # Permanent Delete Users
 # ---------------------------------------------------
-@app.delete("/users/{user_id}/permanent", status_code=200)
+@router.delete("/users/{user_id}/permanent", status_code=200)
 def permanently_delete_user(
     user_id: int,
     db: Session = Depends(get_db),
@@ -1364,8 +1874,55 @@ def permanently_delete_user(
         text("DELETE FROM audit_logs WHERE user_id = :user_id"),
         {"user_id": user_id}
     )
+    # Session tokens are trusted without a user lookup, so they must be revoked
+    token_service.detach_user_sessions(db, user_id)
 
     db.delete(user_to_delete)
     db.commit()
+    evict_auth_user(user_id)
+
+    return {"message": f"User '{user_to_delete.username}' permanently deleted"}
+
+
+# ---------------------------------------------------
+# APP FACTORY
+# ---------------------------------------------------
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="San Felipe Residential Profile Form", on_startup=list(STARTUP_HOOKS))
+
+    app.state.limiter = rate_limit.limiter
+    app.add_exception_handler(rate_limit.RateLimitExceeded, rate_limit.rate_limit_exceeded_handler)
+    app.add_exception_handler(password_hashing.HashingOverloaded, hashing_overloaded_handler)
+
+    # Middleware added later wraps the ones before it
+    app.add_middleware(PinWritersToPrimaryMiddleware)
+
+    # Inside CORS so a shed request's 503 is still readable by the browser
+    app.add_middleware(admission.AdmissionControlMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Content-Disposition"]
+    )
+
+    # Statement timing (per-request stats and the slow query log)
+    sql_stats.install()
+
+    # Evicts event-mode lookup entries on resident writes
+    resident_lookup_service.install()
+
+    # Outermost, so Server-Timing and the per-endpoint totals cover every layer
+    if sql_stats.SQL_STATS_ENABLED:
+        app.add_middleware(sql_stats.SQLStatsMiddleware)
+
+    app.include_router(router)
+    return app
+
 
-    return {"message": f"User '{user_to_delete.username}' permanently deleted"}
\ No newline at end of file
+# `uvicorn app.main:app`; use `--factory app.main:create_app` for a fresh instance
+app = create_app()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, DateTime, Table, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, DateTime, Table, UniqueConstraint, Index, Float, Text, LargeBinary, Sequence
 from sqlalchemy.orm import relationship as orm_relationship, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -9,7 +9,7 @@ resident_sectors = Table(
     "resident_sectors",
     Base.metadata,
     Column("resident_id", Integer, ForeignKey("resident_profiles.id"), primary_key=True),
-    Column("sector_id", Integer, ForeignKey("sectors.id"), primary_key=True),
+    Column("sector_id", Integer, ForeignKey("sectors.id"), primary_key=True, index=True),
 )
 
 class User(Base):
@@ -18,6 +18,7 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String, default="admin")
+    barangay_id = Column(Integer, ForeignKey("barangays.id"), nullable=True)  # scope of barangay accounts
     
     failed_attempts = Column(Integer, default=0)
     locked_until = Column(DateTime, nullable=True)
@@ -46,22 +47,36 @@ class Sector(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
 
+class BarangayArea(Base):
+    __tablename__ = "barangay_areas"
+    id = Column(Integer, primary_key=True, index=True)
+    barangay_id = Column(Integer, ForeignKey("barangays.id"), index=True, nullable=False)
+    name = Column(String, nullable=False)
+    area_type = Column(String, nullable=True)  # PUROK or SITIO
+    parent_purok = Column(String, nullable=True)  # sitios: the purok they belong to
+
+# --- RESIDENT CODES ---
+# Numbers behind "SF-000123" codes; handed out in blocks by crud.allocate_resident_codes
+resident_code_seq = Sequence("resident_code_seq", metadata=Base.metadata)
+
 # --- MAIN TABLE ---
 class ResidentProfile(Base):
     __tablename__ = "resident_profiles"
     
     __table_args__ = (
+        # Same constraint as production (backup.sql); crud turns violations into duplicates
         UniqueConstraint(
             "last_name",
             "first_name",
-            "birthdate",
+            "middle_name",
             "barangay",
-            name="uq_resident_identity"
+            name="unique_resident_identity"
         ),
+        Index("ix_resident_code", "resident_code", unique=True),
     )
 
     id = Column(Integer, primary_key=True, index=True)
-    resident_code = Column(String(20), unique=True, index=True, nullable=False)
+    resident_code = Column(String(20), nullable=False)
     
     is_deleted = Column(Boolean, default=False)
     deleted_at = Column(DateTime, nullable=True)
@@ -112,11 +127,13 @@ class ResidentProfile(Base):
     
     # 7. PHOTO
     photo_url = Column(String, nullable=True)
+    photo_thumb_url = Column(String, nullable=True)
+    photo_status = Column(String, nullable=True)  # processing, ready, failed
 
     # System Fields
     is_active = Column(Boolean, default=True)
     updated_at = Column(DateTime(timezone=True), nullable=True, onupdate=func.now())
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # --- RELATIONSHIPS ---
     family_members = orm_relationship("FamilyMember", back_populates="head", cascade="all, delete-orphan")
@@ -128,11 +145,45 @@ class ResidentProfile(Base):
     cascade="all, delete-orphan"
 )
 
+# --- INDEXES ON LIVE RESIDENTS ---
+# Built by migration 0004. Partial on is_deleted = false: soft-deleted rows never
+# match the hot paths, so they are left out of the index entirely.
+
+# Resident list / public search order: upper(last), upper(first), id
+Index(
+    "ix_resident_profiles_live_name_sort",
+    func.upper(ResidentProfile.last_name),
+    func.upper(ResidentProfile.first_name),
+    ResidentProfile.id,
+    postgresql_where=ResidentProfile.is_deleted == False,
+)
+
+# Duplicate check on create / update (crud.find_duplicate_resident)
+Index(
+    "ix_resident_profiles_live_identity",
+    func.upper(func.coalesce(ResidentProfile.last_name, "")),
+    func.upper(func.coalesce(ResidentProfile.first_name, "")),
+    ResidentProfile.birthdate,
+    postgresql_where=ResidentProfile.is_deleted == False,
+)
+
+# Public lookup by code: carries every PublicResidentListItem column, so
+# async_crud.get_public_resident_summary is answered from the index alone
+Index(
+    "ix_resident_profiles_public_code",
+    ResidentProfile.resident_code,
+    postgresql_include=[
+        "id", "last_name", "first_name", "middle_name", "ext_name",
+        "barangay", "purok", "house_no", "photo_url",
+    ],
+    postgresql_where=(ResidentProfile.is_deleted == False) & (ResidentProfile.is_active == True),
+)
+
 class FamilyMember(Base):
     __tablename__ = "family_members"
 
     id = Column(Integer, primary_key=True, index=True)
-    profile_id = Column(Integer, ForeignKey("resident_profiles.id"))
+    profile_id = Column(Integer, ForeignKey("resident_profiles.id"), index=True)
     
     last_name = Column(String)
     first_name = Column(String)
@@ -151,7 +202,7 @@ class ResidentAssistance(Base):
     __tablename__ = "resident_assistance"
 
     id = Column(Integer, primary_key=True, index=True)
-    resident_id = Column(Integer, ForeignKey("resident_profiles.id"))
+    resident_id = Column(Integer, ForeignKey("resident_profiles.id"), index=True)
     
     type_of_assistance = Column(String, nullable=False)
     date_processed = Column(Date, nullable=True)
@@ -159,17 +210,125 @@ class ResidentAssistance(Base):
     amount = Column(Float, nullable=True)
     implementing_office = Column(String, nullable=True)
 
+    # Set for claims recorded at a distribution event
+    event_id = Column(Integer, ForeignKey("distribution_events.id"), nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
 
     resident = relationship("ResidentProfile", back_populates="assistances")
 
+# One claim per resident per event; also the event's claim index. Rows without
+# an event (NULL event_id) never conflict.
+Index(
+    "uq_resident_assistance_event_resident",
+    ResidentAssistance.event_id,
+    ResidentAssistance.resident_id,
+    unique=True,
+)
+
+# Distribution events: claims are recorded in batches (crud.record_event_claims)
+class DistributionEvent(Base):
+    __tablename__ = "distribution_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    type_of_assistance = Column(String, nullable=False)
+    implementing_office = Column(String, nullable=True)
+    amount = Column(Float, nullable=True)  # per claim
+    event_date = Column(Date, nullable=True)
+    barangay = Column(String, nullable=True)  # only residents of this barangay may claim
+    is_closed = Column(Boolean, default=False, nullable=False)
+
+    # Live totals, maintained with each batch rather than re-counted
+    claims_count = Column(Integer, default=0, nullable=False)
+    amount_total = Column(Float, default=0, nullable=False)
+
+    created_by = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 # Audit Log Table
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     action = Column(String)
     target_type = Column(String)  # "resident", "user", "system"
     target_id = Column(Integer, nullable=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+# Background Excel import jobs (one per distinct file content)
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    __table_args__ = (
+        UniqueConstraint("file_hash", "all_sheets", name="uq_import_job_file"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String(64), index=True, nullable=False)
+    all_sheets = Column(Boolean, default=False, nullable=False)
+    filename = Column(String, nullable=True)
+    file_content = Column(LargeBinary, nullable=True)  # cleared once the job completes
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    status = Column(String, default="pending")  # pending, running, completed, failed
+    rows_total = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    inserted = Column(Integer, default=0)
+    duplicates = Column(Integer, default=0)
+    family_added = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    errors = Column(Text, nullable=True)  # JSON list of messages
+    sheet_stats = Column(Text, nullable=True)  # JSON per-sheet stats (all_sheets mode)
+
+    chunks_done = Column(Integer, default=0)  # last committed chunk, resume point
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+# Background ID card batches (services.id_card_service); the output file lives on disk
+class IdCardJob(Base):
+    __tablename__ = "id_card_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    barangay = Column(String, nullable=True)
+    sector_id = Column(Integer, ForeignKey("sectors.id"), index=True, nullable=True)
+    output_format = Column(String(8), nullable=False)  # pdf, zip
+    created_by = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+
+    status = Column(String, default="pending")  # pending, running, completed, failed, expired
+    cards_total = Column(Integer, default=0)
+    cards_rendered = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+# --- AUTH SESSIONS ---
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), unique=True, index=True, nullable=False)
+    session_id = Column(String(32), index=True, nullable=False)  # shared by every token rotated from one login
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)  # cleared when the user is deleted
+
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    used_at = Column(DateTime(timezone=True), nullable=True)  # set when rotated
+    revoked_at = Column(DateTime(timezone=True), nullable=True)  # logout, archival, reuse detected
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+# Statements over SLOW_QUERY_MS, persisted when SLOW_QUERY_TABLE=true (app.core.slow_queries)
+class SlowQuery(Base):
+    __tablename__ = "slow_queries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recorded_at = Column(DateTime(timezone=True), server_default=func.now(), index=True, nullable=False)
+    duration_ms = Column(Float, nullable=False)
+    endpoint = Column(String, nullable=True)  # "GET /residents/"; null outside requests
+    filters = Column(String, nullable=True)  # query parameter names of the request
+    statement = Column(Text, nullable=False)  # normalized: parameters collapsed to ?
+    bind_shapes = Column(Text, nullable=True)  # JSON
+    plan = Column(Text, nullable=True)  # EXPLAIN (FORMAT JSON)
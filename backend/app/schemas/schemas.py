@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Dict, Union
 from datetime import date, datetime
+import json
 
 # =======================
 # REFERENCE DATA SCHEMAS
@@ -65,6 +66,7 @@ class AssistanceOut(BaseModel):
     date_claimed: date | None
     amount: float | None
     implementing_office: str | None
+    event_id: int | None = None
 
     class Config:
         from_attributes = True
@@ -138,6 +140,10 @@ class PublicResident(BaseModel):
         from_attributes = True
 
 
+class PublicResidentCard(PublicResident):
+    qr: str  # data URI (image/png or image/svg+xml)
+
+
 class PublicResidentListItem(BaseModel):
     resident_code: str
     last_name: str
@@ -201,6 +207,48 @@ class Resident(ResidentBase):
     sectors: List[Sector] = []
     assistances: List[AssistanceOut] = []
     photo_url: str | None = None
+    photo_thumb_url: str | None = None
+    photo_status: str | None = None
+
+    class Config:
+        from_attributes = True
+
+class ResidentLookupMember(FamilyMemberBase):
+    class Config:
+        from_attributes = True
+
+# Event-mode scan result: what the QR scanner shows, without assistances
+class ResidentLookup(BaseModel):
+    id: int
+    resident_code: str
+    last_name: str
+    first_name: str
+    middle_name: Optional[str] = None
+    ext_name: Optional[str] = None
+
+    barangay: Optional[str] = None
+    purok: Optional[str] = None
+    house_no: Optional[str] = None
+    sitio: Optional[str] = None
+
+    birthdate: Optional[date] = None
+    sex: Optional[str] = None
+    civil_status: Optional[str] = None
+    religion: Optional[str] = None
+    occupation: Optional[str] = None
+    contact_no: Optional[str] = None
+    precinct_no: Optional[str] = None
+    sector_summary: Optional[str] = None
+    photo_url: Optional[str] = None
+    photo_thumb_url: Optional[str] = None
+    is_active: Optional[bool] = None
+
+    spouse_last_name: Optional[str] = None
+    spouse_first_name: Optional[str] = None
+    spouse_middle_name: Optional[str] = None
+    spouse_ext_name: Optional[str] = None
+
+    family_members: List[ResidentLookupMember] = []
 
     class Config:
         from_attributes = True
@@ -274,4 +322,104 @@ class DashboardStats(BaseModel):
     total_male: int
     total_female: int
     population_by_barangay: Dict[str, int] # Fix: Use Dict for type safety
-    population_by_sector: Dict[str, int]
\ No newline at end of file
+    population_by_sector: Dict[str, int]
+
+# =======================
+# DISTRIBUTION EVENTS
+# =======================
+class DistributionEventCreate(BaseModel):
+    name: str
+    type_of_assistance: str
+    implementing_office: Optional[str] = None
+    amount: Optional[float] = None
+    event_date: Optional[date] = None
+    barangay: Optional[str] = None
+
+
+class DistributionEvent(DistributionEventCreate):
+    id: int
+    is_closed: bool = False
+    claims_count: int = 0
+    amount_total: float = 0
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class EventClaimsRequest(BaseModel):
+    resident_codes: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class EventClaimsResult(BaseModel):
+    claimed: List[str] = []
+    already_claimed: List[str] = []
+    not_eligible: List[str] = []  # outside the event's barangay
+    unknown: List[str] = []
+    claims_count: int  # event totals after this batch
+    amount_total: float
+
+
+# =======================
+# IMPORT JOBS
+# =======================
+class ImportJob(BaseModel):
+    id: int
+    filename: Optional[str] = None
+    status: str
+    rows_total: int = 0
+    rows_processed: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    family_added: int = 0
+    error_count: int = 0
+    errors: List[str] = []
+    all_sheets: bool = False
+    sheets: List[Dict[str, Union[str, int]]] = Field(default=[], validation_alias="sheet_stats")
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator("errors", "sheets", mode="before")
+    @classmethod
+    def parse_json_list(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value or []
+
+    class Config:
+        from_attributes = True
+
+
+# =======================
+# ID CARD JOBS
+# =======================
+class IdCardJob(BaseModel):
+    id: int
+    barangay: Optional[str] = None
+    sector_id: Optional[int] = None
+    output_format: str
+    status: str
+    cards_total: int = 0
+    cards_rendered: int = 0
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ImportDryRunReport(BaseModel):
+    dry_run: bool = True
+    rows_read: int
+    valid_rows: int
+    new: int
+    existing_duplicates: int
+    in_file_duplicates: int
+    family_members: int
+    missing_names: int
+    unparseable_dates: int
+    problem_count: int
+    problem_sample: List[Dict[str, Union[str, int]]] = []
+    errors: List[str] = []
+    sheets: List[Dict[str, Union[str, int]]] = []
@@ -0,0 +1,199 @@
+"""
+Plan check for the resident read paths. Run from backend/ against a migrated,
+seeded database (DATABASE_URL):
+
+    python explain_check.py
+
+Calls each crud read function with the default planner settings and runs
+EXPLAIN ANALYZE on every SELECT it issues. A check fails when a plan reads a
+whole relation: a Seq Scan, or an index scan with no Index Cond that walks
+the index filtering rows. Under a Limit such a walk passes only while it is
+bounded, i.e. it discards no more rows than it returns (an ORDER BY ... LIMIT
+page). Exits 1 and prints the offending plans.
+
+On a small database the planner reads tables whole because it is cheaper.
+Such a Seq Scan passes only if the same statement, re-planned with seq
+scans priced out, is served by an index under the same rules.
+
+Counts and the dashboard aggregates are not checked: they read every live
+resident by design.
+"""
+
+import asyncio
+import json
+import sys
+
+from sqlalchemy import event, select
+
+from app import models
+from app.core.database import engine, SessionLocal, async_engine, AsyncSessionLocal
+from app.crud import crud, async_crud
+
+
+plans = []
+current_check = None
+
+
+def _explain(cursor, statement, parameters):
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def explain_select(conn, cursor, statement, parameters, context, executemany):
+    if current_check is None or not statement.lstrip().upper().startswith("SELECT"):
+        return
+
+    plan = _explain(cursor, statement, parameters)
+
+    # A Seq Scan may just be the cheaper plan on a small table. Re-plan with
+    # seq scans priced out: if no index can serve the query either, it is missing
+    indexed_plan = None
+    if any(scan.startswith("Seq Scan") for scan in unindexed_scans(plan)):
+        cursor.execute("SET enable_seqscan = off")
+        try:
+            indexed_plan = _explain(cursor, statement, parameters)
+        finally:
+            cursor.execute("RESET enable_seqscan")
+
+    plans.append((current_check, statement, plan, indexed_plan))
+
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+# Nodes that pass a Limit's early stop down to their input; anything else
+# (Sort, Hash, Aggregate, ...) reads its input whole first
+STREAMING_NODES = {"Limit", "Nested Loop", "Result", "Subquery Scan", "Append", "Unique"}
+
+# A few dozen rows each; reading them whole is the right plan
+LOOKUP_TABLES = {"barangays", "puroks", "relationships", "sectors"}
+
+
+def _rows_kept_and_removed(node):
+    loops = node.get("Actual Loops", 1)
+    kept = node.get("Actual Rows", 0) * loops
+    removed = node.get("Rows Removed by Filter", 0) * loops
+    return kept, removed
+
+
+def unindexed_scans(node, limited=False):
+    """
+    Scans that read a whole relation: Seq Scans, bitmap index scans with no
+    Index Cond, and index scans with no Index Cond (a full index walk
+    filtering rows) unless a Limit above them stops the walk early, which
+    shows as it keeping at least as many rows as its filter discards.
+    """
+    found = []
+    if node.get("Relation Name") in LOOKUP_TABLES:
+        pass
+    elif node["Node Type"] == "Seq Scan":
+        found.append(f"Seq Scan on {node['Relation Name']}")
+    elif node["Node Type"] == "Bitmap Index Scan" and "Index Cond" not in node:
+        # A bitmap is always built from the whole walk; no Limit bounds it
+        found.append(f"full Bitmap Index Scan using {node['Index Name']}")
+    elif node["Node Type"] in INDEX_SCANS and "Index Cond" not in node:
+        kept, removed = _rows_kept_and_removed(node)
+        if not limited or removed > kept:
+            found.append(
+                f"full {node['Node Type']} using {node['Index Name']} "
+                f"({kept} rows kept, {removed} filtered out)"
+            )
+
+    limited = node["Node Type"] == "Limit" or (limited and node["Node Type"] in STREAMING_NODES)
+    for child in node.get("Plans", []):
+        found.extend(unindexed_scans(child, limited))
+    return found
+
+
+def sample_resident():
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(models.ResidentProfile).filter(
+                models.ResidentProfile.is_deleted == False,
+                models.ResidentProfile.is_active == True
+            ).limit(1)
+        ).scalars().first()
+    finally:
+        db.close()
+
+
+def check_sync(resident):
+    global current_check
+
+    db = SessionLocal()
+    try:
+        current_check = "crud.find_duplicate_resident"
+        crud.find_duplicate_resident(
+            db, resident.first_name, resident.middle_name or "", resident.last_name, resident.birthdate
+        )
+        current_check = "crud.find_duplicate_resident (update)"
+        crud.find_duplicate_resident(
+            db, resident.first_name, resident.middle_name or "", resident.last_name, resident.birthdate,
+            barangay=resident.barangay, exclude_id=resident.id
+        )
+    finally:
+        current_check = None
+        db.close()
+
+
+async def check_async(resident):
+    global current_check
+
+    # Mid-name, so only a substring (trigram) index can serve it
+    search = resident.last_name[1:4]
+
+    async with AsyncSessionLocal() as db:
+        checks = [
+            ("async_crud.get_resident", async_crud.get_resident(db, resident.id)),
+            ("async_crud.get_residents", async_crud.get_residents(db)),
+            ("async_crud.get_residents (desc)", async_crud.get_residents(db, skip=20, sort_order="desc")),
+            ("async_crud.get_residents (search)", async_crud.get_residents(db, search=search)),
+            ("async_crud.get_public_resident", async_crud.get_public_resident(db, resident.resident_code)),
+            ("async_crud.get_public_resident_summary", async_crud.get_public_resident_summary(db, resident.resident_code)),
+            ("async_crud.search_public_residents", async_crud.search_public_residents(db, search)),
+        ]
+
+        for name, call in checks:
+            current_check = name
+            try:
+                await call
+            finally:
+                current_check = None
+
+
+def main():
+    resident = sample_resident()
+    if resident is None:
+        print("No live residents: seed the database before running the plan check.")
+        return 2
+
+    event.listen(engine, "before_cursor_execute", explain_select)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", explain_select)
+
+    check_sync(resident)
+    asyncio.run(check_async(resident))
+
+    failures = []
+    for name, statement, plan, indexed_plan in plans:
+        scans = unindexed_scans(plan)
+        if indexed_plan is not None:
+            scans = unindexed_scans(indexed_plan)
+            plan = indexed_plan
+            verdict = "; ".join(scans) if scans else "ok (Seq Scan by cost, an index can serve it)"
+        else:
+            verdict = "; ".join(scans) if scans else "ok"
+        print(f"{name}: {verdict}")
+        if scans:
+            failures.append((name, statement, plan))
+
+    for name, statement, plan in failures:
+        print(f"\n--- {name}\n{statement}\n{json.dumps(plan, indent=2)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
-from app.core.database import engine, Base
-import models
+import os
 
-print("Creating database tables...")
-Base.metadata.create_all(bind=engine)
-print("Tables created successfully!")
\ No newline at end of file
+from alembic import command
+from alembic.config import Config
+
+# Creates or upgrades the schema; same as `alembic upgrade head` in this directory
+print("Applying database migrations...")
+command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+print("Database is up to date!")
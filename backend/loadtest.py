@@ -0,0 +1,95 @@
+"""
+Simple HTTP load test against a running API.
+
+    python loadtest.py --url http://127.0.0.1:8000 --username admin --password ... \
+        --concurrency 200 --duration 30 --path /residents/ --path /dashboard/stats
+
+Logs in once, then runs CONCURRENCY clients in a loop for DURATION seconds,
+cycling through the given paths, and prints requests/second and latency
+percentiles per path.
+
+Needs the dev requirements: pip install -r requirements-dev.txt
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def worker(client, paths, offset, deadline, latencies, errors):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+
+        if ok:
+            latencies[path].append(time.perf_counter() - started)
+        else:
+            errors[path] += 1
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        if args.username:
+            token = await login(client, args.username, args.password)
+            client.headers["Authorization"] = f"Bearer {token}"
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, args.path, n, deadline, latencies, errors)
+            for n in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{args.concurrency} clients, {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+          f"{sum(errors.values())} errors")
+
+    for path in args.path:
+        samples = sorted(latencies[path])
+        if not samples:
+            print(f"  {path}: no successful requests ({errors[path]} errors)")
+            continue
+
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"  {path}: {len(samples) / elapsed:.1f} req/s, "
+              f"p50 {statistics.median(samples) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+              f"{errors[path]} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--path", action="append", required=True)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
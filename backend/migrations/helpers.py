@@ -0,0 +1,53 @@
+"""
+Online (non-blocking) index operations for migrations.
+
+CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction, so these
+helpers step out of the migration's transaction with autocommit_block().
+Keep such revisions free of other DDL: anything before the block is
+committed first, and a failure afterwards does not roll the index back.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def _drop_invalid_index(name: str):
+    # An interrupted CONCURRENTLY build leaves an INVALID index behind;
+    # IF NOT EXISTS would then skip it forever.
+    bind = op.get_bind()
+    invalid = bind.execute(sa.text("""
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).first()
+
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns,
+    unique: bool = False,
+    where: str | None = None,
+    include: list[str] | None = None,
+):
+    """columns may mix column names and sa.text() expressions."""
+    with op.get_context().autocommit_block():
+        _drop_invalid_index(name)
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=unique,
+            postgresql_where=sa.text(where) if where else None,
+            postgresql_include=include or [],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def drop_index_concurrently(name: str, table: str):
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,156 @@
+"""Baseline: schema of the production database as dumped in backup.sql
+
+Databases created before migrations (production, or restored from
+backup.sql) already have this schema and no alembic_version row: on those
+this revision creates nothing and only records itself, so the first
+`alembic upgrade head` goes straight on to 0002.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _lookup_table(name):
+    op.create_table(
+        name,
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+    )
+    op.create_index(f"ix_{name}_id", name, ["id"])
+    op.create_index(f"ix_{name}_name", name, ["name"], unique=True)
+
+
+BASELINE_TABLES = ("users", "resident_profiles")
+
+
+def upgrade():
+    # (--sql output has no database to look at: it always creates the tables)
+    if not op.get_context().as_sql:
+        existing = set(sa.inspect(op.get_bind()).get_table_names())
+        if existing.issuperset(BASELINE_TABLES):
+            return
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("role", sa.String()),
+        sa.Column("is_archived", sa.Boolean(), server_default=sa.false()),
+        sa.Column("archived_at", sa.DateTime(timezone=True)),
+        sa.Column("failed_attempts", sa.Integer(), server_default="0"),
+        sa.Column("locked_until", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    for name in ("barangays", "puroks", "relationships", "sectors"):
+        _lookup_table(name)
+
+    op.create_table(
+        "resident_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("last_name", sa.String()),
+        sa.Column("first_name", sa.String()),
+        sa.Column("middle_name", sa.String()),
+        sa.Column("ext_name", sa.String()),
+        sa.Column("house_no", sa.String()),
+        sa.Column("purok", sa.String()),
+        sa.Column("barangay", sa.String()),
+        sa.Column("birthdate", sa.Date()),
+        sa.Column("sex", sa.String()),
+        sa.Column("civil_status", sa.String()),
+        sa.Column("precinct_no", sa.String()),
+        sa.Column("occupation", sa.String()),
+        sa.Column("contact_no", sa.String()),
+        sa.Column("other_sector_details", sa.String()),
+        sa.Column("sector_summary", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("spouse_last_name", sa.String()),
+        sa.Column("spouse_first_name", sa.String()),
+        sa.Column("spouse_middle_name", sa.String()),
+        sa.Column("spouse_ext_name", sa.String()),
+        sa.Column("religion", sa.String()),
+        sa.Column("is_deleted", sa.Boolean(), server_default=sa.false()),
+        sa.Column("deleted_at", sa.DateTime()),
+        sa.Column("is_archived", sa.Boolean(), server_default=sa.false()),
+        sa.Column("status", sa.String(), server_default="Active"),
+        sa.Column("is_family_head", sa.Boolean(), server_default=sa.true()),
+        sa.Column("resident_code", sa.String(20), nullable=False),
+        sa.UniqueConstraint(
+            "last_name", "first_name", "middle_name", "barangay",
+            name="unique_resident_identity"
+        ),
+    )
+    op.create_index("ix_resident_code", "resident_profiles", ["resident_code"], unique=True)
+    op.create_index("ix_resident_profiles_barangay", "resident_profiles", ["barangay"])
+    op.create_index("ix_resident_profiles_first_name", "resident_profiles", ["first_name"])
+    op.create_index("ix_resident_profiles_id", "resident_profiles", ["id"])
+    op.create_index("ix_resident_profiles_last_name", "resident_profiles", ["last_name"])
+    op.create_index("ix_resident_profiles_purok", "resident_profiles", ["purok"])
+
+    # No primary key in production; resident_id is not a foreign key there either
+    op.create_table(
+        "resident_sectors",
+        sa.Column("resident_id", sa.Integer()),
+        sa.Column("sector_id", sa.Integer(), sa.ForeignKey("sectors.id", name="resident_sectors_sector_id_fkey")),
+    )
+
+    op.create_table(
+        "family_members",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("profile_id", sa.Integer(), sa.ForeignKey("resident_profiles.id", name="family_members_profile_id_fkey")),
+        sa.Column("last_name", sa.String()),
+        sa.Column("first_name", sa.String()),
+        sa.Column("middle_name", sa.String()),
+        sa.Column("ext_name", sa.String()),
+        sa.Column("relationship", sa.String()),
+        sa.Column("birthdate", sa.Date()),
+        sa.Column("occupation", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_family_head", sa.Boolean(), server_default=sa.false()),
+    )
+    op.create_index("ix_family_members_id", "family_members", ["id"])
+
+    op.create_table(
+        "resident_assistance",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("resident_id", sa.Integer(), sa.ForeignKey("resident_profiles.id", name="resident_assistance_resident_id_fkey")),
+        sa.Column("type_of_assistance", sa.String(), nullable=False),
+        sa.Column("date_processed", sa.Date()),
+        sa.Column("date_claimed", sa.Date()),
+        sa.Column("amount", sa.Float()),
+        sa.Column("implementing_office", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_resident_assistance_id", "resident_assistance", ["id"])
+
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", name="audit_logs_user_id_fkey")),
+        sa.Column("action", sa.String()),
+        sa.Column("target_type", sa.String()),
+        sa.Column("target_id", sa.Integer()),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+
+def downgrade():
+    for name in (
+        "audit_logs", "resident_assistance", "family_members", "resident_sectors",
+        "resident_profiles", "sectors", "relationships", "puroks", "barangays", "users",
+    ):
+        op.drop_table(name)
@@ -0,0 +1,161 @@
+"""Bring the baseline up to the current models
+
+Columns and tables added after backup.sql was taken (some of them by ad-hoc
+ALTERs, some by create_all on worker start). Every step is IF NOT EXISTS so
+databases that already have part of it upgrade cleanly.
+
+Revision ID: 0002_current_models
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_current_models"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Search uses unaccent(); skip where the contrib module is not installed
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'unaccent')
+               AND NOT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'unaccent') THEN
+                CREATE EXTENSION IF NOT EXISTS unaccent;
+            END IF;
+        END $$
+    """)
+
+    # --- resident_profiles ---
+    for name in ("sitio", "emergency_name", "emergency_contact_no", "emergency_address", "photo_url"):
+        op.add_column("resident_profiles", sa.Column(name, sa.String()), if_not_exists=True)
+
+    # Databases built by create_all with the older model: align names with production
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'ix_resident_profiles_resident_code')
+               AND NOT EXISTS (SELECT 1 FROM pg_class WHERE relname = 'ix_resident_code') THEN
+                ALTER INDEX ix_resident_profiles_resident_code RENAME TO ix_resident_code;
+            END IF;
+            IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'uq_resident_identity') THEN
+                ALTER TABLE resident_profiles DROP CONSTRAINT uq_resident_identity;
+                ALTER TABLE resident_profiles
+                    ADD CONSTRAINT unique_resident_identity
+                    UNIQUE (last_name, first_name, middle_name, barangay);
+            END IF;
+        END $$
+    """)
+    op.alter_column("resident_profiles", "created_at", nullable=True)
+
+    # Numbers behind SF- codes (crud.allocate_resident_codes); moved past existing codes by 0011
+    op.execute("CREATE SEQUENCE IF NOT EXISTS resident_code_seq")
+
+    # --- resident_sectors: key the association table like the model does ---
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'resident_sectors'::regclass AND contype = 'p'
+            ) THEN
+                DELETE FROM resident_sectors
+                WHERE resident_id IS NULL OR sector_id IS NULL
+                   OR NOT EXISTS (SELECT 1 FROM resident_profiles rp WHERE rp.id = resident_sectors.resident_id);
+
+                DELETE FROM resident_sectors a
+                USING resident_sectors b
+                WHERE a.ctid < b.ctid
+                  AND a.resident_id = b.resident_id
+                  AND a.sector_id = b.sector_id;
+
+                ALTER TABLE resident_sectors ADD PRIMARY KEY (resident_id, sector_id);
+                ALTER TABLE resident_sectors
+                    ADD CONSTRAINT resident_sectors_resident_id_fkey
+                    FOREIGN KEY (resident_id) REFERENCES resident_profiles(id);
+            END IF;
+        END $$
+    """)
+
+    # --- barangay_areas (puroks / sitios per barangay) ---
+    op.create_table(
+        "barangay_areas",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("barangay_id", sa.Integer(), sa.ForeignKey("barangays.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("area_type", sa.String()),
+        sa.Column("parent_purok", sa.String()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_barangay_areas_id", "barangay_areas", ["id"], if_not_exists=True)
+    op.create_index("ix_barangay_areas_barangay_id", "barangay_areas", ["barangay_id"], if_not_exists=True)
+
+    # --- users: resolved scope of barangay accounts ---
+    op.add_column(
+        "users",
+        sa.Column("barangay_id", sa.Integer(), sa.ForeignKey("barangays.id")),
+        if_not_exists=True,
+        inline_references=True,
+    )
+
+    # --- import_jobs ---
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("file_hash", sa.String(64), nullable=False),
+        sa.Column("all_sheets", sa.Boolean(), nullable=False),
+        sa.Column("filename", sa.String()),
+        sa.Column("file_content", sa.LargeBinary()),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("status", sa.String()),
+        sa.Column("rows_total", sa.Integer()),
+        sa.Column("rows_processed", sa.Integer()),
+        sa.Column("inserted", sa.Integer()),
+        sa.Column("duplicates", sa.Integer()),
+        sa.Column("family_added", sa.Integer()),
+        sa.Column("error_count", sa.Integer()),
+        sa.Column("errors", sa.Text()),
+        sa.Column("sheet_stats", sa.Text()),
+        sa.Column("chunks_done", sa.Integer()),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+        sa.UniqueConstraint("file_hash", "all_sheets", name="uq_import_job_file"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"], if_not_exists=True)
+    op.create_index("ix_import_jobs_file_hash", "import_jobs", ["file_hash"], if_not_exists=True)
+
+    # --- refresh_tokens ---
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("jti", sa.String(32), nullable=False),
+        sa.Column("session_id", sa.String(32), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("used_at", sa.DateTime(timezone=True)),
+        sa.Column("revoked_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"], if_not_exists=True)
+    op.create_index("ix_refresh_tokens_jti", "refresh_tokens", ["jti"], unique=True, if_not_exists=True)
+    op.create_index("ix_refresh_tokens_session_id", "refresh_tokens", ["session_id"], if_not_exists=True)
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_table("refresh_tokens")
+    op.drop_table("import_jobs")
+    op.drop_column("users", "barangay_id")
+    op.drop_table("barangay_areas")
+    op.execute("ALTER TABLE resident_sectors DROP CONSTRAINT IF EXISTS resident_sectors_resident_id_fkey")
+    op.execute("ALTER TABLE resident_sectors DROP CONSTRAINT IF EXISTS resident_sectors_pkey")
+    op.execute("DROP SEQUENCE IF EXISTS resident_code_seq")
+    for name in ("photo_url", "emergency_address", "emergency_contact_no", "emergency_name", "sitio"):
+        op.drop_column("resident_profiles", name)
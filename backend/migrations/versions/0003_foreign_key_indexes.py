@@ -0,0 +1,35 @@
+"""Index the foreign keys the read paths join on
+
+family_members, resident_assistance and audit_logs are looked up by their
+parent id (resident detail/list eager loads, user deletion) but had no index
+on it, so each load was a sequential scan. Built CONCURRENTLY so the tables
+stay writable during the upgrade.
+
+Revision ID: 0003_foreign_key_indexes
+Revises: 0002_current_models
+Create Date: 2026-10-19
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0003_foreign_key_indexes"
+down_revision = "0002_current_models"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_family_members_profile_id", "family_members", ["profile_id"]),
+    ("ix_resident_assistance_resident_id", "resident_assistance", ["resident_id"]),
+    ("ix_resident_sectors_sector_id", "resident_sectors", ["sector_id"]),
+    ("ix_audit_logs_user_id", "audit_logs", ["user_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index_concurrently(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        drop_index_concurrently(name, table)
@@ -0,0 +1,61 @@
+"""Partial, expression and covering indexes for live residents
+
+Every hot query filters is_deleted = false; the list and public search sort
+by upper(last_name), upper(first_name); public lookups go by resident_code
+with is_active = true. The single-column indexes from index=True serve none
+of these, so each was a sequential scan plus sort. See the Index() block
+after ResidentProfile in models.py; explain_check.py guards the plans.
+
+Revision ID: 0004_live_resident_indexes
+Revises: 0003_foreign_key_indexes
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0004_live_resident_indexes"
+down_revision = "0003_foreign_key_indexes"
+branch_labels = None
+depends_on = None
+
+LIVE = "is_deleted = false"
+
+
+def upgrade():
+    create_index_concurrently(
+        "ix_resident_profiles_live_name_sort",
+        "resident_profiles",
+        [sa.text("upper(last_name)"), sa.text("upper(first_name)"), "id"],
+        where=LIVE,
+    )
+    create_index_concurrently(
+        "ix_resident_profiles_live_identity",
+        "resident_profiles",
+        [
+            sa.text("upper(coalesce(last_name, ''))"),
+            sa.text("upper(coalesce(first_name, ''))"),
+            "birthdate",
+        ],
+        where=LIVE,
+    )
+    create_index_concurrently(
+        "ix_resident_profiles_public_code",
+        "resident_profiles",
+        ["resident_code"],
+        where=f"{LIVE} AND is_active = true",
+        include=[
+            "id", "last_name", "first_name", "middle_name", "ext_name",
+            "barangay", "purok", "house_no", "photo_url",
+        ],
+    )
+
+
+def downgrade():
+    for name in (
+        "ix_resident_profiles_public_code",
+        "ix_resident_profiles_live_identity",
+        "ix_resident_profiles_live_name_sort",
+    ):
+        drop_index_concurrently(name, "resident_profiles")
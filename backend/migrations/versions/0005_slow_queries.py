@@ -0,0 +1,34 @@
+"""Slow query log table
+
+Revision ID: 0005_slow_queries
+Revises: 0004_live_resident_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_slow_queries"
+down_revision = "0004_live_resident_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "slow_queries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("endpoint", sa.String()),
+        sa.Column("filters", sa.String()),
+        sa.Column("statement", sa.Text(), nullable=False),
+        sa.Column("bind_shapes", sa.Text()),
+        sa.Column("plan", sa.Text()),
+    )
+    op.create_index("ix_slow_queries_id", "slow_queries", ["id"])
+    op.create_index("ix_slow_queries_recorded_at", "slow_queries", ["recorded_at"])
+
+
+def downgrade():
+    op.drop_table("slow_queries")
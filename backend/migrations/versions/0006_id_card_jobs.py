@@ -0,0 +1,39 @@
+"""Background ID card jobs
+
+Revision ID: 0006_id_card_jobs
+Revises: 0005_slow_queries
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_id_card_jobs"
+down_revision = "0005_slow_queries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "id_card_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("barangay", sa.String()),
+        sa.Column("sector_id", sa.Integer(), sa.ForeignKey("sectors.id")),
+        sa.Column("output_format", sa.String(8), nullable=False),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("status", sa.String()),
+        sa.Column("cards_total", sa.Integer()),
+        sa.Column("cards_rendered", sa.Integer()),
+        sa.Column("error", sa.Text()),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_id_card_jobs_id", "id_card_jobs", ["id"])
+    op.create_index("ix_id_card_jobs_sector_id", "id_card_jobs", ["sector_id"])
+    op.create_index("ix_id_card_jobs_created_by", "id_card_jobs", ["created_by"])
+
+
+def downgrade():
+    op.drop_table("id_card_jobs")
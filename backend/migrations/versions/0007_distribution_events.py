@@ -0,0 +1,45 @@
+"""Distribution events and event-linked assistance claims
+
+Revision ID: 0007_distribution_events
+Revises: 0006_id_card_jobs
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_distribution_events"
+down_revision = "0006_id_card_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "distribution_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type_of_assistance", sa.String(), nullable=False),
+        sa.Column("implementing_office", sa.String()),
+        sa.Column("amount", sa.Float()),
+        sa.Column("event_date", sa.Date()),
+        sa.Column("barangay", sa.String()),
+        sa.Column("is_closed", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("claims_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("amount_total", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_distribution_events_id", "distribution_events", ["id"])
+    op.create_index("ix_distribution_events_created_by", "distribution_events", ["created_by"])
+
+    # Nullable, no default: a catalog-only change, no table rewrite
+    op.add_column(
+        "resident_assistance",
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("distribution_events.id"), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column("resident_assistance", "event_id")
+    op.drop_table("distribution_events")
@@ -0,0 +1,30 @@
+"""Unique (event_id, resident_id) on resident_assistance
+
+Dedupes distribution event claims (INSERT ... ON CONFLICT DO NOTHING) and
+serves the per-event claim lookups. Built CONCURRENTLY so assistance stays
+writable during the upgrade.
+
+Revision ID: 0008_event_claim_index
+Revises: 0007_distribution_events
+Create Date: 2026-10-19
+"""
+from migrations.helpers import create_index_concurrently, drop_index_concurrently
+
+
+revision = "0008_event_claim_index"
+down_revision = "0007_distribution_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index_concurrently(
+        "uq_resident_assistance_event_resident",
+        "resident_assistance",
+        ["event_id", "resident_id"],
+        unique=True,
+    )
+
+
+def downgrade():
+    drop_index_concurrently("uq_resident_assistance_event_resident", "resident_assistance")
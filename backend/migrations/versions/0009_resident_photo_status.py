@@ -0,0 +1,24 @@
+"""Resident photo thumbnail and processing status
+
+Revision ID: 0009_resident_photo_status
+Revises: 0008_event_claim_index
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_resident_photo_status"
+down_revision = "0008_event_claim_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("resident_profiles", sa.Column("photo_thumb_url", sa.String(), nullable=True))
+    op.add_column("resident_profiles", sa.Column("photo_status", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("resident_profiles", "photo_status")
+    op.drop_column("resident_profiles", "photo_thumb_url")
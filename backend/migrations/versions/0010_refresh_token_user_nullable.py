@@ -0,0 +1,23 @@
+"""Keep revoked sessions of deleted users
+
+Revision ID: 0010_refresh_token_user_nullable
+Revises: 0009_resident_photo_status
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_refresh_token_user_nullable"
+down_revision = "0009_resident_photo_status"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column("refresh_tokens", "user_id", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade():
+    op.execute("DELETE FROM refresh_tokens WHERE user_id IS NULL")
+    op.alter_column("refresh_tokens", "user_id", existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,33 @@
+"""Move resident_code_seq past every code already issued
+
+Replaces the per-worker startup sync: codes are only handed out by the
+sequence now, so one pass over the existing rows is enough.
+
+Revision ID: 0011_sync_resident_code_seq
+Revises: 0010_refresh_token_user_nullable
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0011_sync_resident_code_seq"
+down_revision = "0010_refresh_token_user_nullable"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Older codes mirrored the row id, so both are covered
+    op.execute("""
+        SELECT setval('resident_code_seq', GREATEST(
+            (SELECT last_value FROM resident_code_seq),
+            (SELECT COALESCE(MAX(id), 0) FROM resident_profiles),
+            (SELECT COALESCE(MAX(substring(resident_code FROM 4)::bigint), 0)
+               FROM resident_profiles WHERE resident_code ~ '^SF-[0-9]+$'),
+            1
+        ))
+    """)
+
+
+def downgrade():
+    pass
@@ -1,4 +1,4 @@
-from app.core.database import SessionLocal, engine
+from app.core.database import SessionLocal
 import models
 from passlib.context import CryptContext
 import os
@@ -10,8 +10,7 @@ load_dotenv()
 # Initialize the password context properly
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Create tables if they don't exist
-models.Base.metadata.create_all(bind=engine)
+# Tables come from migrations: run `python init_db.py` (alembic upgrade head) first
 
 db = SessionLocal()
 
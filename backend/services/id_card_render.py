@@ -0,0 +1,181 @@
+# app/services/id_card_render.py
+# ------------------------------------------------------------
+# ID card drawing, run inside the id_card_service process pool
+# - Pure functions over plain dicts (picklable in and out); imports only
+#   PIL/qrcode, so spawned pool processes start without the app or the DB
+# - Cards are CR80 size at CARD_DPI; an A4 sheet holds CARDS_PER_PAGE
+# - PdfStream writes a PDF page by page (one lossless image per sheet), so
+#   a batch is sent to the client while later sheets are still rendering
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import zlib
+from io import BytesIO
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+CARD_DPI = 200
+CARD_SIZE = (674, 425)  # 85.6 x 54 mm
+PAGE_SIZE = (1654, 2339)  # A4
+PAGE_POINTS = (595.28, 841.89)
+PAGE_COLUMNS, PAGE_ROWS = 2, 5
+CARDS_PER_PAGE = PAGE_COLUMNS * PAGE_ROWS
+CARD_GAP = 12
+
+TITLE = "MUNICIPALITY OF SAN FELIPE"
+SUBTITLE = "RESIDENT ID"
+
+_fonts = {}
+
+
+def _font(size: int):
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = ImageFont.load_default(size=size)
+    return font
+
+
+def _fit(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _qr_image(code: str, size: int) -> Image.Image:
+    qr = qrcode.QRCode(border=2)
+    qr.add_data(code)
+    qr.make(fit=True)
+    image = qr.make_image().get_image().convert("RGB")
+    return image.resize((size, size), Image.NEAREST)
+
+
+def render_card(card: dict) -> Image.Image:
+    """card: code, name, barangay, purok."""
+    width, height = CARD_SIZE
+    image = Image.new("RGB", CARD_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+
+    draw.rectangle((0, 0, width - 1, height - 1), outline=(120, 120, 120), width=2)
+    draw.rectangle((2, 2, width - 3, 58), fill=(24, 64, 120))
+    draw.text((18, 8), TITLE, font=_font(20), fill="white")
+    draw.text((18, 32), SUBTITLE, font=_font(16), fill=(210, 220, 235))
+
+    # Photo placeholder
+    photo = (18, 76, 168, 256)
+    draw.rectangle(photo, outline=(150, 150, 150), width=2)
+    draw.text(((photo[0] + photo[2]) / 2, (photo[1] + photo[3]) / 2), "PHOTO",
+              font=_font(18), fill=(150, 150, 150), anchor="mm")
+
+    qr_size = 230
+    image.paste(_qr_image(card["code"], qr_size), (width - qr_size - 18, 70))
+
+    text_x, text_width = 18, width - qr_size - 18 - 18 - 14
+    y = 270
+    for line, size in (
+        (card["name"], 24),
+        (card["code"], 22),
+        (card.get("barangay") or "", 18),
+        (f"Purok {card['purok']}" if card.get("purok") else "", 16),
+    ):
+        if line:
+            font = _font(size)
+            draw.text((text_x, y), _fit(draw, line, font, text_width), font=font, fill="black")
+        y += size + 12
+
+    return image
+
+
+def render_card_pngs(cards: list[dict]) -> list[bytes]:
+    pngs = []
+    for card in cards:
+        buffer = BytesIO()
+        render_card(card).save(buffer, format="PNG", optimize=True)
+        pngs.append(buffer.getvalue())
+    return pngs
+
+
+def render_page(cards: list[dict]) -> tuple[int, int, bytes]:
+    """One A4 sheet of up to CARDS_PER_PAGE cards as (width, height, deflated RGB)."""
+    page = Image.new("RGB", PAGE_SIZE, "white")
+
+    card_width, card_height = CARD_SIZE
+    grid_width = PAGE_COLUMNS * card_width + (PAGE_COLUMNS - 1) * CARD_GAP
+    grid_height = PAGE_ROWS * card_height + (PAGE_ROWS - 1) * CARD_GAP
+    left = (PAGE_SIZE[0] - grid_width) // 2
+    top = (PAGE_SIZE[1] - grid_height) // 2
+
+    for index, card in enumerate(cards[:CARDS_PER_PAGE]):
+        row, column = divmod(index, PAGE_COLUMNS)
+        page.paste(render_card(card), (
+            left + column * (card_width + CARD_GAP),
+            top + row * (card_height + CARD_GAP),
+        ))
+
+    return PAGE_SIZE[0], PAGE_SIZE[1], zlib.compress(page.tobytes(), 6)
+
+
+class PdfStream:
+    """
+    Minimal PDF writer: header(), page() per sheet, then trailer(). Each call
+    returns the bytes to send; the page tree and xref go last, once the page
+    count is known.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3  # 1: catalog, 2: page tree
+
+    def _emit(self, data: bytes) -> bytes:
+        self.position += len(data)
+        return data
+
+    def _object(self, object_id: int, body: bytes, stream: bytes | None = None) -> bytes:
+        self.offsets[object_id] = self.position
+        data = f"{object_id} 0 obj\n".encode() + body
+        if stream is not None:
+            data += b"\nstream\n" + stream + b"\nendstream"
+        return self._emit(data + b"\nendobj\n")
+
+    def header(self) -> bytes:
+        return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def page(self, width: int, height: int, deflated_rgb: bytes) -> bytes:
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        self.page_ids.append(page_id)
+
+        points_w, points_h = PAGE_POINTS
+        content = f"q {points_w} 0 0 {points_h} 0 0 cm /Im0 Do Q".encode()
+
+        return b"".join((
+            self._object(image_id, (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode "
+                f"/Length {len(deflated_rgb)} >>"
+            ).encode(), deflated_rgb),
+            self._object(content_id, f"<< /Length {len(content)} >>".encode(), content),
+            self._object(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {points_w} {points_h}] "
+                f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode()),
+        ))
+
+    def trailer(self) -> bytes:
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        data = self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        data += self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+
+        xref_at = self.position
+        size = self.next_id
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            xref.append(f"{self.offsets[object_id]:010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n")
+
+        return data + self._emit("".join(xref).encode())
@@ -0,0 +1,346 @@
+# app/services/id_card_service.py
+# ------------------------------------------------------------
+# Bulk QR ID cards
+# - Live residents matching a barangay and/or sector become cards, rendered
+#   as a multi-page PDF (A4 sheets) or a ZIP of card PNGs
+# - Drawing runs in a process pool (services.id_card_render); results come
+#   back in order through a bounded window and are streamed as they arrive
+# - Up to ID_CARD_SYNC_LIMIT cards stream straight to the request; larger
+#   batches become a background job whose file is written to
+#   ID_CARD_OUTPUT_DIR and downloaded once completed. The directory is local
+#   to the host: workers on other hosts cannot serve each other's files
+# - Job progress is read back through GET /id-cards/jobs/{id}; interrupted
+#   jobs are resumed (re-rendered) at startup or by a poll once stale, like
+#   import jobs
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import SessionLocal
+from app.crud.crud import apply_barangay_filter, apply_name_sort
+
+logger = logging.getLogger(__name__)
+
+ID_CARD_PROCESSES = int(os.getenv("ID_CARD_PROCESSES", str(min(4, os.cpu_count() or 1))))
+ID_CARD_SYNC_LIMIT = int(os.getenv("ID_CARD_SYNC_LIMIT", "300"))
+ID_CARD_OUTPUT_DIR = os.getenv("ID_CARD_OUTPUT_DIR", os.path.join(tempfile.gettempdir(), "sanfelipe-id-cards"))
+ID_CARD_KEEP_HOURS = int(os.getenv("ID_CARD_KEEP_HOURS", "24"))
+
+FORMATS = {
+    "pdf": "application/pdf",
+    "zip": "application/zip",
+}
+
+ZIP_BATCH = 25  # cards per pool task in ZIP mode (a PDF task is one sheet)
+STALE_AFTER = timedelta(minutes=2)
+ACTIVE_STATUSES = ("pending", "running")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# One card job at a time per worker; the process pool is the parallelism
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="id-card-job")
+_queued: set[int] = set()
+_queued_lock = threading.Lock()
+
+
+# ===============================
+# Residents
+# ===============================
+def card_query(db: Session, barangay: str | None = None, sector_id: int | None = None):
+    query = db.query(
+        models.ResidentProfile.resident_code,
+        models.ResidentProfile.last_name,
+        models.ResidentProfile.first_name,
+        models.ResidentProfile.middle_name,
+        models.ResidentProfile.ext_name,
+        models.ResidentProfile.barangay,
+        models.ResidentProfile.purok,
+    ).filter(
+        models.ResidentProfile.is_deleted == False,
+        models.ResidentProfile.is_active == True,
+    )
+
+    query = apply_barangay_filter(query, barangay)
+    if sector_id:
+        query = query.filter(models.ResidentProfile.sectors.any(models.Sector.id == sector_id))
+    return query
+
+
+def count_cards(db: Session, barangay: str | None = None, sector_id: int | None = None) -> int:
+    return card_query(db, barangay, sector_id).order_by(None).count()
+
+
+def load_cards(db: Session, barangay: str | None = None, sector_id: int | None = None) -> list[dict]:
+    cards = []
+    for code, last, first, middle, ext, barangay_name, purok in apply_name_sort(card_query(db, barangay, sector_id)):
+        given = " ".join(part for part in (first, middle, ext) if part)
+        cards.append({
+            "code": code,
+            "name": f"{last}, {given}" if given else (last or ""),
+            "barangay": barangay_name,
+            "purok": purok,
+        })
+    return cards
+
+
+# ===============================
+# Rendering
+# ===============================
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process has threads (DB pools, job workers) that fork would copy mid-state
+            _pool = ProcessPoolExecutor(
+                max_workers=ID_CARD_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _ordered_map(fn, batches: list) -> Iterator:
+    """Pool results in submission order, keeping at most two tasks per process in flight."""
+    pool = _get_pool()
+    window = ID_CARD_PROCESSES * 2
+    pending = deque()
+    remaining = iter(batches)
+
+    for batch in remaining:
+        pending.append(pool.submit(fn, batch))
+        if len(pending) >= window:
+            break
+
+    while pending:
+        result = pending.popleft().result()
+        batch = next(remaining, None)
+        if batch is not None:
+            pending.append(pool.submit(fn, batch))
+        yield result
+
+
+def _chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class _ZipSink:
+    """Write-only file for ZipFile; drain() hands over what has been written so far."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_cards(cards: list[dict], fmt: str, progress: Callable[[int], None] | None = None) -> Iterator[bytes]:
+    """The PDF or ZIP as chunks; progress(cards_done) is called after each batch."""
+    from services import id_card_render
+
+    done = 0
+
+    if fmt == "pdf":
+        pdf = id_card_render.PdfStream()
+        yield pdf.header()
+        batches = _chunks(cards, id_card_render.CARDS_PER_PAGE)
+        for batch, (width, height, data) in zip(batches, _ordered_map(id_card_render.render_page, batches)):
+            yield pdf.page(width, height, data)
+            done += len(batch)
+            if progress:
+                progress(done)
+        yield pdf.trailer()
+        return
+
+    sink = _ZipSink()
+    # Stored: PNGs are already compressed
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        batches = _chunks(cards, ZIP_BATCH)
+        for batch, pngs in zip(batches, _ordered_map(id_card_render.render_card_pngs, batches)):
+            for card, png in zip(batch, pngs):
+                archive.writestr(f"{card['code']}.png", png)
+            yield sink.drain()
+            done += len(batch)
+            if progress:
+                progress(done)
+    yield sink.drain()
+
+
+def download_name(barangay: str | None, fmt: str) -> str:
+    clean_name = barangay.replace(" ", "_") if barangay else "All"
+    return f"SanFelipe_ID_Cards_{clean_name}.{fmt}"
+
+
+# ===============================
+# Background jobs
+# ===============================
+def output_path(job: models.IdCardJob) -> str:
+    return os.path.join(ID_CARD_OUTPUT_DIR, f"id_cards_{job.id}.{job.output_format}")
+
+
+def create_job(
+    db: Session,
+    barangay: str | None,
+    sector_id: int | None,
+    fmt: str,
+    cards_total: int,
+    user_id: int | None,
+) -> models.IdCardJob:
+    job = models.IdCardJob(
+        barangay=barangay,
+        sector_id=sector_id,
+        output_format=fmt,
+        cards_total=cards_total,
+        created_by=user_id,
+        status="pending",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def submit_id_card_job(job_id: int) -> None:
+    """Queues a job on this worker unless it is already queued here."""
+    with _queued_lock:
+        if job_id in _queued:
+            return
+        _queued.add(job_id)
+
+    _executor.submit(_run_and_release, job_id)
+
+
+def resume_id_card_jobs() -> None:
+    """Re-queues unfinished jobs, e.g. after a worker restart."""
+    db = SessionLocal()
+    try:
+        job_ids = [
+            job_id for (job_id,) in db.query(models.IdCardJob.id)
+            .filter(models.IdCardJob.status.in_(ACTIVE_STATUSES))
+            .order_by(models.IdCardJob.id)
+            .all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        submit_id_card_job(job_id)
+
+
+def is_stale(job: models.IdCardJob) -> bool:
+    """Active, but no worker has shown signs of life on it for STALE_AFTER."""
+    cutoff = datetime.now(timezone.utc) - STALE_AFTER
+    if job.status == "pending":
+        return job.created_at < cutoff
+    return job.status == "running" and (job.heartbeat_at is None or job.heartbeat_at < cutoff)
+
+
+def _run_and_release(job_id: int) -> None:
+    try:
+        run_id_card_job(job_id)
+    finally:
+        with _queued_lock:
+            _queued.discard(job_id)
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    """Pending, or running with a stale heartbeat (its worker died)."""
+    claimed = db.query(models.IdCardJob).filter(
+        models.IdCardJob.id == job_id,
+        or_(
+            models.IdCardJob.status == "pending",
+            and_(
+                models.IdCardJob.status == "running",
+                or_(
+                    models.IdCardJob.heartbeat_at.is_(None),
+                    models.IdCardJob.heartbeat_at < func.now() - STALE_AFTER,
+                ),
+            ),
+        ),
+    ).update({"status": "running", "heartbeat_at": func.now()}, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def _expire_old_files(db: Session) -> None:
+    old_jobs = db.query(models.IdCardJob).filter(
+        models.IdCardJob.status == "completed",
+        models.IdCardJob.finished_at < func.now() - timedelta(hours=ID_CARD_KEEP_HOURS),
+    ).all()
+
+    for job in old_jobs:
+        try:
+            os.remove(output_path(job))
+        except FileNotFoundError:
+            pass
+        job.status = "expired"
+    db.commit()
+
+
+def run_id_card_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+
+        _expire_old_files(db)
+
+        job = db.query(models.IdCardJob).filter(models.IdCardJob.id == job_id).first()
+        cards = load_cards(db, job.barangay, job.sector_id)
+
+        job.cards_total = len(cards)
+        job.cards_rendered = 0
+        db.commit()
+
+        def progress(done: int):
+            job.cards_rendered = done
+            job.heartbeat_at = func.now()
+            db.commit()
+
+        os.makedirs(ID_CARD_OUTPUT_DIR, exist_ok=True)
+        path = output_path(job)
+        # Written aside and renamed, so a download never sees half a file
+        with open(path + ".part", "wb") as f:
+            for chunk in stream_cards(cards, job.output_format, progress):
+                f.write(chunk)
+        os.replace(path + ".part", path)
+
+        job.status = "completed"
+        job.finished_at = func.now()
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.exception("ID card job %s failed", job_id)
+
+        job = db.query(models.IdCardJob).filter(models.IdCardJob.id == job_id).first()
+        if job:
+            job.status = "failed"
+            job.finished_at = func.now()
+            job.error = str(e)
+            db.commit()
+    finally:
+        db.close()
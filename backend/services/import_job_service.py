@@ -0,0 +1,281 @@
+# app/services/import_job_service.py
+# ------------------------------------------------------------
+# Background Excel import jobs
+# - One job per file content (sha256): re-uploading the same file returns the existing job
+# - Residents are loaded in chunks; each chunk commits together with the job counters
+# - A restarted worker resumes from the last committed chunk (chunks_done)
+# - Progress is read back through GET /imports/{id}; a job whose heartbeat went
+#   stale (its worker died) is re-queued by the next poll
+# - all_sheets jobs merge every sheet of the workbook (parsed in parallel)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+STALE_AFTER = timedelta(minutes=2)
+HEARTBEAT_EVERY = timedelta(seconds=30)
+MAX_STORED_ERRORS = 200
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# One import at a time per worker; jobs are I/O heavy on the same tables.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+_queued: set[int] = set()
+_queued_lock = threading.Lock()
+
+
+# ===============================
+# Helpers
+# ===============================
+def file_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _set_errors(job: models.ImportJob, errors: List[str]) -> None:
+    job.error_count = len(errors)
+    job.errors = json.dumps(errors[:MAX_STORED_ERRORS])
+
+
+def _add_errors(job: models.ImportJob, errors: List[str]) -> None:
+    existing = json.loads(job.errors) if job.errors else []
+    job.error_count = (job.error_count or 0) + len(errors)
+    job.errors = json.dumps((existing + errors)[:MAX_STORED_ERRORS])
+
+
+# ===============================
+# Job creation
+# ===============================
+def _find_job(db: Session, digest: str, all_sheets: bool) -> models.ImportJob | None:
+    return db.query(models.ImportJob).filter(
+        models.ImportJob.file_hash == digest,
+        models.ImportJob.all_sheets == all_sheets,
+    ).first()
+
+
+def get_or_create_job(
+    db: Session,
+    content: bytes,
+    filename: str | None,
+    user_id: int | None,
+    all_sheets: bool = False,
+) -> models.ImportJob:
+    digest = file_hash(content)
+
+    job = _find_job(db, digest, all_sheets)
+    if job:
+        # A failed job keeps its file, so a re-upload retries from the last committed chunk
+        if job.status == "failed" and job.file_content is not None:
+            job.status = "pending"
+            db.commit()
+        return job
+
+    job = models.ImportJob(
+        file_hash=digest,
+        all_sheets=all_sheets,
+        filename=filename,
+        file_content=content,
+        created_by=user_id,
+        status="pending",
+    )
+    db.add(job)
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same file uploaded concurrently; the other request created the job
+        db.rollback()
+        return _find_job(db, digest, all_sheets)
+
+    db.refresh(job)
+    return job
+
+
+# ===============================
+# Scheduling
+# ===============================
+def submit_import_job(job_id: int) -> None:
+    """Queues a job on this worker unless it is already queued here."""
+    with _queued_lock:
+        if job_id in _queued:
+            return
+        _queued.add(job_id)
+
+    _executor.submit(_run_and_release, job_id)
+
+
+def resume_import_jobs() -> None:
+    """Re-queues unfinished jobs, e.g. after a worker restart."""
+    db = SessionLocal()
+    try:
+        job_ids = [
+            job_id for (job_id,) in db.query(models.ImportJob.id)
+            .filter(models.ImportJob.status.in_(ACTIVE_STATUSES))
+            .order_by(models.ImportJob.id)
+            .all()
+        ]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        submit_import_job(job_id)
+
+
+def is_stale(job: models.ImportJob) -> bool:
+    """Active, but no worker has shown signs of life on it for STALE_AFTER."""
+    cutoff = datetime.now(timezone.utc) - STALE_AFTER
+    if job.status == "pending":
+        return job.created_at < cutoff
+    return job.status == "running" and (job.heartbeat_at is None or job.heartbeat_at < cutoff)
+
+
+def _run_and_release(job_id: int) -> None:
+    try:
+        run_import_job(job_id)
+    finally:
+        with _queued_lock:
+            _queued.discard(job_id)
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    """
+    Marks the job as running if it is pending, or running with a stale heartbeat
+    (its worker died). Prevents two workers from processing the same job.
+    """
+    claimed = db.query(models.ImportJob).filter(
+        models.ImportJob.id == job_id,
+        or_(
+            models.ImportJob.status == "pending",
+            and_(
+                models.ImportJob.status == "running",
+                or_(
+                    models.ImportJob.heartbeat_at.is_(None),
+                    models.ImportJob.heartbeat_at < func.now() - STALE_AFTER,
+                ),
+            ),
+        ),
+    ).update({"status": "running", "heartbeat_at": func.now()}, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+# ===============================
+# Worker
+# ===============================
+@contextmanager
+def _heartbeat(job_id: int):
+    """
+    Keeps heartbeat_at fresh from a side thread while the job runs, so a long
+    workbook parse (no chunk commits yet) is not taken for a dead worker.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_EVERY.total_seconds()):
+            db = SessionLocal()
+            try:
+                db.query(models.ImportJob).filter(
+                    models.ImportJob.id == job_id,
+                    models.ImportJob.status == "running",
+                ).update({"heartbeat_at": func.now()}, synchronize_session=False)
+                db.commit()
+            except Exception:
+                logger.exception("Heartbeat for import job %s failed", job_id)
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"import-job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_import_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+
+        with _heartbeat(job_id):
+            _run_claimed(db, job_id)
+
+    except Exception as e:
+        db.rollback()
+        logger.exception("Import job %s failed", job_id)
+
+        job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+        if job:
+            job.status = "failed"
+            job.finished_at = func.now()
+            _add_errors(job, [f"Import error: {str(e)}"])
+            db.commit()
+    finally:
+        db.close()
+
+
+def _run_claimed(db: Session, job_id: int) -> None:
+    # pandas/openpyxl load with the first job, not when the API starts
+    from services.import_service import (
+        read_excel_frame,
+        build_import_rows,
+        build_workbook_rows,
+        load_resident_rows,
+        chunked,
+    )
+
+    job = db.query(models.ImportJob).filter(models.ImportJob.id == job_id).first()
+
+    if job.all_sheets:
+        rows = build_workbook_rows(job.file_content)
+    else:
+        rows = build_import_rows(read_excel_frame(io.BytesIO(job.file_content)))
+    parts = chunked(rows["residents"], CHUNK_SIZE)
+
+    # First run: record totals. Assigned (not added) so a crash before the
+    # first chunk commits does not double count on resume.
+    if job.chunks_done == 0:
+        job.rows_total = len(rows["residents"])
+        job.duplicates = rows["skipped_duplicates"]
+        _set_errors(job, rows["errors"])
+        if job.all_sheets:
+            job.sheet_stats = json.dumps(rows["sheets"])
+        db.commit()
+
+    for index in range(job.chunks_done, len(parts)):
+        part = parts[index]
+        result = load_resident_rows(db, part, rows["family_by_key"])
+
+        # Counters commit in the same transaction as the rows they describe
+        job.rows_processed += len(part)
+        job.inserted += result["added"]
+        job.duplicates += result["skipped_duplicates"]
+        job.family_added += result["family_added"]
+        job.chunks_done = index + 1
+        job.heartbeat_at = func.now()
+        db.commit()
+
+    job.status = "completed"
+    job.finished_at = func.now()
+    job.file_content = None
+    db.commit()
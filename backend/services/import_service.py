@@ -2,28 +2,38 @@
 # ------------------------------------------------------------
 # Excel Import Service (Residents + Spouse + Family Members)
 # Railway/Postgres-friendly:
-# - PH date parsing (dayfirst=True)
+# - PH date parsing (dayfirst=True), vectorized per column with a memoized fallback
 # - Flexible column normalization
 # - Flexible detection for family columns (supports "1. FIRST NAME", "1.FIRST NAME", "1 . FIRST NAME")
-# - Inserts residents with ON CONFLICT DO NOTHING
-# - Fetches resident IDs, then inserts family members (chunked)
+# - Inserts residents with ON CONFLICT DO NOTHING ... RETURNING id
+# - Looks up IDs only for conflicting rows, then inserts family members (chunked)
 # - Skips invalid family slots (requires FIRST NAME)
 # - Returns family_added so your UI can show if family inserts are working
+# - all_sheets mode parses each sheet in its own process and merges them
+# - dry_run_import reports new/duplicate/problem rows without writing
 # ------------------------------------------------------------
 
 from __future__ import annotations
 
+import csv
+import io
+import multiprocessing
+import os
 import re
-import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
+from openpyxl import load_workbook
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy import tuple_
+from sqlalchemy import tuple_, text
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.models import ResidentProfile, FamilyMember
+from app.crud.crud import allocate_resident_codes
 
 
 # ===============================
@@ -49,19 +59,36 @@ def get_any(row: pd.Series, *keys: str) -> str:
     return ""
 
 
+@lru_cache(maxsize=8192)
+def _parse_date_string(s: str) -> Optional[date]:
+    # PH common: DD/MM/YYYY
+    try:
+        return pd.to_datetime(s, dayfirst=True, errors="raise").date()
+    except Exception:
+        try:
+            dt = pd.to_datetime(s, errors="coerce")
+            return dt.date() if dt is not pd.NaT else None
+        except Exception:
+            return None
+
+
 def parse_date(date_val: Any) -> Optional[Any]:
     """
     Parses Excel dates robustly:
-    - supports pd.Timestamp
+    - supports pd.Timestamp / datetime cells (openpyxl returns datetime)
     - supports Excel serial numbers
     - supports strings like DD/MM/YYYY (PH common) using dayfirst=True
+    For whole columns use parse_date_column, which gives the same results.
     """
     if date_val is None or pd.isna(date_val):
         return None
 
-    if isinstance(date_val, pd.Timestamp):
+    if isinstance(date_val, datetime):
         return date_val.date()
 
+    if isinstance(date_val, date):
+        return date_val
+
     if isinstance(date_val, (int, float)):
         try:
             return pd.to_datetime(date_val, origin="1899-12-30", unit="D").date()
@@ -72,15 +99,118 @@ def parse_date(date_val: Any) -> Optional[Any]:
     if not s:
         return None
 
-    # PH common: DD/MM/YYYY
-    try:
-        return pd.to_datetime(s, dayfirst=True, errors="raise").date()
-    except Exception:
-        try:
-            dt = pd.to_datetime(s, errors="coerce")
-            return dt.date() if dt is not pd.NaT else None
-        except Exception:
-            return None
+    return _parse_date_string(s)
+
+
+# D/M/Y with "/" or "-" and a 2 or 4 digit year (dayfirst, like _parse_date_string)
+NUMERIC_DATE_PATTERN = r"^(\d{1,2})([/-])(\d{1,2})\2(\d{4}|\d{2})$"
+MONTH_NAME_DATE_FORMATS = ["%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y"]
+
+
+def _expand_two_digit_years(years: pd.Series) -> pd.Series:
+    # Same sliding window dateutil uses: within 50 years of the current year
+    this_year = date.today().year
+    expanded = years + this_year // 100 * 100
+    expanded = expanded.where(expanded < this_year + 50, expanded - 100)
+    return expanded.where(expanded >= this_year - 50, expanded + 100)
+
+
+def _to_dates(converted: pd.Series) -> List[Optional[date]]:
+    # Year 0 parses in pandas but has no datetime.date; leave it to the fallback
+    return [None if pd.isna(v) or v.year < 1 else v.date() for v in converted]
+
+
+def _parse_date_strings(texts: pd.Index) -> pd.Series:
+    """
+    Parses distinct cleaned strings. Known PH layouts are handled by vectorized
+    passes; anything left goes through the memoized scalar parser.
+    """
+    values = pd.Series(texts, index=texts, dtype=object)
+    parsed = pd.Series([None] * len(texts), index=texts, dtype=object)
+
+    # Pass 1: numeric day-first dates (DD/MM/YYYY, DD-MM-YY, ...)
+    parts = values.str.extract(NUMERIC_DATE_PATTERN)
+    matched = parts[0].notna()
+    if matched.any():
+        year = parts.loc[matched, 3]
+        year_num = pd.to_numeric(year)
+        year_num = year_num.where(year.str.len() == 4, _expand_two_digit_years(year_num))
+        # Reassemble as ISO so to_datetime validates day/month ranges strictly
+        iso = (
+            year_num.astype(str).str.zfill(4)
+            + "-" + parts.loc[matched, 2].str.zfill(2)
+            + "-" + parts.loc[matched, 0].str.zfill(2)
+        )
+        parsed[matched] = _to_dates(pd.to_datetime(iso, format="%Y-%m-%d", errors="coerce"))
+
+    # Pass 2: month names ("March 5, 1980", "5 Mar 1980")
+    for fmt in MONTH_NAME_DATE_FORMATS:
+        pending = parsed.isna()
+        if not pending.any():
+            break
+        parsed[pending] = _to_dates(pd.to_datetime(values[pending], format=fmt, errors="coerce"))
+
+    # Leftovers: one scalar parse per distinct string, cached across imports
+    for text_val in texts[parsed.isna().to_numpy()]:
+        parsed[text_val] = _parse_date_string(text_val)
+
+    return parsed
+
+
+def _date_cell_kind(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return "text"
+    if isinstance(value, datetime):
+        return "null" if pd.isna(value) else "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "null" if pd.isna(value) else "serial"
+    return "other"
+
+
+def parse_date_column(values: pd.Series) -> pd.Series:
+    """
+    Column-wise parse_date: classifies cells once, converts Excel serials and
+    timestamps in bulk and parses each distinct string only once.
+    Returns an object Series of date/None aligned with the input index.
+    """
+    result = pd.Series([None] * len(values), index=values.index, dtype=object)
+    if values.empty:
+        return result
+
+    kinds = values.map(_date_cell_kind)
+
+    timestamps = values[kinds == "datetime"]
+    result[timestamps.index] = [v.date() for v in timestamps]
+
+    dates = values[kinds == "date"]
+    result[dates.index] = list(dates)
+
+    serials = values[kinds == "serial"]
+    if not serials.empty:
+        converted = pd.to_datetime(
+            serials.astype(float), origin="1899-12-30", unit="D", errors="coerce"
+        )
+        # Serials pandas cannot place (NaT, or past year 9999) get the scalar answer
+        result[serials.index] = [
+            parse_date(serial) if pd.isna(v) or not 1 <= v.year <= 9999 else v.date()
+            for serial, v in zip(serials, converted)
+        ]
+
+    texts = values[kinds == "text"].map(clean_str)
+    texts = texts[texts != ""]
+    if not texts.empty:
+        parsed = _parse_date_strings(pd.Index(texts.unique()))
+        result[texts.index] = texts.map(parsed).tolist()
+
+    # Anything unusual (bools, numpy scalars, ...) keeps the scalar path
+    others = values[kinds == "other"]
+    result[others.index] = [parse_date(v) for v in others]
+
+    return result
 
 
 def is_checked(value: Any) -> bool:
@@ -122,14 +252,35 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def chunked(items: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
     return [items[i : i + size] for i in range(0, len(items), size)]
 
 
+def problem_row(index: Any, last_name: str, first_name: str, barangay: str, issue: str) -> Dict[str, Any]:
+    # Excel row number: header is row 1, data starts at row 2
+    return {
+        "sheet": "",
+        "row": index + 2,
+        "last_name": last_name,
+        "first_name": first_name,
+        "barangay": barangay,
+        "issue": issue,
+    }
+
+
+def resident_key(last_name: Any, first_name: Any, middle_name: Any, barangay: Any) -> Tuple[str, str, str, str]:
+    return (
+        (last_name or "").upper(),
+        (first_name or "").upper(),
+        (middle_name or "").upper(),
+        (barangay or "").upper(),
+    )
+
+
 # ===============================
-# MAIN IMPORT
+# IMPORT STAGES
 # ===============================
-def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str, Any]:
+def read_excel_frame(file_content, sheet_name=None) -> pd.DataFrame:
     df = pd.read_excel(
         file_content,
         sheet_name=(0 if sheet_name is None else sheet_name),
@@ -139,9 +290,16 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
 
     df = df.replace({pd.NaT: None})
     df = df.where(pd.notnull(df), None)
-    df = normalize_columns(df)
+    return normalize_columns(df)
+
 
-    success_count = 0
+def build_import_rows(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Transforms a normalized sheet into insert-ready rows:
+    - residents: ResidentProfile dicts, deduplicated within the file
+    - family_by_key: FamilyMember dicts (without profile_id) keyed by resident identity
+    Row order follows the sheet, so the same file always yields the same batches.
+    """
     skipped_duplicates = 0
     errors: List[str] = []
 
@@ -217,10 +375,19 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
 
     # -------------------------------
     # Build rows for ResidentProfile insert
+    # Family rows are built in the same pass and keyed by resident identity,
+    # so the DataFrame is only iterated once.
     # -------------------------------
     seen_in_file: set[Tuple[str, str, str, str]] = set()
     residents_to_insert: List[Dict[str, Any]] = []
-    resident_keys_in_file: List[Tuple[str, str, str, str]] = []
+    family_by_key: Dict[Tuple[str, str, str, str], List[Dict[str, Any]]] = {}
+    problems: List[Dict[str, Any]] = []
+
+    # Dates are parsed for the whole column up front (vectorized + memoized)
+    if "BIRTHDATE" in df.columns:
+        birthdates = parse_date_column(df["BIRTHDATE"])
+    else:
+        birthdates = pd.Series([None] * len(df), index=df.index, dtype=object)
 
     for index, row in df.iterrows():
         try:
@@ -230,6 +397,9 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
             barangay = clean_str(row.get("BARANGAY")).upper()
 
             if not last_name or not first_name:
+                # Fully blank rows are formatting leftovers, not problems
+                if any(clean_str(v) for v in row.values):
+                    problems.append(problem_row(index, last_name, first_name, barangay, "Missing last or first name"))
                 continue
 
             key = (last_name, first_name, middle_name, barangay)
@@ -237,9 +407,13 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
                 skipped_duplicates += 1
                 continue
             seen_in_file.add(key)
-            resident_keys_in_file.append(key)
 
-            birthdate = parse_date(row.get("BIRTHDATE"))
+            raw_birthdate = row.get("BIRTHDATE")
+            birthdate = birthdates.at[index]
+            if birthdate is None and clean_str(raw_birthdate):
+                problems.append(
+                    problem_row(index, last_name, first_name, barangay, f"Unparseable birthdate: {clean_str(raw_birthdate)}")
+                )
 
             # sectors -> summary
             active_sectors = [c for c in sector_columns if is_checked(row.get(c))]
@@ -252,7 +426,6 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
 
             residents_to_insert.append(
                 {
-                    "resident_code": "RES-" + uuid.uuid4().hex[:8].upper(),
                     "is_deleted": False,
                     "is_archived": False,
                     "is_family_head": True,
@@ -283,143 +456,372 @@ def process_excel_import(file_content, db: Session, sheet_name=None) -> Dict[str
 
         except Exception as e:
             errors.append(f"Row {index + 2}: {str(e)}")
+            problems.append(problem_row(index, "", "", "", str(e)))
+            continue
+
+        # -------------------------------
+        # Family members for this row (profile_id is attached after insert)
+        # Key fixes:
+        # - require FIRST NAME (prevents NOT NULL / invalid inserts)
+        # - flexible family column detection above
+        # -------------------------------
+        if not members_map:
+            continue
+
+        try:
+            members: List[Dict[str, Any]] = []
+            for member_no in sorted(members_map.keys()):
+                cols = members_map[member_no]
+
+                lname = clean_str(row.get(cols.get("LAST NAME", ""))).upper()
+                fname = clean_str(row.get(cols.get("FIRST NAME", ""))).upper()
+                mname = clean_str(row.get(cols.get("MIDDLE NAME", ""))).upper()
+                ext = clean_str(row.get(cols.get("EXT NAME", ""))).upper()
+                rel = clean_str(row.get(cols.get("RELATIONSHIP", ""))).upper()
+
+                # MUST have first name
+                if fname == "":
+                    continue
+
+                # default lname to household last name if empty
+                if lname == "":
+                    lname = last_name
+
+                members.append(
+                    {
+                        "last_name": lname,
+                        "first_name": fname,
+                        "middle_name": (mname or None),
+                        "ext_name": (ext or None),
+                        "relationship": (rel or None),
+                        "is_active": True,
+                        "is_family_head": False,
+                    }
+                )
+
+            if members:
+                family_by_key[key] = members
+
+        except Exception as e:
+            errors.append(f"Family row {index + 2}: {str(e)}")
+
+    return {
+        "rows_read": len(df),
+        "residents": residents_to_insert,
+        "family_by_key": family_by_key,
+        "skipped_duplicates": skipped_duplicates,
+        "errors": errors,
+        "problems": problems,
+    }
+
+
+# ===============================
+# MULTI-SHEET WORKBOOKS
+# ===============================
+def read_bytes(file_content) -> bytes:
+    if isinstance(file_content, (bytes, bytearray)):
+        return bytes(file_content)
+    file_content.seek(0)
+    return file_content.read()
 
+
+def list_sheet_names(content: bytes) -> List[str]:
+    wb = load_workbook(io.BytesIO(content), read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def _build_sheet_rows(args: Tuple[bytes, str]) -> Dict[str, Any]:
+    # Runs in a worker process: parse + normalize + row building for one sheet
+    content, sheet_name = args
+    return build_import_rows(read_excel_frame(io.BytesIO(content), sheet_name))
+
+
+def build_workbook_rows(file_content, sheet_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Builds import rows for every sheet (one per purok, typically).
+    Sheets are parsed in separate processes since the pandas/openpyxl work is
+    CPU-bound, then merged into one batch deduplicated across sheets
+    (first sheet wins). Per-sheet statistics are returned under "sheets".
+    """
+    content = read_bytes(file_content)
+    sheet_names = sheet_names or list_sheet_names(content)
+
+    jobs = [(content, name) for name in sheet_names]
+    if len(jobs) > 1:
+        workers = min(len(jobs), os.cpu_count() or 1)
+        # spawn: the caller may be a threaded web worker holding DB connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            sheet_rows = list(pool.map(_build_sheet_rows, jobs))
+    else:
+        sheet_rows = [_build_sheet_rows(job) for job in jobs]
+
+    seen: set[Tuple[str, str, str, str]] = set()
+    residents: List[Dict[str, Any]] = []
+    family_by_key: Dict[Tuple[str, str, str, str], List[Dict[str, Any]]] = {}
+    errors: List[str] = []
+    problems: List[Dict[str, Any]] = []
+    sheets: List[Dict[str, Any]] = []
+    rows_read = 0
+    skipped_duplicates = 0
+
+    for name, rows in zip(sheet_names, sheet_rows):
+        cross_sheet_duplicates = 0
+
+        for resident in rows["residents"]:
+            key = resident_key(resident["last_name"], resident["first_name"], resident["middle_name"], resident["barangay"])
+            if key in seen:
+                cross_sheet_duplicates += 1
+                continue
+            seen.add(key)
+            residents.append(resident)
+            if key in rows["family_by_key"]:
+                family_by_key[key] = rows["family_by_key"][key]
+
+        rows_read += rows["rows_read"]
+        skipped_duplicates += rows["skipped_duplicates"] + cross_sheet_duplicates
+        errors.extend(f"[{name}] {message}" for message in rows["errors"])
+        problems.extend({**problem, "sheet": name} for problem in rows["problems"])
+
+        sheets.append(
+            {
+                "sheet": name,
+                "rows_read": rows["rows_read"],
+                "residents": len(rows["residents"]) - cross_sheet_duplicates,
+                "skipped_duplicates": rows["skipped_duplicates"],
+                "cross_sheet_duplicates": cross_sheet_duplicates,
+                "errors": len(rows["errors"]),
+            }
+        )
+
+    return {
+        "rows_read": rows_read,
+        "residents": residents,
+        "family_by_key": family_by_key,
+        "skipped_duplicates": skipped_duplicates,
+        "errors": errors,
+        "problems": problems,
+        "sheets": sheets,
+    }
+
+
+def load_resident_rows(
+    db: Session,
+    residents: List[Dict[str, Any]],
+    family_by_key: Dict[Tuple[str, str, str, str], List[Dict[str, Any]]],
+) -> Dict[str, int]:
+    """
+    Inserts a batch of resident rows plus their family members.
+    Does not commit; the caller owns the transaction so a batch is all-or-nothing.
+    """
     # -------------------------------
-    # Insert residents
+    # Insert residents (chunked), collecting new IDs via RETURNING
     # -------------------------------
-    inserted_count = 0
-    if residents_to_insert:
-        stmt = insert(ResidentProfile).values(residents_to_insert)
+    resident_id_map: Dict[Tuple[str, str, str, str], int] = {}
+    for part in chunked(residents, 1000):
+        # Codes are assigned at INSERT time from one block allocation per chunk
+        codes = allocate_resident_codes(db, len(part))
+        part = [{**row, "resident_code": code} for row, code in zip(part, codes)]
+
+        stmt = insert(ResidentProfile).values(part)
         stmt = stmt.on_conflict_do_nothing(
             index_elements=["last_name", "first_name", "middle_name", "barangay"]
         )
+        stmt = stmt.returning(
+            ResidentProfile.id,
+            ResidentProfile.last_name,
+            ResidentProfile.first_name,
+            ResidentProfile.middle_name,
+            ResidentProfile.barangay,
+        )
 
-        try:
-            result = db.execute(stmt)
-            db.commit()
-            inserted_count = result.rowcount or 0
-            success_count = inserted_count
-            skipped_duplicates += (len(residents_to_insert) - inserted_count)
-        except SQLAlchemyError as e:
-            db.rollback()
-            return {
-                "added": 0,
-                "family_added": 0,
-                "skipped_duplicates": skipped_duplicates,
-                "errors": [f"Resident insert error: {str(e)}"],
-            }
+        for rid, ln, fn, mn, br in db.execute(stmt):
+            resident_id_map[resident_key(ln, fn, mn, br)] = rid
+
+    added = len(resident_id_map)
 
     # -------------------------------
-    # Fetch IDs for residents in this file (for family members)
+    # Look up IDs only for rows that hit ON CONFLICT and still carry family
+    # members, so the lookup stays proportional to the duplicates.
     # -------------------------------
-    resident_id_map: Dict[Tuple[str, str, str, str], int] = {}
-    if resident_keys_in_file:
-        try:
-            rows = (
-                db.query(
-                    ResidentProfile.id,
+    batch_keys = [
+        resident_key(r["last_name"], r["first_name"], r["middle_name"], r["barangay"])
+        for r in residents
+    ]
+    conflicting_keys = [k for k in batch_keys if k in family_by_key and k not in resident_id_map]
+    for part in chunked(conflicting_keys, 1000):
+        rows = (
+            db.query(
+                ResidentProfile.id,
+                ResidentProfile.last_name,
+                ResidentProfile.first_name,
+                ResidentProfile.middle_name,
+                ResidentProfile.barangay,
+            )
+            .filter(
+                tuple_(
                     ResidentProfile.last_name,
                     ResidentProfile.first_name,
                     ResidentProfile.middle_name,
                     ResidentProfile.barangay,
-                )
-                .filter(
-                    tuple_(
-                        ResidentProfile.last_name,
-                        ResidentProfile.first_name,
-                        ResidentProfile.middle_name,
-                        ResidentProfile.barangay,
-                    ).in_(resident_keys_in_file)
-                )
-                .all()
+                ).in_(part)
             )
+            .all()
+        )
 
-            for rid, ln, fn, mn, br in rows:
-                resident_id_map[(ln.upper(), fn.upper(), (mn or "").upper(), br.upper())] = rid
-        except SQLAlchemyError as e:
-            db.rollback()
-            return {
-                "added": success_count,
-                "family_added": 0,
-                "skipped_duplicates": skipped_duplicates,
-                "errors": errors + [f"Resident ID fetch error: {str(e)}"],
-            }
+        for rid, ln, fn, mn, br in rows:
+            resident_id_map[resident_key(ln, fn, mn, br)] = rid
 
     # -------------------------------
-    # Build family_members rows
-    # Key fixes:
-    # - require FIRST NAME (prevents NOT NULL / invalid inserts)
-    # - flexible family column detection above
+    # Attach profile IDs and insert family members (chunked)
     # -------------------------------
     family_to_insert: List[Dict[str, Any]] = []
+    for key in batch_keys:
+        resident_id = resident_id_map.get(key)
+        if not resident_id:
+            continue
+        for member in family_by_key.get(key, []):
+            family_to_insert.append({"profile_id": resident_id, **member})
 
-    # If members_map is empty, skip family processing entirely (but return errors)
-    if members_map:
-        for index, row in df.iterrows():
-            try:
-                last_name = clean_str(row.get("LAST NAME")).upper()
-                first_name = clean_str(row.get("FIRST NAME")).upper()
-                middle_name = clean_str(row.get("MIDDLE NAME")).upper()
-                barangay = clean_str(row.get("BARANGAY")).upper()
+    family_added = 0
+    for part in chunked(family_to_insert, 1000):
+        result = db.execute(insert(FamilyMember).values(part))
+        family_added += result.rowcount or 0
 
-                if not last_name or not first_name:
-                    continue
+    return {
+        "added": added,
+        "family_added": family_added,
+        "skipped_duplicates": len(residents) - added,
+    }
 
-                key = (last_name, first_name, middle_name, barangay)
-                resident_id = resident_id_map.get(key)
-                if not resident_id:
-                    continue
 
-                for member_no in sorted(members_map.keys()):
-                    cols = members_map[member_no]
-
-                    lname = clean_str(row.get(cols.get("LAST NAME", ""))).upper()
-                    fname = clean_str(row.get(cols.get("FIRST NAME", ""))).upper()
-                    mname = clean_str(row.get(cols.get("MIDDLE NAME", ""))).upper()
-                    ext = clean_str(row.get(cols.get("EXT NAME", ""))).upper()
-                    rel = clean_str(row.get(cols.get("RELATIONSHIP", ""))).upper()
-
-                    # MUST have first name
-                    if fname == "":
-                        continue
-
-                    # default lname to household last name if empty
-                    if lname == "":
-                        lname = last_name
-
-                    family_to_insert.append(
-                        {
-                            "profile_id": resident_id,
-                            "last_name": lname,
-                            "first_name": fname,
-                            "middle_name": (mname or None),
-                            "ext_name": (ext or None),
-                            "relationship": (rel or None),
-                            "is_active": True,
-                            "is_family_head": False,
-                        }
-                    )
-
-            except Exception as e:
-                errors.append(f"Family row {index + 2}: {str(e)}")
+# ===============================
+# DRY RUN
+# ===============================
+PROBLEM_CSV_COLUMNS = ["sheet", "row", "last_name", "first_name", "barangay", "issue"]
+PROBLEM_SAMPLE_SIZE = 20
+
 
-    # -------------------------------
-    # Insert family members (chunked)
-    # -------------------------------
-    family_inserted = 0
-    if family_to_insert:
-        try:
-            for part in chunked(family_to_insert, 1000):
-                result = db.execute(insert(FamilyMember).values(part))
-                db.commit()
-                family_inserted += result.rowcount or 0
-        except SQLAlchemyError as e:
-            db.rollback()
-            errors.append(f"Family insert error: {str(e)}")
+def find_existing_keys(db: Session, keys: List[Tuple[str, str, str, str]]) -> set[Tuple[str, str, str, str]]:
+    """
+    Single set-based probe for identities already in resident_profiles.
+    Keys are sent as four parallel arrays and joined through unnest(), so the
+    planner sees one hash/merge join instead of per-row lookups or a huge IN list.
+    Matching mirrors the ON CONFLICT target used by the real import.
+    """
+    if not keys:
+        return set()
+
+    last_names, first_names, middle_names, barangays = (list(col) for col in zip(*keys))
+
+    rows = db.execute(
+        text(
+            """
+            SELECT rp.last_name, rp.first_name, rp.middle_name, rp.barangay
+            FROM unnest(
+                CAST(:last_names AS text[]),
+                CAST(:first_names AS text[]),
+                CAST(:middle_names AS text[]),
+                CAST(:barangays AS text[])
+            ) AS k(last_name, first_name, middle_name, barangay)
+            JOIN resident_profiles rp
+              ON rp.last_name = k.last_name
+             AND rp.first_name = k.first_name
+             AND rp.middle_name = k.middle_name
+             AND rp.barangay = k.barangay
+            """
+        ),
+        {
+            "last_names": last_names,
+            "first_names": first_names,
+            "middle_names": middle_names,
+            "barangays": barangays,
+        },
+    ).all()
+
+    return {resident_key(*r) for r in rows}
+
+
+def dry_run_import(
+    file_content, db: Session, sheet_name=None, all_sheets: bool = False
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Runs the full transform plus a duplicate probe without writing anything.
+    Returns (report, problem_rows).
+    """
+    if all_sheets:
+        rows = build_workbook_rows(file_content)
+    else:
+        rows = build_import_rows(read_excel_frame(file_content, sheet_name))
+
+    keys = [
+        resident_key(r["last_name"], r["first_name"], r["middle_name"], r["barangay"])
+        for r in rows["residents"]
+    ]
+    existing = find_existing_keys(db, keys)
+    existing_count = sum(1 for k in keys if k in existing)
+
+    problems = rows["problems"]
+
+    report = {
+        "dry_run": True,
+        "rows_read": rows["rows_read"],
+        "valid_rows": len(keys),
+        "new": len(keys) - existing_count,
+        "existing_duplicates": existing_count,
+        "in_file_duplicates": rows["skipped_duplicates"],
+        "family_members": sum(len(members) for members in rows["family_by_key"].values()),
+        "missing_names": sum(1 for p in problems if p["issue"].startswith("Missing")),
+        "unparseable_dates": sum(1 for p in problems if p["issue"].startswith("Unparseable birthdate")),
+        "problem_count": len(problems),
+        "problem_sample": problems[:PROBLEM_SAMPLE_SIZE],
+        "errors": rows["errors"],
+    }
+    if all_sheets:
+        report["sheets"] = rows["sheets"]
+
+    return report, problems
+
+
+def problems_to_csv(problems: List[Dict[str, Any]]) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=PROBLEM_CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(problems)
+    return output.getvalue()
 
-    return {
-        "added": success_count,
-        "family_added": family_inserted,
-        "skipped_duplicates": skipped_duplicates,
+
+# ===============================
+# MAIN IMPORT
+# ===============================
+def process_excel_import(file_content, db: Session, sheet_name=None, all_sheets: bool = False) -> Dict[str, Any]:
+    if all_sheets:
+        rows = build_workbook_rows(file_content)
+    else:
+        rows = build_import_rows(read_excel_frame(file_content, sheet_name))
+    skipped_duplicates = rows["skipped_duplicates"]
+    errors = rows["errors"]
+
+    try:
+        result = load_resident_rows(db, rows["residents"], rows["family_by_key"])
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        return {
+            "added": 0,
+            "family_added": 0,
+            "skipped_duplicates": skipped_duplicates,
+            "errors": errors + [f"Import error: {str(e)}"],
+        }
+
+    summary = {
+        "added": result["added"],
+        "family_added": result["family_added"],
+        "skipped_duplicates": skipped_duplicates + result["skipped_duplicates"],
         "errors": errors,
-    }
\ No newline at end of file
+    }
+    if all_sheets:
+        summary["sheets"] = rows["sheets"]
+    return summary
@@ -0,0 +1,170 @@
+# app/services/photo_service.py
+# ------------------------------------------------------------
+# Resident photo pipeline
+# - The upload endpoint only reads the file and marks the resident
+#   photo_status="processing"; the rest runs on a small worker pool
+# - Pillow decodes the image (JPEG at reduced scale when it is much larger
+#   than needed), applies the EXIF orientation and drops the metadata
+#   (camera, GPS), crops to a PHOTO_SIZE portrait plus a PHOTO_THUMB_SIZE
+#   thumbnail and encodes both as WebP before they go to Cloudinary
+# - Finished photos set photo_url/photo_thumb_url and photo_status="ready";
+#   failures set "failed" and keep the previous photo. A photo still in the
+#   pool when its worker stops is lost and stays "processing" until it is
+#   uploaded again
+# - Processing time and bytes saved are recorded in /admin/metrics
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable
+
+from app import models
+from app.core import metrics
+from app.core.cloudinary_config import get_cloudinary
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Pillow releases the GIL while decoding, resizing and encoding
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+PHOTO_SIZE = (600, 800)  # 3:4 portrait, enough for the printed ID and the scanner view
+PHOTO_THUMB_SIZE = (150, 200)  # list avatars
+PHOTO_QUALITY = int(os.getenv("PHOTO_QUALITY", "80"))
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(20 * 1024 * 1024)))
+# Refuse decompression bombs; a 50 MP phone photo is well below this
+PHOTO_MAX_PIXELS = 100_000_000
+
+CLOUDINARY_FOLDER = "san_felipe_residents"
+
+_executor = ThreadPoolExecutor(max_workers=PHOTO_WORKERS, thread_name_prefix="photo")
+
+_process_time = metrics.latency("photo_process")
+_upload_time = metrics.latency("photo_upload")
+_bytes_in = metrics.counter("photo_bytes_in")
+_bytes_out = metrics.counter("photo_bytes_out")
+_bytes_saved = metrics.counter("photo_bytes_saved")
+_failures = metrics.counter("photo_failed")
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+# ===============================
+# Processing
+# ===============================
+def _encode(image, size: tuple[int, int]) -> bytes:
+    from PIL import Image, ImageOps
+
+    buffer = BytesIO()
+    # No exif= argument: the output carries no metadata
+    ImageOps.fit(image, size, Image.LANCZOS, centering=(0.5, 0.4)).save(
+        buffer, format="WEBP", quality=PHOTO_QUALITY, method=4
+    )
+    return buffer.getvalue()
+
+
+def _open(content: bytes):
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = PHOTO_MAX_PIXELS
+    try:
+        return Image.open(BytesIO(content))
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidPhoto("File is not a readable image") from e
+
+
+def check_photo(content: bytes) -> None:
+    """Cheap upfront check (header only), so the endpoint can reject a bad file with a 400."""
+    if len(content) > PHOTO_MAX_BYTES:
+        raise InvalidPhoto(f"Photo is larger than {PHOTO_MAX_BYTES // (1024 * 1024)} MB")
+    with _open(content) as image:
+        width, height = image.size
+    if width * height > PHOTO_MAX_PIXELS:
+        raise InvalidPhoto("Photo resolution is too large")
+
+
+def process_photo(content: bytes) -> tuple[bytes, bytes]:
+    """(portrait, thumbnail) WebP bytes for an uploaded image; InvalidPhoto if it cannot be read."""
+    from PIL import ImageOps
+
+    with _open(content) as image:
+        try:
+            # JPEG only: decode at 1/2, 1/4 or 1/8 scale while the short side still
+            # covers the portrait height, whichever way the EXIF rotation turns it
+            image.draft("RGB", (PHOTO_SIZE[1], PHOTO_SIZE[1]))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+        except (OSError, SyntaxError) as e:
+            raise InvalidPhoto(f"Unreadable image: {e}") from e
+
+    return _encode(image, PHOTO_SIZE), _encode(image, PHOTO_THUMB_SIZE)
+
+
+def _upload(content: bytes, public_id: str) -> str:
+    result = get_cloudinary().uploader.upload(
+        content,
+        folder=CLOUDINARY_FOLDER,
+        public_id=public_id,
+        overwrite=True,
+    )
+    return result["secure_url"]
+
+
+# ===============================
+# Jobs
+# ===============================
+def submit_photo(resident_id: int, content: bytes, on_done: Callable[[], None] | None = None) -> None:
+    """Queues an uploaded photo; on_done runs after the resident row is updated."""
+    _executor.submit(run_photo_job, resident_id, content, on_done)
+
+
+def _set_result(resident_id: int, **values) -> None:
+    db = SessionLocal()
+    try:
+        resident = db.query(models.ResidentProfile).filter(models.ResidentProfile.id == resident_id).first()
+        if resident:
+            for name, value in values.items():
+                setattr(resident, name, value)
+            db.commit()
+    finally:
+        db.close()
+
+
+def run_photo_job(resident_id: int, content: bytes, on_done: Callable[[], None] | None = None) -> None:
+    try:
+        started = time.perf_counter()
+        portrait, thumbnail = process_photo(content)
+        processed = time.perf_counter()
+        _process_time.observe(processed - started)
+
+        saved = len(content) - len(portrait) - len(thumbnail)
+        _bytes_in.inc(len(content))
+        _bytes_out.inc(len(portrait) + len(thumbnail))
+        _bytes_saved.inc(saved)
+
+        photo_url = _upload(portrait, f"resident_{resident_id}")
+        thumb_url = _upload(thumbnail, f"resident_{resident_id}_thumb")
+        _upload_time.observe(time.perf_counter() - processed)
+
+        logger.info(
+            "Photo for resident %s: %d -> %d + %d bytes (%d saved), processed in %.0f ms",
+            resident_id, len(content), len(portrait), len(thumbnail), saved,
+            (processed - started) * 1000,
+        )
+        _set_result(resident_id, photo_url=photo_url, photo_thumb_url=thumb_url, photo_status="ready")
+
+    except Exception:
+        _failures.inc()
+        logger.exception("Photo for resident %s failed", resident_id)
+        try:
+            _set_result(resident_id, photo_status="failed")
+        except Exception:
+            logger.exception("Could not mark the photo for resident %s failed", resident_id)
+
+    if on_done:
+        on_done()
@@ -0,0 +1,136 @@
+# app/services/qr_service.py
+# ------------------------------------------------------------
+# QR code rendering
+# - A QR only encodes the resident code, so an image for (code, size, format)
+#   never changes: rendered images are kept in an in-memory LRU and on disk
+#   (QR_CACHE_DIR, shared by the workers on a host), and served with a strong
+#   ETag (content hash) and an immutable Cache-Control
+# - Codes confirmed live (not deleted, active) are remembered for
+#   QR_KNOWN_CODE_TTL seconds so QR requests skip the resident lookup; delete,
+#   archive and update forget the code. Per process: another worker may keep
+#   serving a removed resident's QR until its entry expires
+# - qrcode/PIL are imported on the first render
+# ------------------------------------------------------------
+
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+
+from app.core import metrics
+from app.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "512"))
+# Empty disables the disk cache
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sanfelipe-qr"))
+# Matches the public unlock token lifetime
+QR_KNOWN_CODE_TTL = int(os.getenv("QR_KNOWN_CODE_TTL", "300"))
+
+DEFAULT_SIZE = 10  # qrcode's own default box size (pixels per module)
+MIN_SIZE, MAX_SIZE = 1, 40
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+# Images are immutable, the TTL only lets idle ones age out
+_images = TTLCache(maxsize=QR_CACHE_SIZE, ttl=24 * 3600)
+_known_codes = TTLCache(maxsize=4096, ttl=QR_KNOWN_CODE_TTL)
+
+_memory_hits = metrics.counter("qr_cache_memory_hit")
+_disk_hits = metrics.counter("qr_cache_disk_hit")
+_renders = metrics.counter("qr_render")
+
+
+def etag_for(content: bytes) -> str:
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+def _render(code: str, size: int, fmt: str) -> bytes:
+    import qrcode  # pulls in PIL
+
+    buffer = BytesIO()
+    if fmt == "svg":
+        import qrcode.image.svg
+        qrcode.make(code, box_size=size, image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qrcode.make(code, box_size=size).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _disk_path(key) -> str:
+    # Hashed so a code never becomes part of a path
+    name = hashlib.sha256("|".join(map(str, key)).encode()).hexdigest()
+    return os.path.join(QR_CACHE_DIR, f"{name}.{key[2]}")
+
+
+def _read_disk(key) -> bytes | None:
+    if not QR_CACHE_DIR:
+        return None
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(key, content: bytes):
+    if not QR_CACHE_DIR:
+        return
+    path = _disk_path(key)
+    try:
+        os.makedirs(QR_CACHE_DIR, exist_ok=True)
+        # Written aside and renamed, so another worker never reads half a file
+        fd, tmp_path = tempfile.mkstemp(dir=QR_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("QR disk cache write failed: %s", e)
+
+
+def get_qr(code: str, size: int = DEFAULT_SIZE, fmt: str = "png") -> tuple[bytes, str]:
+    """(image bytes, ETag) for a resident code. The caller checks the code is live."""
+    key = (code, size, fmt)
+
+    cached = _images.get(key)
+    if cached is not None:
+        _memory_hits.inc()
+        return cached
+
+    content = _read_disk(key)
+    if content is not None:
+        _disk_hits.inc()
+    else:
+        _renders.inc()
+        content = _render(code, size, fmt)
+        _write_disk(key, content)
+
+    cached = (content, etag_for(content))
+    _images.set(key, cached)
+    return cached
+
+
+def get_data_uri(code: str, size: int = DEFAULT_SIZE, fmt: str = "png") -> str:
+    """The QR inline, for JSON payloads (an <img src> or a canvas source)."""
+    content, _ = get_qr(code, size, fmt)
+    return f"data:{MEDIA_TYPES[fmt]};base64,{base64.b64encode(content).decode()}"
+
+
+def is_known_code(code: str) -> bool:
+    return _known_codes.get(code) is not None
+
+
+def remember_code(code: str):
+    """Record that `code` belongs to a live (not deleted, active) resident."""
+    _known_codes.set(code, True)
+
+
+def forget_code(code: str | None):
+    if code:
+        _known_codes.pop(code)
@@ -1,7 +1,6 @@
 import io
-import pandas as pd
 from datetime import date
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app import models, crud
 from sqlalchemy import func
 
@@ -54,8 +53,10 @@ def generate_household_excel(db, barangay_name=None, hidden_sector_names=None):
 
 def generate_household_excel(db: Session, barangay_name: str = None):
 
-    # 1️⃣ FETCH DATA
-    query = db.query(models.ResidentProfile).filter(
+    # 1️⃣ FETCH DATA (family members in one extra query, not one per resident)
+    query = db.query(models.ResidentProfile).options(
+        selectinload(models.ResidentProfile.family_members)
+    ).filter(
         models.ResidentProfile.is_deleted == False
     )
 
@@ -123,6 +124,8 @@ def generate_household_excel(db: Session, barangay_name: str = None):
 
         data_list.append(row)
 
+    import pandas as pd  # slow to import; only exports need it
+
     df = pd.DataFrame(data_list)
 
     # 4️⃣ GENERATE EXCEL FILE
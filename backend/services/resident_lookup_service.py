@@ -0,0 +1,244 @@
+# app/services/resident_lookup_service.py
+# ------------------------------------------------------------
+# Event-mode resident lookup (QR scanning at distributions)
+# - resident_code -> schemas.ResidentLookup, kept as ready-to-send JSON in a
+#   per-process LRU, so a scan is one dict lookup and no serialization
+# - warm_barangay() loads a whole barangay ahead of an event (also at startup
+#   for EVENT_LOOKUP_WARM_BARANGAYS); other codes are read through on first scan
+# - Session hooks evict a resident when a commit on this worker touches it or
+#   its family members; bulk UPDATE/DELETE on those tables evicts the
+#   residents their WHERE clause names, and clears the cache otherwise.
+#   Writes on other workers are picked up when the entry expires
+#   (EVENT_LOOKUP_TTL_SECONDS)
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, ColumnElement
+from sqlalchemy.orm import Session, selectinload
+
+from app import models, schemas
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOKUP_CACHE_SIZE = int(os.getenv("EVENT_LOOKUP_CACHE_SIZE", "20000"))
+EVENT_LOOKUP_TTL_SECONDS = int(os.getenv("EVENT_LOOKUP_TTL_SECONDS", "300"))
+EVENT_LOOKUP_WARM_BARANGAYS = [
+    name.strip() for name in os.getenv("EVENT_LOOKUP_WARM_BARANGAYS", "").split(",") if name.strip()
+]
+
+WARM_BATCH = 500
+
+# resident_code -> JSON bytes; id -> resident_code lets family member writes find their entry
+_entries = TTLCache(maxsize=EVENT_LOOKUP_CACHE_SIZE, ttl=EVENT_LOOKUP_TTL_SECONDS)
+_codes_by_id = {}
+_codes_lock = threading.Lock()
+
+_hits = metrics.counter("event_lookup_hit")
+_misses = metrics.counter("event_lookup_miss")
+_evictions = metrics.counter("event_lookup_evicted")
+
+RESIDENT_TABLES = {models.ResidentProfile.__table__, models.FamilyMember.__table__}
+
+
+# ===============================
+# Cache
+# ===============================
+def _lookup_query(db: Session):
+    return db.query(models.ResidentProfile).options(
+        selectinload(models.ResidentProfile.family_members)
+    ).filter(
+        models.ResidentProfile.is_deleted == False
+    )
+
+
+def _store(resident: models.ResidentProfile) -> bytes:
+    payload = schemas.ResidentLookup.model_validate(resident).model_dump_json().encode()
+    _entries.set(resident.resident_code, payload)
+    with _codes_lock:
+        _codes_by_id[resident.id] = resident.resident_code
+    return payload
+
+
+def get(resident_code: str) -> bytes | None:
+    payload = _entries.get(resident_code)
+    if payload is not None:
+        _hits.inc()
+    return payload
+
+
+def load(resident_code: str) -> bytes | None:
+    """Read-through for a code that was not cached; None if there is no live resident."""
+    _misses.inc()
+    db = SessionLocal()
+    try:
+        resident = _lookup_query(db).filter(
+            models.ResidentProfile.resident_code == resident_code
+        ).first()
+        return _store(resident) if resident else None
+    finally:
+        db.close()
+
+
+def warm_barangay(barangay: str) -> dict:
+    # Resident rows store the barangay upper-cased; keep the indexed equality
+    barangay = barangay.strip().upper()
+    started = time.perf_counter()
+    cached = 0
+
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            batch = _lookup_query(db).filter(
+                models.ResidentProfile.barangay == barangay,
+                models.ResidentProfile.id > last_id,
+            ).order_by(models.ResidentProfile.id).limit(WARM_BATCH).all()
+
+            if not batch:
+                break
+
+            for resident in batch:
+                _store(resident)
+            cached += len(batch)
+            last_id = batch[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+    return {
+        "barangay": barangay,
+        "cached": cached,
+        "cache_size": len(_entries),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def warm_configured_barangays() -> None:
+    """Startup: every worker warms EVENT_LOOKUP_WARM_BARANGAYS in the background."""
+    def run():
+        for barangay in EVENT_LOOKUP_WARM_BARANGAYS:
+            try:
+                logger.info("Event lookup cache warmed: %s", warm_barangay(barangay))
+            except Exception:
+                logger.exception("Warming the event lookup cache for %s failed", barangay)
+
+    if EVENT_LOOKUP_WARM_BARANGAYS:
+        threading.Thread(target=run, name="event-lookup-warm", daemon=True).start()
+
+
+def evict(resident_code: str | None = None, resident_id: int | None = None) -> None:
+    if resident_code is None and resident_id is not None:
+        with _codes_lock:
+            resident_code = _codes_by_id.get(resident_id)
+    if resident_code is not None and _entries.pop(resident_code) is not None:
+        _evictions.inc()
+
+
+def clear() -> None:
+    _entries.clear()
+    with _codes_lock:
+        _codes_by_id.clear()
+
+
+def status() -> dict:
+    return {
+        "size": len(_entries),
+        "max_size": EVENT_LOOKUP_CACHE_SIZE,
+        "ttl_seconds": EVENT_LOOKUP_TTL_SECONDS,
+        "warm_barangays": EVENT_LOOKUP_WARM_BARANGAYS,
+    }
+
+
+# ===============================
+# Invalidation (every Session, sync or async, on this worker)
+# ===============================
+def _after_flush(session, flush_context):
+    touched = session.info.setdefault("lookup_touched", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, models.ResidentProfile):
+            touched.add(("code", obj.resident_code))
+            touched.add(("id", obj.id))
+        elif isinstance(obj, models.FamilyMember):
+            touched.add(("id", obj.profile_id))
+
+
+def _after_commit(session):
+    for kind, value in session.info.pop("lookup_touched", ()):
+        if kind == "code":
+            evict(resident_code=value)
+        else:
+            evict(resident_id=value)
+    if session.info.pop("lookup_clear", False):
+        clear()
+
+
+def _after_rollback(session):
+    session.info.pop("lookup_touched", None)
+    session.info.pop("lookup_clear", None)
+
+
+# Column that names the cached resident, per table
+_RESIDENT_ID_COLUMNS = {
+    models.ResidentProfile.__table__: models.ResidentProfile.__table__.c.id,
+    models.FamilyMember.__table__: models.FamilyMember.__table__.c.profile_id,
+}
+
+
+def _pinned_resident_ids(whereclause, column) -> list | None:
+    """Resident ids a WHERE clause is limited to (column == x / column IN (...)), or None."""
+    if whereclause is None:
+        return None
+
+    clauses = [whereclause]
+    if isinstance(whereclause, BooleanClauseList) and whereclause.operator is operators.and_:
+        clauses = whereclause.clauses
+
+    for clause in clauses:
+        if not isinstance(clause, BinaryExpression) or not isinstance(clause.right, BindParameter):
+            continue
+        if not (isinstance(clause.left, ColumnElement) and clause.left.compare(column)):
+            continue
+        value = clause.right.effective_value
+        if clause.operator is operators.eq:
+            return [value]
+        if clause.operator is operators.in_op:
+            return list(value)
+    return None
+
+
+def _on_orm_execute(orm_execute_state):
+    # Bulk query.update()/delete() skip the flush: evict the residents the
+    # WHERE clause pins down, or everything on commit when it cannot be told
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is None or mapper.local_table not in RESIDENT_TABLES:
+            return
+
+        session = orm_execute_state.session
+        ids = _pinned_resident_ids(
+            orm_execute_state.statement.whereclause, _RESIDENT_ID_COLUMNS[mapper.local_table]
+        )
+        if ids is None:
+            session.info["lookup_clear"] = True
+        else:
+            session.info.setdefault("lookup_touched", set()).update(("id", value) for value in ids)
+
+
+def install():
+    """Registers the invalidation hooks. Called once from main."""
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
@@ -0,0 +1,216 @@
+# app/services/token_service.py
+# ------------------------------------------------------------
+# Refresh tokens and session revocation
+# - Each login starts a session; every refresh rotates the refresh token within it
+# - A rotated refresh token presented again revokes the whole session (token theft)
+# - Access tokens carry the session id ("sid"); revoked sessions are kept in an
+#   in-memory set so get_current_user never hits the DB to check them
+# - The set is hydrated from refresh_tokens at startup and re-synced periodically,
+#   so revocations made by other workers are picked up within REVOCATION_SYNC_SECONDS
+# ------------------------------------------------------------
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "15"))
+
+# Two tabs refreshing at the same moment present the same token; that is not theft
+REUSE_GRACE = timedelta(seconds=10)
+
+# Overlap between syncs so rows committed late (revoked_at is transaction time) are not missed
+SYNC_OVERLAP = timedelta(minutes=1)
+
+_revoked: dict[str, float] = {}  # session_id -> session expiry (epoch seconds)
+_revoked_lock = threading.Lock()
+_synced_until: datetime | None = None
+_sync_thread: threading.Thread | None = None
+
+
+class RefreshTokenInvalid(Exception):
+    pass
+
+
+# ===============================
+# In-memory revocation set
+# ===============================
+def is_session_revoked(session_id: str) -> bool:
+    return session_id in _revoked
+
+
+def _remember_revoked(session_id: str, expires_at: datetime) -> None:
+    now = time.time()
+    with _revoked_lock:
+        _revoked[session_id] = expires_at.timestamp()
+
+        # Once a session has expired its tokens are rejected anyway
+        for sid in [sid for sid, expiry in _revoked.items() if expiry < now]:
+            del _revoked[sid]
+
+
+def sync_revoked_sessions() -> int:
+    """Loads sessions revoked since the last sync (all unexpired ones on first call)."""
+    global _synced_until
+
+    db = SessionLocal()
+    try:
+        query = db.query(
+            models.RefreshToken.session_id,
+            func.max(models.RefreshToken.expires_at),
+            func.max(models.RefreshToken.revoked_at),
+        ).filter(
+            models.RefreshToken.revoked_at.isnot(None),
+            models.RefreshToken.expires_at > func.now(),
+        )
+        if _synced_until is not None:
+            query = query.filter(models.RefreshToken.revoked_at > _synced_until - SYNC_OVERLAP)
+
+        rows = query.group_by(models.RefreshToken.session_id).all()
+    finally:
+        db.close()
+
+    for session_id, expires_at, revoked_at in rows:
+        _remember_revoked(session_id, expires_at)
+        if _synced_until is None or revoked_at > _synced_until:
+            _synced_until = revoked_at
+
+    return len(rows)
+
+
+def _sync_loop() -> None:
+    while True:
+        time.sleep(REVOCATION_SYNC_SECONDS)
+        try:
+            sync_revoked_sessions()
+        except Exception:
+            logger.exception("Revoked session sync failed")
+
+
+def start_revocation_sync() -> None:
+    global _sync_thread
+
+    sync_revoked_sessions()
+
+    if _sync_thread is None:
+        _sync_thread = threading.Thread(target=_sync_loop, name="revocation-sync", daemon=True)
+        _sync_thread.start()
+
+
+# ===============================
+# Sessions
+# ===============================
+def _new_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _issue(db: Session, user_id: int, session_id: str) -> models.RefreshToken:
+    token = models.RefreshToken(
+        jti=_new_id(),
+        session_id=session_id,
+        user_id=user_id,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(token)
+    return token
+
+
+def start_session(db: Session, user_id: int) -> models.RefreshToken:
+    """Issues the first refresh token of a new session. Caller commits."""
+    return _issue(db, user_id, _new_id())
+
+
+def rotate_refresh_token(db: Session, jti: str) -> models.RefreshToken:
+    """
+    Marks the presented refresh token as used and issues its successor in the
+    same session. Commits. Raises RefreshTokenInvalid if the token is unknown,
+    expired, revoked or was already rotated.
+    """
+    used = db.query(models.RefreshToken).filter(
+        models.RefreshToken.jti == jti,
+        models.RefreshToken.used_at.is_(None),
+        models.RefreshToken.revoked_at.is_(None),
+        models.RefreshToken.expires_at > func.now(),
+    ).update({"used_at": func.now()}, synchronize_session=False)
+
+    token = db.query(models.RefreshToken).filter(models.RefreshToken.jti == jti).first()
+
+    if used != 1:
+        db.rollback()
+        if token and token.used_at and token.revoked_at is None:
+            if token.used_at < datetime.now(timezone.utc) - REUSE_GRACE:
+                logger.warning("Refresh token reuse for user %s; revoking session", token.user_id)
+                revoke_session(db, token.session_id)
+                db.commit()
+        raise RefreshTokenInvalid()
+
+    successor = _issue(db, token.user_id, token.session_id)
+    db.commit()
+    db.refresh(successor)
+    return successor
+
+
+def revoke_session(db: Session, session_id: str) -> None:
+    """Revokes every refresh token of a session. Caller commits."""
+    expires_at = db.query(func.max(models.RefreshToken.expires_at)).filter(
+        models.RefreshToken.session_id == session_id
+    ).scalar()
+    if expires_at is None:
+        return
+
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.session_id == session_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({"revoked_at": func.now()}, synchronize_session=False)
+
+    _remember_revoked(session_id, expires_at)
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> None:
+    """Revokes every unexpired session of a user (archival, password reset). Caller commits."""
+    sessions = db.query(
+        models.RefreshToken.session_id,
+        func.max(models.RefreshToken.expires_at),
+    ).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.expires_at > func.now(),
+    ).group_by(models.RefreshToken.session_id).all()
+
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.revoked_at.is_(None),
+    ).update({"revoked_at": func.now()}, synchronize_session=False)
+
+    for session_id, expires_at in sessions:
+        _remember_revoked(session_id, expires_at)
+
+
+def detach_user_sessions(db: Session, user_id: int) -> None:
+    """
+    Before a user row is deleted: revokes their sessions and keeps the
+    unexpired tokens with user_id cleared, so other workers still pick the
+    revocation up at their next sync (or startup). Caller commits.
+    """
+    revoke_user_sessions(db, user_id)
+
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+        models.RefreshToken.expires_at <= func.now(),
+    ).delete(synchronize_session=False)
+
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id == user_id,
+    ).update({"user_id": None}, synchronize_session=False)
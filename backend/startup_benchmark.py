@@ -0,0 +1,122 @@
+"""
+Worker startup benchmark. Run from backend/ with DATABASE_URL set:
+
+    python startup_benchmark.py --runs 5 --import-budget-ms 1200 --first-response-budget-ms 3000
+
+Measures, best of RUNS:
+  - import time of app.main (python -X importtime, cumulative), and
+  - time to first response: from launching uvicorn until GET PATH answers.
+
+Fails (exit 1) when either is over budget, or when importing app.main loads
+a module that should only load on first use (HEAVY_MODULES). Budgets default
+to STARTUP_IMPORT_BUDGET_MS / STARTUP_FIRST_RESPONSE_BUDGET_MS.
+
+Needs the dev requirements: pip install -r requirements-dev.txt
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Loaded by the endpoints that need them, never by importing the app
+HEAVY_MODULES = ("pandas", "openpyxl", "qrcode", "PIL", "cloudinary")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure_import():
+    """(milliseconds for app.main, top-level packages it imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+
+    total_us = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        packages.add(name.split(".")[0])
+        if name == "app.main":
+            total_us = int(match.group(2))
+
+    if total_us is None:
+        raise RuntimeError("app.main missing from -X importtime output")
+    return total_us / 1000, packages
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(path: str, timeout: float) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited: {server.stderr.read().decode(errors='replace')}")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1)
+                if response.status_code < 500:
+                    return (time.perf_counter() - started) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"no response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--first-response-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_FIRST_RESPONSE_BUDGET_MS", "3000")))
+    parser.add_argument("--path", default="/docs", help="cheap GET used as the first request")
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    failures = []
+
+    import_runs = [measure_import() for _ in range(args.runs)]
+    import_ms = min(ms for ms, _ in import_runs)
+    heavy = sorted(set(HEAVY_MODULES) & set().union(*(packages for _, packages in import_runs)))
+
+    first_response_ms = min(measure_first_response(args.path, args.timeout) for _ in range(args.runs))
+
+    print(f"import app.main:    {import_ms:8.1f} ms (budget {args.import_budget_ms:.0f})")
+    print(f"first response:     {first_response_ms:8.1f} ms (budget {args.first_response_budget_ms:.0f})")
+
+    if import_ms > args.import_budget_ms:
+        failures.append("import time over budget")
+    if first_response_ms > args.first_response_budget_ms:
+        failures.append("time to first response over budget")
+    if heavy:
+        failures.append(f"imported at startup: {', '.join(heavy)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+from app import models, schemas
+from app.crud import crud
+
+
+def _resident(db, code, barangay):
+    db.add(models.ResidentProfile(
+        resident_code=code, last_name="CLAIMTEST", first_name=code, purok="1", barangay=barangay,
+    ))
+    db.flush()
+
+
+def test_mixed_case_event_barangay_matches_residents(db):
+    _resident(db, "TEST-CLAIM-1", "POBLACION")
+    _resident(db, "TEST-CLAIM-2", "SINDOL")
+    event = crud.create_distribution_event(
+        db,
+        schemas.DistributionEventCreate(
+            name="Rice", type_of_assistance="Rice", amount=100, barangay=" Poblacion ",
+        ),
+        user_id=None,
+    )
+
+    result = crud.record_event_claims(db, event, ["TEST-CLAIM-1", "TEST-CLAIM-2", "TEST-CLAIM-X"])
+
+    assert result["claimed"] == ["TEST-CLAIM-1"]
+    assert result["not_eligible"] == ["TEST-CLAIM-2"]
+    assert result["unknown"] == ["TEST-CLAIM-X"]
+    assert result["claims_count"] == 1
+
+
+def test_claiming_twice_reports_already_claimed(db):
+    _resident(db, "TEST-CLAIM-1", "POBLACION")
+    event = crud.create_distribution_event(
+        db,
+        schemas.DistributionEventCreate(name="Rice", type_of_assistance="Rice", barangay="poblacion"),
+        user_id=None,
+    )
+
+    crud.record_event_claims(db, event, ["TEST-CLAIM-1"])
+    result = crud.record_event_claims(db, event, ["TEST-CLAIM-1"])
+
+    assert result["claimed"] == []
+    assert result["already_claimed"] == ["TEST-CLAIM-1"]
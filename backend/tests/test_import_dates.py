@@ -0,0 +1,86 @@
+"""
+parse_date_column must give, cell for cell, what the scalar parse_date gives:
+the vectorized passes are only a faster route to the same dates.
+"""
+
+import random
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.import_service import parse_date, parse_date_column
+
+EDGE_CASES = [
+    # day-first numeric
+    "05/03/1980", "5/3/1980", "05-03-1980", "31/12/1999", "01/13/1980", "13/01/1980",
+    "29/02/2000", "29/02/1900", "29/02/2001", "31/04/1990", "00/00/0000", "01/01/0000",
+    "5/3/80", "05-03-24", "05/03/49", "05/03/50", "05/03/00", "05/03-1980",
+    # ISO and other layouts the fallback handles
+    "1980-03-05", "1980/03/05", "19800305", "1980-03-05 00:00:00",
+    # month names
+    "March 5, 1980", "March 5 1980", "Mar 5, 1980", "Mar 5 1980", "5 March 1980", "5 Mar 1980",
+    "march 5, 1980", "Sept 5, 1980", "February 30, 1980",
+    # blanks and garbage
+    "", "   ", "nan", "None", "NULL", "-", "n/a", "abc", "12", "1980", "  05/03/1980  ",
+    # non-strings
+    None, float("nan"), pd.NaT, np.nan,
+    29285, 29285.0, 29285.75, 0, 1, 60, 61, -1, 2958465, 10 ** 9,
+    pd.Timestamp("1980-03-05"), pd.Timestamp("1980-03-05 13:45"),
+    datetime(1980, 3, 5, 8, 30), date(1980, 3, 5),
+    True, np.int64(29285), np.float64(29285.5),
+]
+
+
+def _random_cell(rng: random.Random):
+    day, month, year = rng.randint(0, 32), rng.randint(0, 13), rng.randint(1900, 2030)
+    month_name = date(2000, rng.randint(1, 12), 1).strftime(rng.choice(["%B", "%b"]))
+    return rng.choice([
+        lambda: f"{day:02d}/{month:02d}/{year}",
+        lambda: f"{day}-{month}-{year % 100:02d}",
+        lambda: f"{day}/{month}/{year % 100}",
+        lambda: f"{year}-{month:02d}-{day:02d}",
+        lambda: f"{month_name} {day}, {year}",
+        lambda: f"{day} {month_name} {year}",
+        lambda: rng.randint(1, 60000),
+        lambda: rng.uniform(1, 60000),
+        lambda: pd.Timestamp(year, rng.randint(1, 12), rng.randint(1, 28)),
+        lambda: datetime(year, rng.randint(1, 12), rng.randint(1, 28)),
+        lambda: rng.choice(EDGE_CASES),
+        lambda: "".join(rng.choice("0123456789/- abcJan") for _ in range(rng.randint(0, 12))),
+    ])()
+
+
+def _assert_matches_scalar(values: list):
+    column = pd.Series(values, dtype=object)
+    expected = [parse_date(v) for v in values]
+    assert parse_date_column(column).tolist() == expected
+
+
+@pytest.mark.parametrize("value", EDGE_CASES, ids=repr)
+def test_edge_case_matches_scalar(value):
+    _assert_matches_scalar([value])
+
+
+def test_edge_cases_in_one_column():
+    _assert_matches_scalar(EDGE_CASES + EDGE_CASES[::-1])
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_column_matches_scalar(seed):
+    rng = random.Random(seed)
+    _assert_matches_scalar([_random_cell(rng) for _ in range(rng.randint(1, 60))])
+
+
+def test_keeps_index_alignment():
+    column = pd.Series(["05/03/1980", None, 29285], index=[10, 3, 7], dtype=object)
+    result = parse_date_column(column)
+    assert list(result.index) == [10, 3, 7]
+    assert result[10] == date(1980, 3, 5)
+    assert result[3] is None
+    assert result[7] == parse_date(29285)
+
+
+def test_empty_column():
+    assert parse_date_column(pd.Series([], dtype=object)).tolist() == []
@@ -0,0 +1,57 @@
+"""
+With SQL_ASSERT_N_PLUS_ONE on, a request that repeats one statement shape past
+the threshold raises NPlusOneDetected; the same lookups batched into one
+statement do not.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core import slow_queries, sql_stats
+
+IDS = list(range(1, 21))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(sql_stats, "SQL_ASSERT_N_PLUS_ONE", True)
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_ENABLED", False)
+    sql_stats.install()
+
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(sql_stats.SQLStatsMiddleware)
+
+    @app.get("/one-by-one")
+    def one_by_one():
+        with engine.connect() as conn:
+            return [conn.execute(text("SELECT :id"), {"id": i}).scalar() for i in IDS]
+
+    @app.get("/batched")
+    def batched():
+        with engine.connect() as conn:
+            values = " UNION ALL ".join(f"SELECT :id{i}" for i in IDS)
+            return conn.execute(text(values), {f"id{i}": i for i in IDS}).scalars().all()
+
+    return TestClient(app)
+
+
+def test_repeated_statement_raises(client):
+    with pytest.raises(sql_stats.NPlusOneDetected, match="GET /one-by-one ran 20 x SELECT"):
+        client.get("/one-by-one")
+
+
+def test_batched_statement_passes(client):
+    response = client.get("/batched")
+
+    assert response.status_code == 200
+    assert response.json() == IDS
+    assert 'desc="1 queries"' in response.headers["server-timing"]
+
+
+def test_repeats_under_the_threshold_pass(client, monkeypatch):
+    monkeypatch.setattr(sql_stats, "SQL_N_PLUS_ONE_THRESHOLD", len(IDS))
+
+    assert client.get("/one-by-one").status_code == 200
@@ -1,5 +1,6 @@
 import { useState } from 'react';
 import { Routes, Route, Navigate, Outlet } from 'react-router-dom';
+import { logout } from './api/api';
 
 // --- REAL COMPONENT IMPORTS ---
 import Login from './components/auth/Login';
@@ -53,7 +54,7 @@ export default function App() {
   };
 
   const handleLogout = () => {
-    localStorage.clear();
+    logout();
     setToken(null);
     setRole(null);
   };
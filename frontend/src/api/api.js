@@ -19,13 +19,58 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// One refresh at a time; concurrent 401s wait for the same request
+let refreshPromise = null;
+
+const refreshAccessToken = async () => {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) throw new Error("No refresh token");
+
+  try {
+    // Plain axios: must not go through this interceptor again
+    const { data } = await axios.post(`${api.defaults.baseURL}/token/refresh`, {
+      refresh_token: refreshToken,
+    });
+
+    localStorage.setItem("token", data.access_token);
+    localStorage.setItem("refresh_token", data.refresh_token);
+    localStorage.setItem("role", data.role);
+    return data.access_token;
+  } catch (error) {
+    // Another tab may have rotated the token meanwhile; use its result
+    const current = localStorage.getItem("refresh_token");
+    if (current && current !== refreshToken) {
+      return localStorage.getItem("token");
+    }
+    throw error;
+  }
+};
+
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    const requestUrl = error.config?.url || "";
+  async (error) => {
+    const original = error.config || {};
+    const requestUrl = original.url || "";
     const isPublicRoute = requestUrl.includes("/public/");
+    const isAuthRoute =
+      requestUrl.includes("/token") || requestUrl.includes("/logout");
+
+    if (error.response?.status === 401 && !isPublicRoute && !isAuthRoute) {
+      if (!original._retried) {
+        original._retried = true;
+
+        try {
+          refreshPromise = refreshPromise || refreshAccessToken();
+          const token = await refreshPromise;
+          original.headers.Authorization = `Bearer ${token}`;
+          return api(original);
+        } catch {
+          // fall through to logout
+        } finally {
+          refreshPromise = null;
+        }
+      }
 
-    if (error.response?.status === 401 && !isPublicRoute) {
       localStorage.clear();
       window.location.href = "/login";
     }
@@ -34,4 +79,17 @@ api.interceptors.response.use(
   }
 );
 
-export default api;
\ No newline at end of file
+export const logout = async () => {
+  const refreshToken = localStorage.getItem("refresh_token");
+  localStorage.clear();
+
+  if (refreshToken) {
+    try {
+      await api.post("/logout", { refresh_token: refreshToken });
+    } catch {
+      // already signed out locally; the session expires on its own
+    }
+  }
+};
+
+export default api;
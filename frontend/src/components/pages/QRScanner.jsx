@@ -21,7 +21,8 @@ export default function QRScanner() {
     setError(false);
 
     try {
-      const response = await api.get(`/residents/code/${value}`);
+      // Event-mode lookup: served from the per-worker cache (warm it per barangay)
+      const response = await api.get(`/residents/lookup/${value}`);
       setResident(response.data);
     } catch (err) {
       console.error("Resident not found");
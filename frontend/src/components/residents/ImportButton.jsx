@@ -3,6 +3,8 @@ import { Upload, Loader2, FileSpreadsheet } from 'lucide-react';
 import api from '../../api/api';
 import toast from 'react-hot-toast';
 
+const POLL_INTERVAL_MS = 1500;
+
 export default function ImportButton({ onSuccess }) {
   const [uploading, setUploading] = useState(false);
   const fileInputRef = useRef(null);
@@ -16,25 +18,61 @@ export default function ImportButton({ onSuccess }) {
     formData.append('file', file);
 
     setUploading(true);
-    const loadingToast = toast.loading("Importing records...");
+    const loadingToast = toast.loading("Checking file...");
 
     try {
-      // Send to Backend
+      // Dry run first: counts new/duplicate/problem rows without writing
+      const preview = await api.post('/import/excel?dry_run=true', formData, {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      });
+      const report = preview.data;
+
+      const proceed = window.confirm(
+        `${report.new} new residents, ${report.existing_duplicates} already registered, ` +
+        `${report.in_file_duplicates} repeated in the file.\n` +
+        `${report.missing_names} rows missing names, ${report.unparseable_dates} unreadable birthdates.\n\n` +
+        `Continue with the import?`
+      );
+      if (!proceed) {
+        toast.dismiss(loadingToast);
+        return;
+      }
+
+      toast.loading("Importing records...", { id: loadingToast });
+
+      // Send to Backend (starts or returns a background import job)
       const response = await api.post('/import/excel', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
 
-      const { added, errors } = response.data;
+      // Poll job progress until it finishes
+      let job = response.data;
+      while (job.status === 'pending' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        const poll = await api.get(`/imports/${job.id}`);
+        job = poll.data;
+
+        if (job.rows_total > 0) {
+          toast.loading(`Importing records... ${job.rows_processed}/${job.rows_total}`, { id: loadingToast });
+        }
+      }
+
+      const { inserted, duplicates, errors } = job;
 
       // Show Result
       toast.dismiss(loadingToast);
-      if (errors && errors.length > 0) {
-        toast.error(`Imported ${added} residents. ${errors.length} rows failed.`);
+      if (job.status === 'failed') {
+        toast.error(`Import failed after ${inserted} residents. Re-upload the file to resume.`);
+        console.error("Import Errors:", errors);
+      } else if (errors && errors.length > 0) {
+        toast.error(`Imported ${inserted} residents. ${job.error_count} rows failed.`);
         console.error("Import Errors:", errors);
       } else {
-        toast.success(`Successfully imported ${added} residents!`);
+        toast.success(`Successfully imported ${inserted} residents! (${duplicates} duplicates skipped)`);
       }
 
       if (onSuccess) onSuccess();
@@ -297,7 +297,7 @@ export default function ResidentList({ userRole, onEdit }) {
                 Personal Information
                 {r.photo_url && (
                   <img
-                    src={r.photo_url}
+                    src={r.photo_thumb_url || r.photo_url}
                     alt="Resident"
                     className="w-14 h-14 object-cover rounded-full border-2 border-stone-200 shadow-sm"
                   />
@@ -761,7 +761,7 @@ export default function ResidentList({ userRole, onEdit }) {
                     <td className="py-4 px-5">
                       <div className="flex items-center gap-4">
                         {r.photo_url ? (
-                          <img src={r.photo_url} alt="Resident" className="w-12 h-12 rounded-full object-cover border-2 border-stone-200 shadow-sm" />
+                          <img src={r.photo_thumb_url || r.photo_url} alt="Resident" className="w-12 h-12 rounded-full object-cover border-2 border-stone-200 shadow-sm" />
                         ) : (
                           <div className="w-12 h-12 rounded-full bg-stone-100 border-2 border-stone-200 flex items-center justify-center text-[10px] font-normal text-stone-400 uppercase tracking-wider">
                             N/A
@@ -242,7 +242,11 @@ export default function PublicLandingPage() {
       navigate(`/public/id/${unlockModal.residentCode}?token=${data.access_token}`);
     } catch (err) {
       console.error("Unlock failed", err);
-      setUnlockError("Invalid birthdate or access denied.");
+      if (err.response?.status === 429) {
+        setUnlockError("Too many attempts. Please try again later.");
+      } else {
+        setUnlockError("Invalid birthdate or access denied.");
+      }
     } finally {
       setUnlocking(false);
     }
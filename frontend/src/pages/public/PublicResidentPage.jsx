@@ -479,18 +479,13 @@ export default function PublicResidentPage() {
 
     const fetchData = async () => {
       try {
-        const response = await api.get(`/public/residents/code/${code}/card`, {
+        // Card fields and the QR (as a data URI) in one request
+        const response = await api.get(`/public/residents/code/${code}/card-bundle`, {
           params: { token },
         });
-        setResident(response.data);
-
-        const qrResponse = await api.get(`/public/residents/code/${code}/qr`, {
-          params: { token },
-          responseType: "blob",
-        });
-
-        const imageUrl = URL.createObjectURL(qrResponse.data);
-        setQrImage(imageUrl);
+        const { qr, ...card } = response.data;
+        setResident(card);
+        setQrImage(qr);
       } catch (err) {
         console.error("Failed to fetch public resident card", err);
         setResident(null);
@@ -502,12 +497,6 @@ export default function PublicResidentPage() {
     fetchData();
   }, [code, token]);
 
-  useEffect(() => {
-    return () => {
-      if (qrImage) URL.revokeObjectURL(qrImage);
-    };
-  }, [qrImage]);
-
   const formattedBirthdate = useMemo(() => {
     if (!resident?.birthdate) return " ";
     const date = new Date(resident.birthdate);